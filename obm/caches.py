@@ -0,0 +1,292 @@
+# Copyright 2020 Alexander Polishchuk
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import abc
+import collections
+import pickle
+import sqlite3
+import sys
+import threading
+from typing import Any, Callable, Optional
+
+__all__ = [
+    "Cache",
+    "LRUCache",
+    "SQLiteCache",
+    "approximate_size",
+]
+
+
+def approximate_size(obj: Any) -> int:
+    """Approximates memory in bytes that is taken by decoded JSON."""
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        for key, value in obj.items():
+            size += approximate_size(key) + approximate_size(value)
+    elif isinstance(obj, (list, tuple)):
+        for item in obj:
+            size += approximate_size(item)
+    return size
+
+
+class Cache(abc.ABC):
+    """Key-value cache interface that is used by connectors."""
+
+    hits: int
+    misses: int
+    evictions: int
+
+    @abc.abstractmethod
+    def __len__(self):
+        ...
+
+    @abc.abstractmethod
+    def __contains__(self, key):
+        ...
+
+    @abc.abstractmethod
+    def get(self, key: str, default: Any = None) -> Any:
+        ...
+
+    @abc.abstractmethod
+    def set(self, key: str, value: Any):
+        ...
+
+    @abc.abstractmethod
+    def delete(self, key: str):
+        ...
+
+    @abc.abstractmethod
+    def clear(self):
+        ...
+
+    @abc.abstractmethod
+    def stats(self) -> dict:
+        ...
+
+
+class LRUCache(Cache):
+    """In-memory least recently used cache.
+
+    Args:
+        max_items: Max number of entries. Defaults to 1000.
+        max_bytes: Max approximate size of entries. Unlimited by default.
+        sizeof: Function that returns the entry size in bytes. Used only
+            when max_bytes is set. Defaults to approximate_size.
+    """
+
+    def __init__(
+        self,
+        max_items: Optional[int] = 1000,
+        max_bytes: Optional[int] = None,
+        sizeof: Callable[[Any], int] = approximate_size,
+    ):
+        if max_items is None and max_bytes is None:
+            raise ValueError("Either max_items or max_bytes must be set")
+        if max_items is not None and max_items <= 0:
+            raise ValueError("Max items must be greater than zero")
+        if max_bytes is not None and max_bytes <= 0:
+            raise ValueError("Max bytes must be greater than zero")
+        self.max_items = max_items
+        self.max_bytes = max_bytes
+        self.sizeof = sizeof
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries: collections.OrderedDict = collections.OrderedDict()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def get(self, key: str, default: Any = None) -> Any:
+        try:
+            value, _ = self._entries[key]
+        except KeyError:
+            self.misses += 1
+            return default
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key: str, value: Any):
+        size = self.sizeof(value) if self.max_bytes is not None else 0
+        if self.max_bytes is not None and size > self.max_bytes:
+            # Entry can't be cached without evicting everything else.
+            return
+        self.delete(key)
+        self._entries[key] = (value, size)
+        self.size += size
+        while (
+            self.max_items is not None and len(self._entries) > self.max_items
+        ) or (self.max_bytes is not None and self.size > self.max_bytes):
+            _, (_, evicted_size) = self._entries.popitem(last=False)
+            self.size -= evicted_size
+            self.evictions += 1
+
+    def delete(self, key: str):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.size -= entry[1]
+
+    def clear(self):
+        self._entries.clear()
+        self.size = 0
+
+    def stats(self) -> dict:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "items": len(self._entries),
+            "bytes": self.size,
+        }
+
+
+class SQLiteCache(Cache):
+    """Persistent least recently used cache that is stored in SQLite.
+
+    Values are pickled, so the database file must be trusted.
+
+    Args:
+        path: Database file path.
+        max_items: Max number of entries. Unlimited by default.
+        max_bytes: Max size of pickled entries. Unlimited by default.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        max_items: Optional[int] = None,
+        max_bytes: Optional[int] = None,
+    ):
+        if max_items is not None and max_items <= 0:
+            raise ValueError("Max items must be greater than zero")
+        if max_bytes is not None and max_bytes <= 0:
+            raise ValueError("Max bytes must be greater than zero")
+        self.path = path
+        self.max_items = max_items
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(
+            path, isolation_level=None, check_same_thread=False
+        )
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS cache ("
+            "key TEXT PRIMARY KEY, "
+            "value BLOB NOT NULL, "
+            "size INTEGER NOT NULL, "
+            "used_at INTEGER NOT NULL)"
+        )
+        self._db.execute(
+            "CREATE INDEX IF NOT EXISTS cache_used_at ON cache (used_at)"
+        )
+        self._count, self.size, self._clock = self._db.execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0), "
+            "COALESCE(MAX(used_at), 0) FROM cache"
+        ).fetchone()
+
+    def __len__(self):
+        return self._count
+
+    def __contains__(self, key):
+        with self._lock:
+            row = self._db.execute(
+                "SELECT 1 FROM cache WHERE key = ?", (key,)
+            ).fetchone()
+        return row is not None
+
+    def _tick(self) -> int:
+        self._clock += 1
+        return self._clock
+
+    def get(self, key: str, default: Any = None) -> Any:
+        with self._lock:
+            row = self._db.execute(
+                "SELECT value FROM cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return default
+            self._db.execute(
+                "UPDATE cache SET used_at = ? WHERE key = ?",
+                (self._tick(), key),
+            )
+            self.hits += 1
+        return pickle.loads(row[0])
+
+    def set(self, key: str, value: Any):
+        blob = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        if self.max_bytes is not None and len(blob) > self.max_bytes:
+            return
+        with self._lock:
+            self._delete(key)
+            self._db.execute(
+                "INSERT INTO cache (key, value, size, used_at) "
+                "VALUES (?, ?, ?, ?)",
+                (key, blob, len(blob), self._tick()),
+            )
+            self._count += 1
+            self.size += len(blob)
+            self._evict()
+
+    def _evict(self):
+        while (self.max_items is not None and self._count > self.max_items) or (
+            self.max_bytes is not None and self.size > self.max_bytes
+        ):
+            key, size = self._db.execute(
+                "SELECT key, size FROM cache ORDER BY used_at LIMIT 1"
+            ).fetchone()
+            self._db.execute("DELETE FROM cache WHERE key = ?", (key,))
+            self._count -= 1
+            self.size -= size
+            self.evictions += 1
+
+    def _delete(self, key: str):
+        row = self._db.execute(
+            "SELECT size FROM cache WHERE key = ?", (key,)
+        ).fetchone()
+        if row is not None:
+            self._db.execute("DELETE FROM cache WHERE key = ?", (key,))
+            self._count -= 1
+            self.size -= row[0]
+
+    def delete(self, key: str):
+        with self._lock:
+            self._delete(key)
+
+    def clear(self):
+        with self._lock:
+            self._db.execute("DELETE FROM cache")
+            self._count = 0
+            self.size = 0
+
+    def close(self):
+        self._db.close()
+
+    def stats(self) -> dict:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "items": self._count,
+            "bytes": self.size,
+        }
@@ -0,0 +1,134 @@
+# Copyright 2020 Alexander Polishchuk
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import abc
+import functools
+import json
+import re
+from decimal import Decimal
+from typing import Any, Union
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+__all__ = [
+    "Codec",
+    "OrjsonCodec",
+    "StdlibCodec",
+    "create",
+]
+
+STDLIB = "json"
+ORJSON = "orjson"
+CODECS = [STDLIB, ORJSON]
+DEFAULT = ORJSON if orjson is not None else STDLIB
+
+# Matches a number that orjson can't decode precisely and that follows a
+# JSON delimiter: a number with a fraction or an exponent, which orjson
+# decodes as float, or an integer of 19 digits and more, which may not fit
+# into 64 bits and is silently turned into float too. It may also match
+# inside a string, which only costs a slower decoding.
+_FLOAT_RE = re.compile(rb"[:,\[]\s*-?(?:\d+(?:\.|[eE])|\d{19})")
+
+
+def _default(obj):
+    if isinstance(obj, Decimal):
+        return str(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not serializable")
+
+
+class _DecimalEncoder(json.JSONEncoder):
+    def default(self, obj):  # pylint: disable=method-hidden, arguments-differ
+        if isinstance(obj, Decimal):
+            return str(obj)
+        return super().default(obj)
+
+
+class Codec(abc.ABC):
+    """Encodes JSON-RPC requests and decodes responses.
+
+    Fractional numbers must be decoded as Decimal to keep amounts precise,
+    and Decimal must be encoded as a string.
+    """
+
+    name: str
+
+    @abc.abstractmethod
+    def loads(self, data: Union[str, bytes]) -> Any:
+        ...
+
+    @abc.abstractmethod
+    def dumps(self, obj: Any) -> bytes:
+        ...
+
+
+class StdlibCodec(Codec):
+    """Codec based on the standard json module."""
+
+    name = STDLIB
+
+    def __init__(self):
+        self._loads = functools.partial(json.loads, parse_float=Decimal)
+        self._encoder = _DecimalEncoder(separators=(",", ":"))
+
+    def loads(self, data: Union[str, bytes]) -> Any:
+        return self._loads(data)
+
+    def dumps(self, obj: Any) -> bytes:
+        return self._encoder.encode(obj).encode()
+
+
+class OrjsonCodec(StdlibCodec):
+    """Codec based on orjson.
+
+    orjson decodes fractional numbers and integers that don't fit into 64
+    bits as float, so a message that contains them is decoded by the
+    standard json module. Geth encodes numbers as
+    hex strings, so its messages are always decoded by orjson.
+    """
+
+    name = ORJSON
+
+    def __init__(self):
+        if orjson is None:
+            raise ImportError("orjson is required to use OrjsonCodec")
+        super().__init__()
+
+    def loads(self, data: Union[str, bytes]) -> Any:
+        if isinstance(data, str):
+            data = data.encode()
+        if _FLOAT_RE.search(data):
+            return super().loads(data)
+        return orjson.loads(data)
+
+    def dumps(self, obj: Any) -> bytes:
+        return orjson.dumps(obj, default=_default)
+
+
+def create(name: str = DEFAULT) -> Codec:
+    """Creates the codec by name.
+
+    Args:
+        name: One of 'json' and 'orjson'. Defaults to 'orjson' if it's
+            installed and to 'json' otherwise.
+
+    Returns:
+        Codec instance.
+    """
+    if name not in CODECS:
+        raise ValueError(f"Unsupported codec. Available only: {CODECS}")
+    if name == ORJSON:
+        return OrjsonCodec()
+    return StdlibCodec()
@@ -0,0 +1,139 @@
+# Copyright 2020 Alexander Polishchuk
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import asyncio
+import contextlib
+import time
+from typing import Optional, Union
+
+__all__ = [
+    "AdaptiveConcurrency",
+]
+
+
+class AdaptiveConcurrency:
+    """AIMD limit of concurrent requests to a node.
+
+    The limit grows additively (by one per limit of successful requests)
+    while the node responds faster than the latency target, and shrinks
+    multiplicatively on errors or slow responses. Only requests started
+    after the latest decrease can decrease the limit again, so a single
+    congestion episode halves the limit once.
+
+    Args:
+        initial_limit: Starting concurrency limit. Defaults to 10.
+        min_limit: Lower concurrency bound. Defaults to 1.
+        max_limit: Upper concurrency bound. Defaults to 200.
+        backoff_ratio: Multiplier applied to the limit on congestion.
+            Defaults to 0.5.
+        latency_target: Response time in seconds above which a request is
+            considered congested. Defaults to latency_tolerance times the
+            minimal observed latency.
+        latency_tolerance: Used only when latency_target is None.
+            Defaults to 2.
+    """
+
+    def __init__(
+        self,
+        initial_limit: int = 10,
+        min_limit: int = 1,
+        max_limit: int = 200,
+        backoff_ratio: float = 0.5,
+        latency_target: Optional[Union[int, float]] = None,
+        latency_tolerance: Union[int, float] = 2,
+    ):
+        if not 1 <= min_limit <= initial_limit <= max_limit:
+            raise ValueError(
+                "Limits must satisfy 1 <= min_limit <= initial_limit "
+                "<= max_limit"
+            )
+        if not 0 < backoff_ratio < 1:
+            raise ValueError("Backoff ratio must be between zero and one")
+        if latency_target is not None and latency_target <= 0:
+            raise ValueError("Latency target must be greater than zero")
+        if latency_tolerance <= 1:
+            raise ValueError("Latency tolerance must be greater than one")
+
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.backoff_ratio = backoff_ratio
+        self.latency_target = latency_target
+        self.latency_tolerance = latency_tolerance
+        self.in_flight = 0
+        self.min_latency: Optional[float] = None
+        self.successes = 0
+        self.errors = 0
+        self.congestions = 0
+        self._limit = float(initial_limit)
+        self._decreased_at = float("-inf")
+        self._condition: Optional[asyncio.Condition] = None
+
+    def __repr__(self):
+        return (
+            f"{type(self).__name__}(limit={self.limit}, "
+            f"in_flight={self.in_flight})"
+        )
+
+    @property
+    def limit(self) -> int:
+        """Currently chosen concurrency."""
+        return int(self._limit)
+
+    @contextlib.asynccontextmanager
+    async def track(self):
+        """Waits for a free slot and measures the wrapped request."""
+        # Condition is created lazily to bind it to the running loop.
+        if self._condition is None:
+            self._condition = asyncio.Condition()
+        async with self._condition:
+            await self._condition.wait_for(
+                lambda: self.in_flight < self.limit
+            )
+            self.in_flight += 1
+
+        started_at = time.monotonic()
+        try:
+            yield
+        except Exception:
+            self.errors += 1
+            self._decrease(started_at)
+            raise
+        else:
+            self.successes += 1
+            self._observe(started_at, time.monotonic() - started_at)
+        finally:
+            async with self._condition:
+                self.in_flight -= 1
+                self._condition.notify_all()
+
+    def _observe(self, started_at: float, latency: float):
+        if self.min_latency is None or latency < self.min_latency:
+            self.min_latency = latency
+        else:
+            # Let the baseline slowly follow the node when it gets slower.
+            self.min_latency += (latency - self.min_latency) * 0.01
+
+        target = self.latency_target
+        if target is None:
+            target = self.min_latency * self.latency_tolerance
+        if latency > target:
+            self._decrease(started_at)
+        else:
+            self._limit = min(self.max_limit, self._limit + 1 / self._limit)
+
+    def _decrease(self, started_at: float):
+        if started_at < self._decreased_at:
+            return
+        self.congestions += 1
+        self._limit = max(self.min_limit, self._limit * self.backoff_ratio)
+        self._decreased_at = time.monotonic()
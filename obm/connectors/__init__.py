@@ -11,18 +11,53 @@
 # WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
 # See the License for the specific language governing permissions and
 # limitations under the License.
-from obm.connectors.base import DEFAULT_TIMEOUT, Connector
-from obm.connectors.bitcoin import BitcoinCoreConnector
-from obm.connectors.ethereum import GethConnector
+import importlib
+from collections.abc import Mapping
+
+from obm.connectors.base import DEFAULT_HEAD_TTL, DEFAULT_TIMEOUT, Connector
 
 __all__ = [
     "BitcoinCoreConnector",
     "GethConnector",
+    "DEFAULT_HEAD_TTL",
     "DEFAULT_TIMEOUT",
 ]
 
-MAPPING = {
-    "bitcoin-core": BitcoinCoreConnector,
-    "geth": GethConnector,
+# Connectors are imported on first access to keep import of the package
+# fast for the nodes that aren't used.
+_CONNECTORS = {
+    "BitcoinCoreConnector": "obm.connectors.bitcoin",
+    "GethConnector": "obm.connectors.ethereum",
+}
+
+
+def __getattr__(name):
+    if name in _CONNECTORS:
+        module = importlib.import_module(_CONNECTORS[name])
+        return getattr(module, name)
+    raise AttributeError(f"module '{__name__}' has no attribute '{name}'")
+
+
+class _LazyMapping(Mapping):
+    def __init__(self, names: dict):
+        self._names = names
+
+    def __getitem__(self, key):
+        return __getattr__(self._names[key])
+
+    def __iter__(self):
+        return iter(self._names)
+
+    def __len__(self):
+        return len(self._names)
+
+
+MAPPING = _LazyMapping(
+    {"bitcoin-core": "BitcoinCoreConnector", "geth": "GethConnector"}
+)
+# Keep in sync with the currency attribute of connectors.
+CURRENCIES = {
+    "bitcoin-core": "bitcoin",
+    "geth": "ethereum",
 }
-SUPPORTED_CURRENCIES = list({node.currency for node in MAPPING.values()})
+SUPPORTED_CURRENCIES = list(dict.fromkeys(CURRENCIES.values()))
@@ -14,17 +14,34 @@
 import abc
 import asyncio
 import functools
-import json
+import inspect
+import itertools
+import time
 from decimal import Decimal
+from typing import AsyncIterator
+from typing import Awaitable
+from typing import Callable
+from typing import Dict
 from typing import List
 from typing import Optional
+from typing import Sequence
+from typing import Tuple
 from typing import Union
 
 import aiohttp
 
-from obm import exceptions
+from obm import (
+    caches,
+    codecs,
+    exceptions,
+    metrics,
+    retries,
+    tracing,
+    transports,
+)
 
 DEFAULT_TIMEOUT = 5 * 60
+DEFAULT_HEAD_TTL = 1
 
 
 def _catch_network_errors(func):
@@ -44,14 +61,169 @@ def _catch_network_errors(func):
     return wrapper
 
 
-class _DecimalEncoder(json.JSONEncoder):
-    def default(self, obj):  # pylint: disable=method-hidden, arguments-differ
-        if isinstance(obj, Decimal):
-            return str(obj)
-        return super().default(obj)
+def _rpc_method(cls, name: str, rpc_method: str):
+    spec = cls.METHOD_PARAMS.get(rpc_method)
+    if spec is None:
+
+        async def method(self, *params):
+            return await self.wrapper(*params, method=rpc_method)
+
+        method.__doc__ = (
+            f"Calls '{rpc_method}' RPC method with positional params and "
+            f"returns its result."
+        )
+    else:
+        names = [param.rstrip("?") for param in spec]
+        required = sum(not param.endswith("?") for param in spec)
+        signature = inspect.Signature(
+            [inspect.Parameter("self", inspect.Parameter.POSITIONAL_ONLY)]
+            + [
+                inspect.Parameter(
+                    param,
+                    inspect.Parameter.POSITIONAL_OR_KEYWORD,
+                    default=(
+                        inspect.Parameter.empty if i < required else None
+                    ),
+                )
+                for i, param in enumerate(names)
+            ]
+        )
+
+        async def method(self, *params, **kwargs):
+            if kwargs or not required <= len(params) <= len(names):
+                bound = signature.bind(self, *params, **kwargs)
+                bound.apply_defaults()
+                params = tuple(bound.arguments.values())[1:]
+            # Omitted optional params are left to the node defaults.
+            while len(params) > required and params[-1] is None:
+                params = params[:-1]
+            return await self.wrapper(*params, method=rpc_method)
+
+        method.__signature__ = signature  # type: ignore
+        if names:
+            params_doc = [
+                name if i < required else f"optional {name}"
+                for i, name in enumerate(names)
+            ]
+            if len(params_doc) > 1:
+                params_doc[-2:] = [" and ".join(params_doc[-2:])]
+            method.__doc__ = (
+                f"Calls '{rpc_method}' RPC method with "
+                f"{', '.join(params_doc)} params "
+                f"and returns its result."
+            )
+        else:
+            method.__doc__ = (
+                f"Calls '{rpc_method}' RPC method and returns its result."
+            )
+
+    method.__name__ = name
+    method.__qualname__ = f"{cls.__name__}.{name}"
+    method.__module__ = cls.__module__
+    return method
+
+
+def _traced(func):
+    """Wraps the connector method into a span named after it."""
+    name = func.__name__
+    if inspect.iscoroutinefunction(func):
+
+        @functools.wraps(func)
+        async def traced(self, *args, **kwargs):
+            if not self.tracer.enabled:
+                return await func(self, *args, **kwargs)
+            with self.tracer.span(name, node=self.node):
+                return await func(self, *args, **kwargs)
+
+    else:
+
+        @functools.wraps(func)
+        def traced(self, *args, **kwargs):
+            if not self.tracer.enabled:
+                return func(self, *args, **kwargs)
+            with self.tracer.span(name, node=self.node):
+                return func(self, *args, **kwargs)
+
+    return traced
+
+
+class HeadTracker:
+    """Keeps the latest block number for a short time.
+
+    Callers that come while the head is being fetched wait for the same
+    request instead of sending their own.
+
+    Args:
+        fetch: Coroutine function that fetches the latest block number.
+        ttl: Seconds the fetched head is considered actual.
+    """
+
+    def __init__(
+        self,
+        fetch: Callable[[], Awaitable[int]],
+        ttl: Union[int, float] = DEFAULT_HEAD_TTL,
+    ):
+        if ttl < 0:
+            raise ValueError("TTL must not be negative")
+        self.fetch = fetch
+        self.ttl = ttl
+        self.head: Optional[int] = None
+        self._updated_at: Optional[float] = None
+        self._pending: Optional[asyncio.Future] = None
+
+    @property
+    def is_expired(self) -> bool:
+        return (
+            self._updated_at is None
+            or time.monotonic() - self._updated_at >= self.ttl
+        )
+
+    async def get(self) -> int:
+        if not self.is_expired:
+            return self.head
+        if self._pending is None:
+            self._pending = asyncio.ensure_future(self._refresh())
+        # Shield the shared request from cancellation of a single caller.
+        return await asyncio.shield(self._pending)
+
+    async def _refresh(self) -> int:
+        try:
+            self.update(await self.fetch())
+            return self.head
+        finally:
+            self._pending = None
+
+    def update(self, head: int):
+        """Updates the head with the value that was observed elsewhere."""
+        if self.head is None or head >= self.head or self.is_expired:
+            self.head = head
+        self._updated_at = time.monotonic()
+
+    def invalidate(self):
+        self._updated_at = None
 
 
 class Connector(abc.ABC):
+    # Number of confirmations after which node data is treated as immutable.
+    DEFAULT_FINALITY_DEPTH = 6
+    # RPC methods that are safe to retry.
+    IDEMPOTENT_METHODS: frozenset = frozenset()
+    # Params of RPC methods to generate signatures of METHODS. Optional
+    # params are marked with a trailing '?'. Methods that aren't listed
+    # take any positional params.
+    METHOD_PARAMS: Dict[str, Tuple[str, ...]] = {}
+    # Methods that are wrapped into spans of the same name.
+    TRACED_METHODS = (
+        "fetch_latest_block_number",
+        "create_address",
+        "estimate_fee",
+        "send_transaction",
+        "fetch_recent_transactions",
+        "fetch_in_wallet_transaction",
+        "fetch_in_wallet_transactions",
+        "format_transaction",
+    )
+
     def __init__(
         self,
         rpc_host: str,
@@ -59,6 +231,16 @@ class Connector(abc.ABC):
         loop: Optional[asyncio.AbstractEventLoop] = None,
         session: Optional[aiohttp.ClientSession] = None,
         timeout: Union[int, float] = DEFAULT_TIMEOUT,
+        cache: Optional[caches.Cache] = None,
+        finality_depth: Optional[int] = None,
+        head_ttl: Union[int, float] = DEFAULT_HEAD_TTL,
+        transport: Union[str, transports.Transport] = transports.HTTP,
+        codec: Union[str, codecs.Codec] = codecs.DEFAULT,
+        keep_info: bool = True,
+        retry_policy: Optional[retries.RetryPolicy] = None,
+        circuit_breaker: Optional[retries.CircuitBreaker] = None,
+        metrics_registry: Optional[metrics.Registry] = None,
+        tracer: Optional[tracing.Tracer] = None,
     ):
         if not isinstance(rpc_host, str):
             raise TypeError(
@@ -81,6 +263,57 @@ class Connector(abc.ABC):
                 )
             if timeout <= 0:
                 raise ValueError("Timeout must be greater than zero")
+        if cache is not None and not isinstance(cache, caches.Cache):
+            raise TypeError(
+                f"Cache must be a obm.caches.Cache, "
+                f"not '{type(cache).__name__}'"
+            )
+        if retry_policy is not None and not isinstance(
+            retry_policy, retries.RetryPolicy
+        ):
+            raise TypeError(
+                f"Retry policy must be a obm.retries.RetryPolicy, "
+                f"not '{type(retry_policy).__name__}'"
+            )
+        if circuit_breaker is not None and not isinstance(
+            circuit_breaker, retries.CircuitBreaker
+        ):
+            raise TypeError(
+                f"Circuit breaker must be a obm.retries.CircuitBreaker, "
+                f"not '{type(circuit_breaker).__name__}'"
+            )
+        if metrics_registry is not None and not isinstance(
+            metrics_registry, metrics.Registry
+        ):
+            raise TypeError(
+                f"Metrics registry must be a obm.metrics.Registry, "
+                f"not '{type(metrics_registry).__name__}'"
+            )
+        if tracer is not None and not isinstance(tracer, tracing.Tracer):
+            raise TypeError(
+                f"Tracer must be a obm.tracing.Tracer, "
+                f"not '{type(tracer).__name__}'"
+            )
+        if isinstance(codec, str):
+            codec = codecs.create(codec)
+        elif not isinstance(codec, codecs.Codec):
+            raise TypeError(
+                f"Codec must be a string or obm.codecs.Codec, "
+                f"not '{type(codec).__name__}'"
+            )
+        if isinstance(transport, str):
+            transport = transports.create(
+                transport, rpc_host, rpc_port, timeout=timeout, codec=codec,
+            )
+        elif not isinstance(transport, transports.Transport):
+            raise TypeError(
+                f"Transport must be a string or obm.transports.Transport, "
+                f"not '{type(transport).__name__}'"
+            )
+        if finality_depth is None:
+            finality_depth = self.DEFAULT_FINALITY_DEPTH
+        if finality_depth < 0:
+            raise ValueError("Finality depth must not be negative")
 
         # TODO: Create auth here
         url = f"{rpc_host}:{rpc_port}"
@@ -89,12 +322,37 @@ class Connector(abc.ABC):
         self.timeout = timeout
         self.session = session
         self.url = url if url.startswith("http") else "http://" + url
-        self.loop = loop or asyncio.get_event_loop()
+        # Loop is resolved lazily, so a connector can be created in one
+        # thread and used by the loop of another one.
+        self._loop = loop
+        self.transport = transport
+        self.codec = codec
+        # Whether transaction records keep the original node payload.
+        self.keep_info = keep_info
+        self.retry_policy = retry_policy
+        self.circuit_breaker = circuit_breaker
+        self.metrics_registry = metrics_registry or metrics.REGISTRY
+        self.tracer = tracer or tracing.NULL_TRACER
+        self.cache = cache
+        self.finality_depth = finality_depth
+        self.head_tracker = HeadTracker(
+            self.fetch_latest_block_number, head_ttl
+        )
+        self._request_ids = itertools.count(1)
+        self._in_flight: Dict[tuple, asyncio.Future] = {}
 
-    def __getattribute__(self, item):
-        if item != "METHODS" and item in self.METHODS:
-            return functools.partial(self.wrapper, method=self.METHODS[item])
-        return super().__getattribute__(item)
+    @property
+    def loop(self) -> asyncio.AbstractEventLoop:
+        return self._loop or asyncio.get_event_loop()
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        for name, rpc_method in getattr(cls, "METHODS", {}).items():
+            if name not in cls.__dict__:
+                setattr(cls, name, _rpc_method(cls, name, rpc_method))
+        for name in cls.TRACED_METHODS:
+            if name in cls.__dict__:
+                setattr(cls, name, _traced(cls.__dict__[name]))
 
     async def __aenter__(self):
         await self.open()
@@ -104,29 +362,262 @@ class Connector(abc.ABC):
         await self.close()
 
     async def open(self):
-        if self.session is None:
+        if self.transport is not None:
+            await self.transport.open()
+        elif self.session is None:
+            trace_configs = None
+            if self.tracer.enabled:
+                trace_configs = [tracing.create_trace_config(self.tracer)]
+            # Session is bound to the running loop, which is the
+            # background one for the sync interface even if a loop is given.
             self.session = aiohttp.ClientSession(
-                loop=self.loop,
                 headers=self.headers,
                 auth=self.auth,
                 timeout=aiohttp.ClientTimeout(total=self.timeout),
-                json_serialize=functools.partial(
-                    json.dumps, cls=_DecimalEncoder
-                ),
+                trace_configs=trace_configs,
             )
 
     async def close(self):
+        if self.transport is not None:
+            await self.transport.close()
         if self.session is not None:
             await self.session.close()
             self.session = None
 
+    def is_idempotent(self, payload: Union[dict, list]) -> bool:
+        payloads = payload if isinstance(payload, list) else [payload]
+        return all(
+            entry.get("method") in self.IDEMPOTENT_METHODS
+            for entry in payloads
+        )
+
+    async def call(self, payload: Union[dict, list]) -> Union[dict, list]:
+        """Sends the payload applying the retry policy and circuit breaker.
+
+        Only requests that consist of IDEMPOTENT_METHODS are retried.
+        """
+        if not self.tracer.enabled:
+            return await self._call(payload)
+        method = (
+            metrics.BATCH if isinstance(payload, list) else payload["method"]
+        )
+        with self.tracer.span("rpc.call", node=self.node, method=method):
+            return await self._call(payload)
+
+    async def _call(self, payload: Union[dict, list]) -> Union[dict, list]:
+        try:
+            response = await self._call_with_retries(payload)
+        except exceptions.BaseError as exc:
+            self._record_calls(payload, error=type(exc).__name__)
+            raise
+        self._record_calls(payload, response)
+        return response
+
+    async def _call_with_retries(
+        self, payload: Union[dict, list]
+    ) -> Union[dict, list]:
+        breaker = self.circuit_breaker
+        policy = self.retry_policy
+        attempt = 1
+        while True:
+            if breaker is not None:
+                breaker.before_call()
+            try:
+                response = await self.send(payload)
+            except exceptions.NetworkError:
+                if breaker is not None:
+                    breaker.record_failure()
+                if (
+                    policy is None
+                    or attempt >= policy.max_attempts
+                    or not self.is_idempotent(payload)
+                ):
+                    raise
+            except BaseException:
+                if breaker is not None:
+                    breaker.release()
+                raise
+            else:
+                if breaker is not None:
+                    breaker.record_success()
+                return response
+            await asyncio.sleep(policy.delay(attempt))
+            attempt += 1
+
+    def _record_calls(
+        self,
+        payload: Union[dict, list],
+        response: Union[dict, list, None] = None,
+        error: Optional[str] = None,
+    ):
+        payloads = payload if isinstance(payload, list) else [payload]
+        if isinstance(response, list):
+            responses = {
+                entry.get("id"): entry
+                for entry in response
+                if isinstance(entry, dict)
+            }
+        else:
+            responses = {entry.get("id"): response for entry in payloads}
+        for entry in payloads:
+            entry_error = error
+            entry_response = responses.get(entry.get("id"))
+            if entry_error is None and (
+                not isinstance(entry_response, dict)
+                or entry_response.get("error") is not None
+            ):
+                entry_error = exceptions.NodeError.__name__
+            self.metrics_registry.record_call(
+                self.node, self.rpc_address, entry.get("method"), entry_error
+            )
+
+    @property
+    def rpc_address(self) -> str:
+        return f"{self.rpc_host}:{self.rpc_port}"
+
+    async def send(self, payload: Union[dict, list]) -> Union[dict, list]:
+        method = (
+            metrics.BATCH if isinstance(payload, list) else payload["method"]
+        )
+        started_at = time.monotonic()
+        sent = received = 0
+        try:
+            response, sent, received = await self._exchange(payload)
+            return response
+        finally:
+            self.metrics_registry.record_request(
+                self.node,
+                self.rpc_address,
+                method,
+                time.monotonic() - started_at,
+                sent,
+                received,
+            )
+
     @_catch_network_errors
-    async def call(self, payload: dict) -> dict:
+    async def _exchange(
+        self, payload: Union[dict, list]
+    ) -> Tuple[Union[dict, list], int, int]:
+        if self.transport is not None:
+            return await self.transport.exchange(payload)
         await self.open()
-        async with self.session.post(url=self.url, json=payload) as response:
-            return await response.json(
-                loads=functools.partial(json.loads, parse_float=Decimal)
+        data = self.codec.dumps(payload)
+        # Headers are repeated for sessions that are passed by a user.
+        async with self.session.post(
+            url=self.url, data=data, headers=self.headers
+        ) as response:
+            body = await response.read()
+        try:
+            if not self.tracer.enabled:
+                return self.codec.loads(body), len(data), len(body)
+            with self.tracer.span("json.decode", size=len(body)):
+                return self.codec.loads(body), len(data), len(body)
+        except ValueError:
+            raise exceptions.NetworkError(
+                f"Node responded with invalid JSON, status: {response.status}"
+            )
+
+    async def call_batch(
+        self,
+        calls: Sequence[Tuple[str, Sequence]],
+        return_exceptions: bool = False,
+    ) -> list:
+        """Calls several RPC methods within a single JSON-RPC batch request.
+
+        Concurrent identical batches of idempotent methods share a single
+        request like wrapper calls do.
+
+        Args:
+            calls: Pairs of a method and its params. The method is either
+                a connector method name from METHODS (e.g. 'rpc_get_block')
+                or a raw RPC method name (e.g. 'getblock').
+            return_exceptions: If True node errors are returned in place of
+                failed entries results instead of raising. Defaults to False.
+
+        Returns:
+            Results list ordered in the same way as calls.
+        """
+        if not calls:
+            return []
+        calls = [
+            (self.METHODS.get(method, method), params)
+            for method, params in calls
+        ]
+        if all(method in self.IDEMPOTENT_METHODS for method, _ in calls):
+            key = ("batch", self.codec.dumps(calls))
+            results = await self._single_flight(
+                key, lambda: self._call_batch(calls)
             )
+        else:
+            results = await self._call_batch(calls)
+        if not return_exceptions:
+            for result in results:
+                if isinstance(result, exceptions.NodeError):
+                    raise result
+        # Results may be shared, so each caller gets its own list.
+        return list(results)
+
+    async def _call_batch(self, calls: Sequence[Tuple[str, Sequence]]):
+        payloads = [
+            self.build_payload(method, params) for method, params in calls
+        ]
+        responses = await self.call(payload=payloads)
+        if not isinstance(responses, list):
+            # Node rejects the whole batch, e.g. with a parse error.
+            await self.validate(responses)
+            raise exceptions.NodeInvalidResponceError(responses)
+
+        responses_by_id = {
+            response.get("id"): response
+            for response in responses
+            if isinstance(response, dict)
+        }
+        results = []
+        for payload in payloads:
+            try:
+                response = responses_by_id.get(payload["id"])
+                if response is None:
+                    raise exceptions.NodeInvalidResponceError(responses)
+                results.append(await self.validate(response))
+            except exceptions.NodeError as exc:
+                results.append(exc)
+        return results
+
+    def next_request_id(self) -> int:
+        return next(self._request_ids)
+
+    def cache_key(self, *parts) -> str:
+        # Node and address prefix lets the same cache be shared between
+        # connectors, as results depend on the wallet and the chain.
+        return ":".join([self.node, self.rpc_address, *map(str, parts)])
+
+    async def wrapper(self, *args, method: str = None) -> Union[dict, list]:
+        """Calls the RPC method.
+
+        Concurrent calls of the same idempotent method with the same params
+        share a single request and its result, so the result must not be
+        modified.
+        """
+        assert method is not None
+        if method not in self.IDEMPOTENT_METHODS:
+            return await self._call_method(method, args)
+        key = (method, self.codec.dumps(args))
+        return await self._single_flight(
+            key, lambda: self._call_method(method, args)
+        )
+
+    async def _single_flight(self, key: tuple, call: Callable[[], Awaitable]):
+        pending = self._in_flight.get(key)
+        if pending is None:
+            pending = asyncio.ensure_future(call())
+            self._in_flight[key] = pending
+            pending.add_done_callback(lambda _: self._in_flight.pop(key, None))
+        # Shield the shared request from cancellation of a single caller.
+        return await asyncio.shield(pending)
+
+    async def _call_method(self, method: str, params: Sequence):
+        response = await self.call(payload=self.build_payload(method, params))
+        return await self.validate(response)
 
     @staticmethod
     async def validate(response: dict) -> Union[dict, list]:
@@ -148,15 +639,23 @@ class Connector(abc.ABC):
         ...
 
     @abc.abstractmethod
-    async def wrapper(self, *args, method: str = None) -> Union[dict, list]:
-        ...
+    def build_payload(self, method: str, params: Sequence) -> dict:
+        """Builds JSON-RPC request payload with an unique request ID."""
 
     # Unified interface
 
-    @property
     @abc.abstractmethod
+    async def fetch_latest_block_number(self) -> int:
+        """Fetches the latest block number with the lightest RPC call."""
+
+    @property
+    def head(self) -> Optional[int]:
+        """The latest known block number without calling the node."""
+        return self.head_tracker.head
+
+    @property
     async def latest_block_number(self) -> int:
-        ...
+        return await self.head_tracker.get()
 
     @abc.abstractmethod
     async def create_address(self, password: str = "") -> str:
@@ -211,15 +710,64 @@ class Connector(abc.ABC):
         """
 
     async def fetch_in_wallet_transactions(
-        self, txids: List[str],
+        self, txids: List[str], return_exceptions: bool = False,
     ) -> List[dict]:
         """Fetches the transactions by txids from a blockchain.
 
         Args:
             txids: Transaction IDs to return.
+            return_exceptions: If True node errors are returned in place of
+                transactions that failed to fetch instead of raising.
+                Defaults to False.
 
         Returns:
             Dict that represent the transactions list.
         """
-        batch = [self.fetch_in_wallet_transaction(txid) for txid in txids]
-        return await asyncio.gather(*batch)
+
+        async def fetch(txid):
+            try:
+                return await self.fetch_in_wallet_transaction(txid)
+            except exceptions.NodeError as exc:
+                if not return_exceptions:
+                    raise
+                return exc
+
+        return await asyncio.gather(*[fetch(txid) for txid in txids])
+
+    async def iter_recent_transactions(
+        self, chunk_size: int = 100, **kwargs
+    ) -> AsyncIterator[dict]:
+        """Iterates over transactions from the most recent.
+
+        Transactions are fetched with fetch_recent_transactions as they
+        are consumed, starting from chunk_size and doubling the limit, so
+        the whole history is fetched in a logarithmic number of requests.
+        Connectors override it to page more efficiently.
+
+        Args:
+            chunk_size: Number of transactions to fetch at first.
+                Defaults to 100.
+            kwargs: Passed to fetch_recent_transactions.
+
+        Yields:
+            Transactions ordered from the most recent.
+        """
+        if chunk_size < 1:
+            raise ValueError("Chunk size must be greater than zero")
+        limit = chunk_size
+        yielded: set = set()
+        boundary = None
+        while True:
+            txs = await self.fetch_recent_transactions(limit, **kwargs)
+            keys = [(tx["txid"], tx["category"]) for tx in txs]
+            # Transactions received since the previous request shift the
+            # others down, so continue right after the last yielded one.
+            start = keys.index(boundary) + 1 if boundary in keys else 0
+            for key, tx in zip(keys[start:], txs[start:]):
+                if key not in yielded:
+                    yielded.add(key)
+                    boundary = key
+                    yield tx
+            if len(txs) < limit:
+                return
+            limit *= 2
@@ -12,13 +12,31 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 import asyncio
-from collections import defaultdict
+import os
 from decimal import Decimal
-from typing import List, Optional, Union
+from typing import (
+    AsyncIterator,
+    Callable,
+    Iterable,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    Union,
+)
 
 import aiohttp
 
-from obm import exceptions
+from obm import (
+    caches,
+    codecs,
+    exceptions,
+    metrics,
+    records,
+    retries,
+    tracing,
+    transports,
+)
 from obm.connectors import base
 
 __all__ = [
@@ -33,6 +51,7 @@ class BitcoinCoreConnector(base.Connector):
     # TODO: Migrate to __slots__
     METHODS = {
         "rpc_list_transactions": "listtransactions",
+        "rpc_list_since_block": "listsinceblock",
         "rpc_estimate_smart_fee": "estimatesmartfee",
         "rpc_send_to_address": "sendtoaddress",
         "rpc_get_new_address": "getnewaddress",
@@ -41,6 +60,47 @@ class BitcoinCoreConnector(base.Connector):
         "rpc_get_transaction": "gettransaction",
         "rpc_get_raw_transaction": "getrawtransaction",
     }
+    IDEMPOTENT_METHODS = frozenset(
+        [
+            "listtransactions",
+            "listsinceblock",
+            "estimatesmartfee",
+            "getblockcount",
+            "getblock",
+            "gettransaction",
+            "getrawtransaction",
+        ]
+    )
+    METHOD_PARAMS = {
+        "listtransactions": (
+            "label?",
+            "count?",
+            "skip?",
+            "include_watchonly?",
+        ),
+        "listsinceblock": (
+            "blockhash?",
+            "target_confirmations?",
+            "include_watchonly?",
+            "include_removed?",
+        ),
+        "estimatesmartfee": ("conf_target", "estimate_mode?"),
+        "sendtoaddress": (
+            "address",
+            "amount",
+            "comment?",
+            "comment_to?",
+            "subtractfeefromamount?",
+            "replaceable?",
+            "conf_target?",
+            "estimate_mode?",
+        ),
+        "getnewaddress": ("label?", "address_type?"),
+        "getblockcount": (),
+        "getblock": ("blockhash", "verbosity?"),
+        "gettransaction": ("txid", "include_watchonly?", "verbose?"),
+        "getrawtransaction": ("txid", "verbose?", "blockhash?"),
+    }
     DEFAULT_PORT = 18332
 
     def __init__(
@@ -52,24 +112,61 @@ class BitcoinCoreConnector(base.Connector):
         loop: Optional[asyncio.AbstractEventLoop] = None,
         session: Optional[aiohttp.ClientSession] = None,
         timeout: Union[int, float] = base.DEFAULT_TIMEOUT,
+        cache: Optional[caches.Cache] = None,
+        finality_depth: Optional[int] = None,
+        head_ttl: Union[int, float] = base.DEFAULT_HEAD_TTL,
+        transport: Union[str, transports.Transport] = transports.HTTP,
+        codec: Union[str, codecs.Codec] = codecs.DEFAULT,
+        keep_info: bool = True,
+        retry_policy: Optional[retries.RetryPolicy] = None,
+        circuit_breaker: Optional[retries.CircuitBreaker] = None,
+        metrics_registry: Optional[metrics.Registry] = None,
+        tracer: Optional[tracing.Tracer] = None,
+        checkpoint_path: Optional[str] = None,
     ):
         rpc_port = rpc_port or self.DEFAULT_PORT
+        # Whether the node returns heights of transaction blocks, which
+        # nodes before 0.20 don't. Unknown until the first response.
+        self.returns_blockheight: Optional[bool] = None
+        # File that the sync_wallet checkpoint is kept in between restarts.
+        self.checkpoint_path = checkpoint_path
+        self.checkpoint: Optional[str] = None
+        if checkpoint_path is not None and os.path.exists(checkpoint_path):
+            with open(checkpoint_path) as file:
+                self.checkpoint = file.read().strip() or None
         if rpc_username is not None and rpc_password is not None:
             self.auth = aiohttp.BasicAuth(rpc_username, rpc_password)
         self.headers = {
             "content-type": "application/json",
         }
-        super().__init__(rpc_host, rpc_port, loop, session, timeout)
+        super().__init__(
+            rpc_host,
+            rpc_port,
+            loop,
+            session,
+            timeout,
+            cache=cache,
+            finality_depth=finality_depth,
+            head_ttl=head_ttl,
+            transport=transport,
+            codec=codec,
+            keep_info=keep_info,
+            retry_policy=retry_policy,
+            circuit_breaker=circuit_breaker,
+            metrics_registry=metrics_registry,
+            tracer=tracer,
+        )
 
-    async def wrapper(self, *args, method: str = None) -> Union[dict, list]:
-        assert method is not None
-        response = await self.call(payload={"method": method, "params": args,})
-        return await self.validate(response)
+    def build_payload(self, method: str, params: Sequence) -> dict:
+        return {
+            "method": method,
+            "params": params,
+            "id": self.next_request_id(),
+        }
 
     # BitcoinCore specific interface
 
-    @staticmethod
-    def format_transaction(tx, latest_block_number):
+    def format_transaction(self, tx, latest_block_number):
 
         def get_amount(details, category):
             if category in ["send", "oneself"]:
@@ -99,40 +196,213 @@ class BitcoinCoreConnector(base.Connector):
             if category == "oneself":
                 from_address = to_address = tx["address"]
                 # Recover original category to prevent lie in info key.
-                tx["category"] = "send"
+                # The entry may be shared by coalesced calls, so it's copied.
+                tx = dict(tx, category="send")
             else:
                 to_address = tx["address"]
                 from_address = None
             amount = tx["amount"]
             fee = tx.get("fee", 0)
 
-        if tx["confirmations"] == -1:
+        if tx["confirmations"] < 0:
             # This mean that tx out of the main chain.
             # Reference: https://bitcoin.org/en/developer-reference#listtransactions
             block_number = -1
         elif tx["confirmations"] == 0:
             # Transaction  still in mempool.
             block_number = None
+        elif "blockheight" in tx:
+            block_number = tx["blockheight"]
         else:
+            # Nodes before 0.20 don't return the block height, so the head
+            # must come from the same batch as the transaction.
             number_from_end = tx["confirmations"] - 1
             block_number = latest_block_number - number_from_end
 
+        return records.TransactionRecord(
+            txid=tx["txid"],
+            from_address=from_address,
+            to_address=to_address,
+            amount=abs(amount),
+            fee=abs(fee) if fee is not None else None,
+            block_number=block_number,
+            category=category,
+            timestamp=tx["time"],
+            info=tx if self.keep_info else None,
+        )
+
+    async def _call_batch_with_head(
+        self,
+        calls: List[Tuple[str, Sequence]],
+        get_entries: Callable[[list], Iterable[dict]],
+        return_exceptions: bool = False,
+    ) -> Tuple[list, Optional[int]]:
+        """Calls the batch along with getblockcount only if it's needed.
+
+        Block numbers are taken from the heights of transaction blocks.
+        Nodes that don't return them need the head that is fetched within
+        the same batch as transactions to count block numbers from
+        confirmations.
+
+        Returns:
+            Results of calls and the head or None if it isn't fetched.
+        """
+        if self.returns_blockheight is not False:
+            results = await self.call_batch(calls, return_exceptions)
+            confirmed = [
+                entry
+                for entry in get_entries(results)
+                if entry["confirmations"] > 0
+            ]
+            if all("blockheight" in entry for entry in confirmed):
+                if confirmed:
+                    self.returns_blockheight = True
+                return results, None
+            self.returns_blockheight = False
+        *results, latest_block_number = await self.call_batch(
+            list(calls) + [("rpc_get_block_count", [])], return_exceptions
+        )
+        if isinstance(latest_block_number, exceptions.NodeError):
+            raise latest_block_number
+        self.head_tracker.update(latest_block_number)
+        return results, latest_block_number
+
+    async def fetch_wallet_changes(
+        self, blockhash: Optional[str] = None, include_watchonly: bool = False,
+    ) -> dict:
+        """Fetches wallet transactions that changed since the block.
+
+        Args:
+            blockhash: Hash of the block to fetch changes since. All
+                wallet transactions are fetched by default.
+            include_watchonly: Defaults to False.
+
+        Returns:
+            Dict with new and updated transactions, transactions removed
+            from the main chain by reorganizations and the checkpoint,
+            i.e. the hash of the latest block to pass next time.
+        """
+        (changes,), latest_block_number = await self._call_batch_with_head(
+            [
+                (
+                    "rpc_list_since_block",
+                    [blockhash or "", 1, include_watchonly, True],
+                ),
+            ],
+            lambda results: results[0]["transactions"],
+        )
+
+        def format_entries(entries):
+            entries_by_txid: dict = {}
+            for entry in entries:
+                entries_by_txid.setdefault(entry["txid"], []).append(entry)
+            return [
+                self.format_transaction(entry, latest_block_number)
+                for txid_entries in entries_by_txid.values()
+                for entry in self.combine_duplicates(txid_entries)
+            ]
+
+        removed = format_entries(changes.get("removed", []))
+        for tx in removed:
+            # Removed transactions are out of the main chain.
+            tx.block_number = -1
         return {
-            "txid": tx["txid"],
-            "from_address": from_address,
-            "to_address": to_address,
-            "amount": abs(amount),
-            "fee": abs(fee) if fee is not None else None,
-            "block_number": block_number,
-            "category": category,
-            "timestamp": tx["time"],
-            "info": tx,
+            "transactions": format_entries(changes["transactions"]),
+            "removed": removed,
+            "checkpoint": changes["lastblock"],
         }
 
+    async def sync_wallet(
+        self,
+        include_watchonly: bool = False,
+        checkpoint: Optional[str] = None,
+    ) -> dict:
+        """Fetches wallet changes since the previous call.
+
+        The checkpoint is kept by the connector between calls and written
+        to checkpoint_path if it's set, so synchronization continues after
+        restart. The first call returns all wallet transactions.
+
+        Args:
+            include_watchonly: Defaults to False.
+            checkpoint: Block hash to fetch changes since instead of the
+                checkpoint of the previous call.
+
+        Returns:
+            Same as fetch_wallet_changes.
+        """
+        changes = await self.fetch_wallet_changes(
+            checkpoint or self.checkpoint, include_watchonly
+        )
+        self.checkpoint = changes["checkpoint"]
+        if self.checkpoint_path is not None:
+            # Replace the file at once, so a crash doesn't corrupt it.
+            path = f"{self.checkpoint_path}.tmp"
+            with open(path, "w") as file:
+                file.write(self.checkpoint)
+            os.replace(path, self.checkpoint_path)
+        return changes
+
+    async def get_block(
+        self,
+        blockhash: str,
+        verbosity: int = 1,
+        latest_block_number: Optional[int] = None,
+    ) -> Union[dict, str]:
+        """Fetches the block by hash.
+
+        Blocks that have more than finality_depth confirmations are kept in
+        the cache if it's set. Only their confirmations number changes, so
+        it's recalculated for cached blocks.
+
+        Args:
+            blockhash: Block hash.
+            verbosity: 0 for hex-encoded data, 1 for block with txids and
+                2 for block with transactions data. Defaults to 1.
+            latest_block_number: Known latest block number. Fetched if
+                needed by default.
+
+        Returns:
+            Block as returned by getblock RPC.
+        """
+        if self.cache is None:
+            return await self.rpc_get_block(blockhash, verbosity)
+        key = self.cache_key("block", verbosity, blockhash)
+        entry = self.cache.get(key)
+        if entry is not None and verbosity == 0:
+            return entry["block"]
+        if latest_block_number is None:
+            latest_block_number = await self.latest_block_number
+        if entry is not None:
+            return self._refresh_confirmations(
+                entry["block"],
+                entry["latest_block_number"],
+                latest_block_number,
+            )
+
+        block = await self.rpc_get_block(blockhash, verbosity)
+        if verbosity == 0:
+            # Raw block has no confirmations so finality is checked by header.
+            header = await self.rpc_get_block(blockhash, 1)
+            confirmations = header["confirmations"]
+        else:
+            confirmations = block["confirmations"]
+        if confirmations > self.finality_depth:
+            self.cache.set(
+                key,
+                {"block": block, "latest_block_number": latest_block_number},
+            )
+        return block
+
+    @staticmethod
+    def _refresh_confirmations(data, cached_at, latest_block_number):
+        data = dict(data)
+        data["confirmations"] += latest_block_number - cached_at
+        return data
+
     # Unified interface
 
-    @property
-    async def latest_block_number(self) -> int:
+    async def fetch_latest_block_number(self) -> int:
         return await self.rpc_get_block_count()
 
     async def create_address(  # pylint: disable=unused-argument
@@ -165,12 +435,10 @@ class BitcoinCoreConnector(base.Connector):
         subtract_fee_from_amount: bool = False,
     ) -> dict:
         # TODO: Validate
-        latest_block_number = await self.latest_block_number
         txid = await self.rpc_send_to_address(
             to_address, amount, "", "", subtract_fee_from_amount
         )
-        tx = await self.rpc_get_transaction(txid)
-        return self.format_transaction(tx, latest_block_number)
+        return await self.fetch_in_wallet_transaction(txid)
 
     async def fetch_recent_transactions(
         self, limit: int = 10, **kwargs
@@ -183,47 +451,145 @@ class BitcoinCoreConnector(base.Connector):
         Returns:
             Most recent transactions list.
         """
-
-        def combine_duplicates(txs):
-            """Combines doubles that is transaction self-sending outcome."""
-            txs_by_txid = defaultdict(list)
-            for tx in txs:
-                txs_by_txid[tx["txid"]].append(tx)
-            duplicate_txids = [
-                txid
-                for txid, tx_or_txs in txs_by_txid.items()
-                if len(tx_or_txs) == 2
-            ]
-            txs = [tx for tx in txs if tx["txid"] not in duplicate_txids]
-            for duplicate_txid in duplicate_txids:
-                duplicate_txs = {
-                    tx["category"]: tx for tx in txs_by_txid[duplicate_txid]
-                }
-                assert "send" in duplicate_txs and "receive" in duplicate_txs
-                duplicate_txs["send"]["category"] = "oneself"
-                txs.append(duplicate_txs["send"])
-            return txs
-
         # Double increase the transactions number for feching to prevent cases
         # when transaction was sent on in-wallet address and is present in
         # bitcoin core list tansaction twice with different categories.
-        count = limit * 2
-        latest_block_number = await self.latest_block_number
-        txs = await self.rpc_list_transactions(
-            kwargs.get("label", "*"),
-            count,
-            kwargs.get("skip", 0),
-            kwargs.get("include_watchonly", False),
-        )
-        sorted_txs = sorted(
-            [
-                self.format_transaction(tx, latest_block_number)
-                for tx in combine_duplicates(txs)
-            ],
-            key=lambda x: x["timestamp"],
-            reverse=True,
+        result: List[dict] = []
+        if limit <= 0:
+            return result
+        txs = self.iter_recent_transactions(chunk_size=limit * 2, **kwargs)
+        try:
+            async for tx in txs:
+                result.append(tx)
+                if len(result) == limit:
+                    break
+        finally:
+            await txs.aclose()
+        return result
+
+    @staticmethod
+    def combine_duplicates(entries: List[dict]) -> List[dict]:
+        """Combines doubles that is transaction self-sending outcome.
+
+        Args:
+            entries: listtransactions entries of the same transaction.
+
+        Returns:
+            Entries with a send and receive pair replaced by a single
+            entry of 'oneself' category.
+        """
+        if len(entries) == 2:
+            by_category = {entry["category"]: entry for entry in entries}
+            if by_category.keys() == {"send", "receive"}:
+                # Entries may be shared by coalesced calls, so the send
+                # one is copied instead of modified.
+                return [dict(by_category["send"], category="oneself")]
+        return entries
+
+    @staticmethod
+    def _is_before(
+        entry: dict, block_number: int, latest_block_number: Optional[int]
+    ) -> bool:
+        """Checks the entry is confirmed in a block before the given one."""
+        if entry["confirmations"] <= 0:
+            return False
+        if "blockheight" in entry:
+            return entry["blockheight"] < block_number
+        if latest_block_number is None:
+            return False
+        height = latest_block_number - entry["confirmations"] + 1
+        return height < block_number
+
+    @staticmethod
+    def _entry_key(entry: dict) -> tuple:
+        return (
+            entry["txid"],
+            entry["category"],
+            entry.get("vout"),
+            entry.get("address"),
         )
-        return sorted_txs[:limit]
+
+    async def iter_recent_transactions(
+        self, chunk_size: int = 100, **kwargs
+    ) -> AsyncIterator[records.TransactionRecord]:
+        """Iterates over the wallet history from the most recent.
+
+        The history is paged through with listtransactions by chunk_size
+        entries, so memory doesn't depend on the wallet size. Entries of
+        the same transaction are combined in a single pass, even if they
+        are split between pages. Entries that are shifted to the next page
+        by new transactions during iteration are skipped.
+
+        Args:
+            chunk_size: Number of entries to fetch at once. Defaults to 100.
+            label: Wallet label. Defaults to '*'.
+            skip: Number of the most recent entries to skip. Defaults to 0.
+            include_watchonly: Defaults to False.
+            min_block: Paging stops after a page that holds only entries
+                confirmed in blocks before it. Entries of the last page
+                are still yielded, so they have to be filtered anyway.
+
+        Yields:
+            Transactions ordered from the most recent.
+        """
+        if chunk_size < 1:
+            raise ValueError("Chunk size must be greater than zero")
+        label = kwargs.get("label", "*")
+        skip = kwargs.get("skip", 0)
+        include_watchonly = kwargs.get("include_watchonly", False)
+        min_block = kwargs.get("min_block")
+        # Entries of the latest transaction that may continue on the next
+        # page, with the head that was fetched along with each entry.
+        group: List[Tuple[dict, Optional[int]]] = []
+        previous_keys: set = set()
+
+        def format_group():
+            heads = {id(entry): head for entry, head in group}
+            for tx in self.combine_duplicates([entry for entry, _ in group]):
+                if id(tx) in heads:
+                    head = heads[id(tx)]
+                else:
+                    # Combined entry is a copy of the send one.
+                    (head,) = [
+                        head
+                        for entry, head in group
+                        if entry["category"] == "send"
+                    ]
+                yield self.format_transaction(tx, head)
+
+        while True:
+            (page,), latest_block_number = await self._call_batch_with_head(
+                [
+                    (
+                        "rpc_list_transactions",
+                        [label, chunk_size, skip, include_watchonly],
+                    ),
+                ],
+                lambda results: results[0],
+            )
+            skip += len(page)
+            keys = set()
+            # Page is ordered from the oldest.
+            for entry in reversed(page):
+                key = self._entry_key(entry)
+                keys.add(key)
+                if key in previous_keys:
+                    continue
+                if group and group[0][0]["txid"] != entry["txid"]:
+                    for tx in format_group():
+                        yield tx
+                    group = []
+                group.append((entry, latest_block_number))
+            previous_keys = keys
+            if len(page) < chunk_size:
+                break
+            if min_block is not None and all(
+                self._is_before(entry, min_block, latest_block_number)
+                for entry in page
+            ):
+                break
+        for tx in format_group():
+            yield tx
 
     async def fetch_in_wallet_transaction(self, txid: str) -> dict:
         """Fetches the transaction by txid from a blockchain.
@@ -234,6 +600,73 @@ class BitcoinCoreConnector(base.Connector):
         Returns:
             Dict that represent the transaction.
         """
-        tx = await self.rpc_get_transaction(txid)
-        latest_block_number = await self.latest_block_number
-        return self.format_transaction(tx, latest_block_number)
+        txs = await self.fetch_in_wallet_transactions([txid])
+        return txs[0]
+
+    async def fetch_in_wallet_transactions(
+        self, txids: List[str], return_exceptions: bool = False,
+    ) -> List[dict]:
+        """Fetches the transactions by txids from a blockchain.
+
+        All transactions are fetched within a single batch request, along
+        with the latest block number for nodes that don't return block
+        heights. Transactions that have more than finality_depth
+        confirmations are kept in the cache if it's set.
+
+        Args:
+            txids: Transaction IDs to return.
+            return_exceptions: If True node errors are returned in place of
+                transactions that failed to fetch instead of raising.
+                Defaults to False.
+
+        Returns:
+            Dict that represent the transactions list.
+        """
+        if not txids:
+            return []
+        cached = {}
+        if self.cache is not None:
+            for txid in txids:
+                entry = self.cache.get(self.cache_key("tx", txid))
+                if entry is not None:
+                    cached[txid] = entry
+        missing = list(dict.fromkeys(t for t in txids if t not in cached))
+        fetched: list = []
+        latest_block_number = None
+        if missing:
+            fetched, latest_block_number = await self._call_batch_with_head(
+                [("rpc_get_transaction", [txid]) for txid in missing],
+                lambda results: [
+                    tx
+                    for tx in results
+                    if not isinstance(tx, exceptions.NodeError)
+                ],
+                return_exceptions=return_exceptions,
+            )
+
+        txs_by_txid = dict(zip(missing, fetched))
+        if self.cache is not None:
+            for txid, tx in txs_by_txid.items():
+                if isinstance(tx, exceptions.NodeError):
+                    continue
+                if tx["confirmations"] > self.finality_depth:
+                    cached_at = latest_block_number
+                    if cached_at is None:
+                        cached_at = tx["blockheight"] + tx["confirmations"] - 1
+                    self.cache.set(
+                        self.cache_key("tx", txid),
+                        {"tx": tx, "latest_block_number": cached_at},
+                    )
+        if cached and latest_block_number is None:
+            latest_block_number = await self.latest_block_number
+        for txid, entry in cached.items():
+            txs_by_txid[txid] = self._refresh_confirmations(
+                entry["tx"], entry["latest_block_number"], latest_block_number
+            )
+        result = []
+        for txid in txids:
+            tx = txs_by_txid[txid]
+            if not isinstance(tx, exceptions.NodeError):
+                tx = self.format_transaction(tx, latest_block_number)
+            result.append(tx)
+        return result
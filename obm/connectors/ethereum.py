@@ -12,16 +12,39 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 import asyncio
+import collections
+import decimal
+import itertools
+import time
 from decimal import Decimal
-from typing import List, Optional, Union
+from typing import (
+    AsyncIterator,
+    Dict,
+    Iterable,
+    List,
+    Optional,
+    Sequence,
+    Union,
+)
 
 import aiohttp
-import web3
 
-from obm import exceptions
+from obm import (
+    caches,
+    codecs,
+    exceptions,
+    indexes,
+    metrics,
+    records,
+    retries,
+    tracing,
+    transports,
+)
+from obm.concurrency import AdaptiveConcurrency
 from obm.connectors import base
 
 __all__ = [
+    "AddressRegistry",
     "GethConnector",
     "to_wei",
     "from_wei",
@@ -30,23 +53,103 @@ __all__ = [
 ]
 
 
-# TODO: Remove web3 from dependencies
-def to_wei(value):
-    return web3.Web3.toWei(value, "ether")
+WEI_PER_ETHER = Decimal(10 ** 18)
+MAX_WEI = 2 ** 256 - 1
 
 
-def from_wei(value):
-    return web3.Web3.fromWei(value, "ether")
-
-
-def to_hex(value):
-    return web3.Web3.toHex(value)
+def to_wei(value: Union[int, float, str, Decimal]) -> int:
+    """Converts ether to wei."""
+    if isinstance(value, float):
+        # Take the shortest representation, e.g. 0.1 instead of its binary
+        # approximation.
+        value = str(value)
+    if isinstance(value, (int, str)) and not isinstance(value, bool):
+        value = Decimal(value)
+    if not isinstance(value, Decimal):
+        raise TypeError(
+            f"Value must be a number or a string, "
+            f"not '{type(value).__name__}'"
+        )
+    with decimal.localcontext() as context:
+        context.prec = 999
+        wei = value * WEI_PER_ETHER
+    if wei < 0 or wei > MAX_WEI:
+        raise ValueError("Resulting wei value must be between 0 and 2**256 - 1")
+    return int(wei)
+
+
+def from_wei(value: int) -> Union[int, Decimal]:
+    """Converts wei to ether."""
+    if value == 0:
+        return 0
+    if value < 0 or value > MAX_WEI:
+        raise ValueError("Value must be between 0 and 2**256 - 1")
+    with decimal.localcontext() as context:
+        context.prec = 999
+        return Decimal(value) / WEI_PER_ETHER
+
+
+def to_hex(value: int) -> str:
+    if not isinstance(value, int) or isinstance(value, bool):
+        raise TypeError(
+            f"Value must be an integer, not '{type(value).__name__}'"
+        )
+    return hex(value)
 
 
 def to_int(value):
     return int(value, 16)
 
 
+class AddressRegistry:
+    """Cached set of in-wallet addresses.
+
+    Addresses are kept in lower case, so membership checks are case
+    insensitive and take constant time.
+
+    Args:
+        ttl: Seconds after which addresses have to be refetched from
+            the node. Defaults to 60.
+    """
+
+    def __init__(self, ttl: Union[int, float] = 60):
+        if ttl < 0:
+            raise ValueError("TTL must not be negative")
+        self.ttl = ttl
+        self._addresses: set = set()
+        self._updated_at: Optional[float] = None
+
+    def __contains__(self, address) -> bool:
+        return address is not None and address.lower() in self._addresses
+
+    def __len__(self):
+        return len(self._addresses)
+
+    def __iter__(self):
+        return iter(self._addresses)
+
+    @property
+    def is_expired(self) -> bool:
+        return (
+            self._updated_at is None
+            or time.monotonic() - self._updated_at >= self.ttl
+        )
+
+    @property
+    def updated_at(self) -> Optional[float]:
+        return self._updated_at
+
+    def update(self, addresses: Iterable[str]):
+        self._addresses = {address.lower() for address in addresses}
+        self._updated_at = time.monotonic()
+
+    def add(self, address: str):
+        self._addresses.add(address.lower())
+
+    def invalidate(self):
+        self._updated_at = None
+
+
 class GethConnector(base.Connector):
     node = "geth"
     currency = "ethereum"
@@ -59,10 +162,37 @@ class GethConnector(base.Connector):
         "rpc_personal_send_transaction": "personal_sendTransaction",
         "rpc_personal_unlock_account": "personal_unlockAccount",
         "rpc_eth_get_block_by_number": "eth_getBlockByNumber",
+        "rpc_eth_get_block_by_hash": "eth_getBlockByHash",
+        "rpc_eth_block_number": "eth_blockNumber",
         "rpc_personal_list_accounts": "personal_listAccounts",
         "rpc_eth_get_transaction_by_hash": "eth_getTransactionByHash",
     }
+    IDEMPOTENT_METHODS = frozenset(
+        [
+            "eth_estimateGas",
+            "eth_gasPrice",
+            "eth_getBlockByNumber",
+            "eth_getBlockByHash",
+            "eth_blockNumber",
+            "personal_listAccounts",
+            "eth_getTransactionByHash",
+        ]
+    )
+    METHOD_PARAMS = {
+        "personal_newAccount": ("password",),
+        "eth_estimateGas": ("transaction", "block?"),
+        "eth_gasPrice": (),
+        "personal_sendTransaction": ("transaction", "password"),
+        "personal_unlockAccount": ("address", "password", "duration?"),
+        "eth_getBlockByNumber": ("block", "full_transactions"),
+        "eth_getBlockByHash": ("block_hash", "full_transactions"),
+        "eth_blockNumber": (),
+        "personal_listAccounts": (),
+        "eth_getTransactionByHash": ("transaction_hash",),
+    }
     DEFAULT_PORT = 8545
+    DEFAULT_FINALITY_DEPTH = 12
+    DEFAULT_BLOCKS_LIMIT = 1000
 
     def __init__(
         self,
@@ -73,25 +203,59 @@ class GethConnector(base.Connector):
         loop: Optional[asyncio.AbstractEventLoop] = None,
         session: Optional[aiohttp.ClientSession] = None,
         timeout: Union[int, float] = base.DEFAULT_TIMEOUT,
+        cache: Optional[caches.Cache] = None,
+        finality_depth: Optional[int] = None,
+        head_ttl: Union[int, float] = base.DEFAULT_HEAD_TTL,
+        transport: Union[str, transports.Transport] = transports.HTTP,
+        codec: Union[str, codecs.Codec] = codecs.DEFAULT,
+        keep_info: bool = True,
+        retry_policy: Optional[retries.RetryPolicy] = None,
+        circuit_breaker: Optional[retries.CircuitBreaker] = None,
+        metrics_registry: Optional[metrics.Registry] = None,
+        tracer: Optional[tracing.Tracer] = None,
+        concurrency: Optional[AdaptiveConcurrency] = None,
+        index: Optional[indexes.WalletIndex] = None,
+        addresses_ttl: Union[int, float] = 60,
     ):
         rpc_port = rpc_port or self.DEFAULT_PORT
         self.auth = None
+        self.concurrency = concurrency or AdaptiveConcurrency()
+        self.index = index
+        self.addresses = AddressRegistry(addresses_ttl)
+        self._index_lock: Optional[asyncio.Lock] = None
+        # Blocks after the index checkpoint by number and addresses they
+        # were scanned for, so they aren't fetched again on every update.
+        self._unfinal_blocks: Dict[int, dict] = {}
+        self._unfinal_addresses: frozenset = frozenset()
+        self._addresses_lock: Optional[asyncio.Lock] = None
         self.headers = {
             "content-type": "application/json",
         }
-        super().__init__(rpc_host, rpc_port, loop, session, timeout)
-
-    async def wrapper(self, *args, method: str = None) -> Union[dict, list]:
-        assert method is not None
-        response = await self.call(
-            payload={
-                "method": method,
-                "params": args,
-                "jsonrpc": "2.0",
-                "id": 1,
-            }
+        super().__init__(
+            rpc_host,
+            rpc_port,
+            loop,
+            session,
+            timeout,
+            cache=cache,
+            finality_depth=finality_depth,
+            head_ttl=head_ttl,
+            transport=transport,
+            codec=codec,
+            keep_info=keep_info,
+            retry_policy=retry_policy,
+            circuit_breaker=circuit_breaker,
+            metrics_registry=metrics_registry,
+            tracer=tracer,
         )
-        return await self.validate(response)
+
+    def build_payload(self, method: str, params: Sequence) -> dict:
+        return {
+            "method": method,
+            "params": params,
+            "jsonrpc": "2.0",
+            "id": self.next_request_id(),
+        }
 
     # Geth specific interface
 
@@ -114,24 +278,247 @@ class GethConnector(base.Connector):
         else:
             block_number = to_int(tx["blockNumber"])
 
-        return {
-            "txid": tx["hash"],
-            "from_address": tx["from"],
-            "to_address": tx["to"],
-            "amount": from_wei(to_int(tx["value"])),
-            "fee": self.calc_ether_fee(tx["gas"], tx["gasPrice"]),
-            "block_number": block_number,
-            "category": category,
-            "timestamp": None,
-            "info": tx,
-        }
+        return records.TransactionRecord(
+            txid=tx["hash"],
+            from_address=tx["from"],
+            to_address=tx["to"],
+            amount=from_wei(to_int(tx["value"])),
+            fee=self.calc_ether_fee(tx["gas"], tx["gasPrice"]),
+            block_number=block_number,
+            category=category,
+            timestamp=None,
+            info=tx if self.keep_info else None,
+        )
 
-    async def fetch_blocks_range(
+    async def get_addresses(self, refresh: bool = False) -> AddressRegistry:
+        """Returns in-wallet addresses refetching them if they are expired.
+
+        Args:
+            refresh: Refetch addresses even if they aren't expired, e.g.
+                because an account may have been created by another
+                process. Defaults to False.
+        """
+        # Lock is created lazily to bind it to the running loop.
+        if self._addresses_lock is None:
+            self._addresses_lock = asyncio.Lock()
+        requested_at = time.monotonic()
+
+        def is_stale():
+            if refresh:
+                updated_at = self.addresses.updated_at
+                return updated_at is None or updated_at < requested_at
+            return self.addresses.is_expired
+
+        if is_stale():
+            async with self._addresses_lock:
+                # Concurrent callers wait for the single refetch.
+                if is_stale():
+                    self.addresses.update(
+                        await self.rpc_personal_list_accounts()
+                    )
+        return self.addresses
+
+    async def get_addresses_for(self, txs: List[dict]) -> AddressRegistry:
+        """Returns in-wallet addresses that are actual for transactions.
+
+        Addresses are refetched once if any transaction is from and to
+        unknown addresses, because the account may have been created
+        after addresses were fetched.
+        """
+        addresses = await self.get_addresses()
+        if any(
+            tx is not None
+            and tx["from"] not in addresses
+            and tx["to"] not in addresses
+            for tx in txs
+        ):
+            addresses = await self.get_addresses(refresh=True)
+        return addresses
+
+    @staticmethod
+    def find_transactions_in(block, addresses):
+        return [
+            tx
+            for tx in block["transactions"]
+            if tx["from"] in addresses or tx["to"] in addresses
+        ]
+
+    async def update_index(self, window: int = 100) -> indexes.WalletIndex:
+        """Scans blocks that were added since the index checkpoint.
+
+        Final blocks are scanned only once. Blocks after the latest final
+        one are kept until they are final and fetched again only if they
+        are reorganized, which is checked by the hash of the latest kept
+        block. Nothing is scanned if the head hasn't changed.
+
+        Args:
+            window: Max number of requested but not yet scanned blocks.
+                Defaults to 100.
+
+        Returns:
+            Updated index.
+        """
+        if self.index is None:
+            raise RuntimeError("Index isn't set for the connector")
+        # Lock is created lazily to bind it to the running loop.
+        if self._index_lock is None:
+            self._index_lock = asyncio.Lock()
+        async with self._index_lock:
+            latest_block_number = await self.latest_block_number
+            checkpoint = max(latest_block_number - self.finality_depth, -1)
+            start = self.index.next_block()
+            if start is None:
+                start = max(latest_block_number - self.DEFAULT_BLOCKS_LIMIT, 0)
+            addresses = await self.get_addresses()
+            known = await self._get_unfinal_blocks(start, latest_block_number)
+            if (
+                latest_block_number in known
+                and self.index.checkpoint == max(checkpoint, start - 1)
+                and set(addresses) == self._unfinal_addresses
+            ):
+                return self.index
+            while True:
+                scanned_addresses = frozenset(addresses)
+                final_txs, unfinal_txs = [], []
+                unfinal_blocks: Dict[int, dict] = {}
+                parent_hash = None
+                blocks = self._iter_index_blocks(
+                    start, latest_block_number, known, window
+                )
+                async for block in blocks:
+                    if parent_hash not in (None, block["parentHash"]):
+                        await blocks.aclose()
+                        if not known:
+                            raise exceptions.NodeError(
+                                "Chain is reorganized during the scan"
+                            )
+                        break
+                    parent_hash = block["hash"]
+                    number = to_int(block["number"])
+                    txs = self.find_transactions_in(block, addresses)
+                    if number <= checkpoint:
+                        final_txs += txs
+                    else:
+                        unfinal_txs += txs
+                        unfinal_blocks[number] = block
+                else:
+                    if checkpoint < start:
+                        # Nothing is finalized, so kept blocks are scanned
+                        # for new addresses on the next update.
+                        break
+                    # Final blocks are never rescanned, so they must be
+                    # scanned for accounts that were created during the
+                    # scan too.
+                    addresses = await self.get_addresses(refresh=True)
+                    if set(addresses) <= scanned_addresses:
+                        break
+                    continue
+                # Kept blocks may be reorganized too, so all are fetched.
+                known = {}
+            self.index.update(
+                max(checkpoint, start - 1), final_txs, unfinal_txs
+            )
+            self._unfinal_blocks = unfinal_blocks
+            self._unfinal_addresses = scanned_addresses
+        return self.index
+
+    async def _get_unfinal_blocks(
+        self, start: int, latest_block_number: int
+    ) -> Dict[int, dict]:
+        # Kept blocks form a chain, so if the latest of them is still in
+        # the main chain, all others are too.
+        known = {
+            number: block
+            for number, block in self._unfinal_blocks.items()
+            if start <= number <= latest_block_number
+        }
+        if not known:
+            return {}
+        top = max(known)
+        header = await self.get_block(top, False, latest_block_number)
+        if header is None or header["hash"] != known[top]["hash"]:
+            return {}
+        return known
+
+    async def _iter_index_blocks(
         self,
         start: int,
-        end: int = None,
-        batch_size: int = 100,
-        delay: Union[int, float] = 0.1,
+        latest_block_number: int,
+        known: Dict[int, dict],
+        window: int,
+    ) -> AsyncIterator[dict]:
+        end = latest_block_number + 1
+        if not known:
+            async for block in self.iter_blocks(start, end, window):
+                yield block
+            return
+        first, last = min(known), max(known)
+        async for block in self.iter_blocks(start, first, window):
+            yield block
+        for number in range(first, last + 1):
+            yield known[number]
+        async for block in self.iter_blocks(last + 1, end, window):
+            yield block
+
+    async def get_block(
+        self,
+        block_id: Union[int, str],
+        full_transactions: bool = True,
+        latest_block_number: Optional[int] = None,
+    ) -> Optional[dict]:
+        """Fetches the block by number or hash.
+
+        Blocks that have more than finality_depth confirmations never
+        change, so they are kept in the cache if it's set.
+
+        Args:
+            block_id: Block number or hash.
+            full_transactions: Fetch full transaction objects instead of
+                hashes only. Defaults to True.
+            latest_block_number: Known latest block number to check the
+                block finality against. Fetched if needed by default.
+
+        Returns:
+            Block or None if there is no such block.
+        """
+        by_hash = isinstance(block_id, str)
+        cache = self.cache
+        if cache is not None:
+            if by_hash:
+                number = cache.get(self.cache_key("blockhash", block_id))
+            else:
+                number = block_id
+            if number is not None:
+                block = cache.get(
+                    self.cache_key("block", int(full_transactions), number)
+                )
+                if block is not None:
+                    return block
+
+        async with self.concurrency.track():
+            if by_hash:
+                block = await self.rpc_eth_get_block_by_hash(
+                    block_id, full_transactions
+                )
+            else:
+                block = await self.rpc_eth_get_block_by_number(
+                    to_hex(block_id), full_transactions
+                )
+
+        if cache is not None and block is not None:
+            if latest_block_number is None:
+                latest_block_number = await self.latest_block_number
+            number = to_int(block["number"])
+            if number <= latest_block_number - self.finality_depth:
+                cache.set(
+                    self.cache_key("block", int(full_transactions), number),
+                    block,
+                )
+                cache.set(self.cache_key("blockhash", block["hash"]), number)
+        return block
+
+    async def fetch_blocks_range(
+        self, start: int, end: int = None, window: int = 100,
     ) -> List[dict]:
         """Fetches blocks range between start and end bounds.
 
@@ -139,52 +526,94 @@ class GethConnector(base.Connector):
             start: Start fetching bound.
             end: End fetching bound (not inclusive). Defaults to
                 latest block number.
-            batch_size: Concurrent RPC request number. Defaults to 100.
-            delay: Delay in seconds between concurrent request batches.
-                Defaults to 1.
+            window: Max number of requested but not yet consumed blocks.
+                Actual concurrency is chosen by self.concurrency.
+                Defaults to 100.
 
         Returns:
             List that contains block range.
         """
+        return [block async for block in self.iter_blocks(start, end, window)]
 
-        def to_batches(coros, batch_size):
-            batch_start = 0
-            while batch_start < len(coros):
-                yield coros[batch_start : batch_start + batch_size]
-                batch_start += batch_size
-
-        # TODO: Add validation
-        end = end or await self.latest_block_number + 1
-        get_block_coros = [
-            self.rpc_eth_get_block_by_number(to_hex(n), True)
-            for n in range(start, end)
-        ]
-        blocks_range = []
-        for batch in to_batches(get_block_coros, batch_size):
-            blocks_range += await asyncio.gather(*batch)
-            await asyncio.sleep(delay)
-        return blocks_range
+    async def iter_blocks(
+        self,
+        start: int,
+        end: int = None,
+        window: int = 100,
+        full_transactions: bool = True,
+        reverse: bool = False,
+    ) -> AsyncIterator[dict]:
+        """Iterates over blocks range between start and end bounds.
+
+        Keeps at most window blocks requested and yields them in order
+        as soon as they are fetched. The next block is requested only when
+        a consumer takes one, so a slow consumer throttles fetching. Requests
+        that are sent to the node at the same time are additionally limited
+        by self.concurrency that adapts to the node responsiveness. Final
+        blocks are taken from the cache when it's set.
+
+        Args:
+            start: Start fetching bound.
+            end: End fetching bound (not inclusive). Defaults to
+                latest block number.
+            window: Max number of requested but not yet consumed blocks.
+                Defaults to 100.
+            full_transactions: Fetch full transaction objects instead of
+                hashes only. Defaults to True.
+            reverse: Iterate from end to start. Defaults to False.
+
+        Yields:
+            Blocks ordered by number.
+        """
+        if window < 1:
+            raise ValueError("Window must be greater than zero")
+        latest_block_number = None
+        if end is None or self.cache is not None:
+            latest_block_number = await self.latest_block_number
+        if end is None:
+            end = latest_block_number + 1
+
+        def fetch_block(number):
+            return self.get_block(
+                number, full_transactions, latest_block_number
+            )
+
+        numbers = range(start, end)
+        numbers = iter(reversed(numbers) if reverse else numbers)
+        in_flight = collections.deque(
+            asyncio.ensure_future(fetch_block(number))
+            for number in itertools.islice(numbers, window)
+        )
+        try:
+            while in_flight:
+                block = await in_flight.popleft()
+                next_number = next(numbers, None)
+                if next_number is not None:
+                    in_flight.append(
+                        asyncio.ensure_future(fetch_block(next_number))
+                    )
+                yield block
+        finally:
+            for future in in_flight:
+                future.cancel()
 
     async def fetch_recent_blocks_range(
-        self,
-        length: int,
-        batch_size: int = 100,
-        delay: Union[int, float] = 0.1,
-    ):
+        self, length: int, window: int = 100,
+    ) -> List[dict]:
         latest = await self.latest_block_number
         return await self.fetch_blocks_range(
-            latest - length, latest + 1, batch_size, delay
+            latest - length, latest + 1, window
         )
 
     # Unified interface
 
-    @property
-    async def latest_block_number(self) -> int:
-        latest_block = await self.rpc_eth_get_block_by_number("latest", True)
-        return to_int(latest_block["number"])
+    async def fetch_latest_block_number(self) -> int:
+        return to_int(await self.rpc_eth_block_number())
 
     async def create_address(self, password: str = "") -> str:
-        return await self.rpc_personal_new_account(password)
+        address = await self.rpc_personal_new_account(password)
+        self.addresses.add(address)
+        return address
 
     async def estimate_fee(  # pylint: disable=unused-argument
         self,
@@ -255,52 +684,94 @@ class GethConnector(base.Connector):
 
         tx_data["gasPrice"] = gas_price
         tx_data["gas"] = gas
-        addresses = await self.rpc_personal_list_accounts()
         txid = await self.rpc_personal_send_transaction(tx_data, password)
         tx = await self.rpc_eth_get_transaction_by_hash(txid)
+        addresses = await self.get_addresses_for([tx])
         return self.format_transaction(tx, addresses)
 
-    async def fetch_recent_transactions(self, limit: int = 10, **kwargs) -> List[dict]:
+    async def fetch_recent_transactions(
+        self, limit: int = 10, **kwargs
+    ) -> List[dict]:
         """Fetches most recent transactions from a blockchain.
 
+        Transactions are taken from iter_recent_transactions, so blocks
+        are scanned only until the limit is reached.
+
         Args:
             limit: The number of transactions to return. Defaults to 10.
+            batch_size: Number of blocks to request ahead. Defaults to 100.
+            kwargs: Passed to iter_recent_transactions.
 
         Returns:
             Most recent transactions list.
         """
+        result: List[dict] = []
+        if limit <= 0:
+            return result
+        chunk_size = kwargs.pop("batch_size", 100)
+        txs = self.iter_recent_transactions(chunk_size=chunk_size, **kwargs)
+        try:
+            async for tx in txs:
+                result.append(tx)
+                if len(result) == limit:
+                    break
+        finally:
+            await txs.aclose()
+        return result
+
+    async def iter_recent_transactions(
+        self, chunk_size: int = 100, **kwargs
+    ) -> AsyncIterator[records.TransactionRecord]:
+        """Iterates over transactions from the most recent.
+
+        If the index is set, it's updated with new blocks and transactions
+        are taken from it. Otherwise blocks are scanned backward from the
+        latest one, keeping at most chunk_size blocks requested ahead.
 
-        def find_transactions_in(block, addresses):
-            return [
-                tx
-                for tx in block["transactions"]
-                if tx["from"] in addresses or tx["to"] in addresses
-            ]
-
-        batch_size = kwargs.get("batch_size", 100)
-        blocks_limit = kwargs.get("blocks_limit", 1000)
+        Args:
+            chunk_size: Number of blocks to request ahead. Defaults to 100.
+            min_block: Block to stop scanning at. Defaults to the latest
+                block number minus blocks_limit if the index isn't set.
+            blocks_limit: Max number of blocks to scan. Defaults to
+                DEFAULT_BLOCKS_LIMIT.
+
+        Yields:
+            Transactions ordered from the most recent.
+        """
+        addresses = await self.get_addresses()
+        min_block = kwargs.get("min_block")
+        if self.index is not None:
+            await self.update_index()
+            for tx in self.index.history():
+                block_number = tx["blockNumber"]
+                if (
+                    min_block is not None
+                    and block_number is not None
+                    and to_int(block_number) < min_block
+                ):
+                    # History goes from the most recent blocks, so the
+                    # rest of transactions are older.
+                    return
+                yield self.format_transaction(tx, addresses)
+            return
+
+        blocks_limit = kwargs.get("blocks_limit", self.DEFAULT_BLOCKS_LIMIT)
         latest_block_number = await self.latest_block_number
-        addresses = await self.rpc_personal_list_accounts()
-        start = latest_block_number - batch_size - 1
-        end = latest_block_number + 1
-        blocks_count = 0
-        txs = []
-        while True:
-            blocks_range = await self.fetch_blocks_range(start, end, batch_size)
-            for block in blocks_range[::-1]:
-                blocks_count += 1
-                txs += find_transactions_in(block, addresses)
-                if len(txs) >= limit or blocks_count >= blocks_limit:
-                    return [
-                        self.format_transaction(tx, addresses)
-                        for tx in txs[:limit]
-                    ]
-            if start == 0:
-                return [self.format_transaction(tx, addresses) for tx in txs]
-            start -= batch_size
-            end -= batch_size
-            if start < 0:
-                start = 0
+        start = max(
+            0,
+            latest_block_number + 1 - blocks_limit,
+            min_block or 0,
+        )
+        blocks = self.iter_blocks(
+            start, latest_block_number + 1, window=chunk_size, reverse=True
+        )
+        try:
+            async for block in blocks:
+                for tx in self.find_transactions_in(block, addresses):
+                    yield self.format_transaction(tx, addresses)
+        finally:
+            # Cancel blocks that are requested ahead right away.
+            await blocks.aclose()
 
     async def fetch_in_wallet_transaction(self, txid: str) -> dict:
         """Fetches the transaction by txid from a blockchain.
@@ -311,6 +782,44 @@ class GethConnector(base.Connector):
         Returns:
             Dict that represent the transaction.
         """
-        addresses = await self.rpc_personal_list_accounts()
         tx = await self.rpc_eth_get_transaction_by_hash(txid)
+        addresses = await self.get_addresses_for([tx])
         return self.format_transaction(tx, addresses)
+
+    async def fetch_in_wallet_transactions(
+        self, txids: List[str], return_exceptions: bool = False,
+    ) -> List[dict]:
+        """Fetches the transactions by txids from a blockchain.
+
+        All transactions are fetched within a single batch request.
+
+        Args:
+            txids: Transaction IDs to return.
+            return_exceptions: If True node errors are returned in place of
+                transactions that failed to fetch instead of raising.
+                Defaults to False.
+
+        Returns:
+            Dict that represent the transactions list.
+        """
+        if not txids:
+            return []
+        txs = await self.call_batch(
+            [("rpc_eth_get_transaction_by_hash", [txid]) for txid in txids],
+            return_exceptions=return_exceptions,
+        )
+        for i, (txid, tx) in enumerate(zip(txids, txs)):
+            if tx is None:
+                # Node returns null for unknown transactions.
+                exc = exceptions.NodeError(f"Transaction {txid} not found")
+                if not return_exceptions:
+                    raise exc
+                txs[i] = exc
+        found = [tx for tx in txs if not isinstance(tx, exceptions.NodeError)]
+        addresses = await self.get_addresses_for(found)
+        return [
+            tx
+            if isinstance(tx, exceptions.NodeError)
+            else self.format_transaction(tx, addresses)
+            for tx in txs
+        ]
@@ -40,3 +40,7 @@ class NetworkError(BaseError):
 
 class NetworkTimeoutError(NetworkError):
     """Node request riches timeout."""
+
+
+class NodeUnavailableError(NetworkError):
+    """Node is considered down, so the request isn't sent."""
@@ -0,0 +1,110 @@
+# Copyright 2020 Alexander Polishchuk
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import json
+import os
+from typing import Iterator, List, Optional
+
+__all__ = [
+    "WalletIndex",
+]
+
+
+class WalletIndex:
+    """Index of wallet transactions found in scanned blocks.
+
+    Transactions from final blocks are kept forever and the number of the
+    latest final scanned block is kept as a checkpoint, so each block is
+    scanned once. Transactions from blocks that are not final yet are
+    replaced on every update because these blocks may be reorganized.
+
+    Args:
+        start_block: Block to start scanning from. Defaults to the head
+            that is known at the first update minus blocks_limit of the
+            connector.
+        path: Optional file that the final part of the index is appended
+            to and restored from.
+    """
+
+    def __init__(
+        self, start_block: Optional[int] = None, path: Optional[str] = None,
+    ):
+        if start_block is not None and start_block < 0:
+            raise ValueError("Start block must not be negative")
+        self.start_block = start_block
+        self.path = path
+        self.checkpoint: Optional[int] = None
+        self.final_transactions: List[dict] = []
+        self.unfinal_transactions: List[dict] = []
+        if path is not None and os.path.exists(path):
+            self._restore()
+
+    def __len__(self):
+        return len(self.final_transactions) + len(self.unfinal_transactions)
+
+    def _restore(self):
+        with open(self.path) as file:
+            for line in file:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    # Incomplete record that was being written on crash.
+                    break
+                self.checkpoint = record["checkpoint"]
+                self.final_transactions += record["transactions"]
+
+    def next_block(self) -> Optional[int]:
+        """Returns the number of a block to continue scanning from."""
+        if self.checkpoint is not None:
+            return self.checkpoint + 1
+        return self.start_block
+
+    def update(
+        self,
+        checkpoint: int,
+        final_transactions: List[dict],
+        unfinal_transactions: List[dict],
+    ):
+        """Appends transactions from newly scanned blocks.
+
+        Args:
+            checkpoint: Number of the latest final scanned block.
+            final_transactions: Transactions from blocks up to checkpoint.
+            unfinal_transactions: Transactions from blocks after checkpoint.
+        """
+        if self.checkpoint is None or checkpoint > self.checkpoint:
+            self.checkpoint = checkpoint
+            self.final_transactions += final_transactions
+            if self.path is not None:
+                with open(self.path, "a") as file:
+                    record = {
+                        "checkpoint": checkpoint,
+                        "transactions": final_transactions,
+                    }
+                    file.write(json.dumps(record) + "\n")
+        self.unfinal_transactions = unfinal_transactions
+
+    def history(self, address: Optional[str] = None) -> Iterator[dict]:
+        """Iterates over indexed transactions from the most recent.
+
+        Args:
+            address: Return only transactions from or to the address.
+        """
+        address = address.lower() if address is not None else None
+        for txs in (self.unfinal_transactions, self.final_transactions):
+            for tx in reversed(txs):
+                if address is None or address in (
+                    (tx["from"] or "").lower(),
+                    (tx["to"] or "").lower(),
+                ):
+                    yield tx
@@ -0,0 +1,258 @@
+# Copyright 2020 Alexander Polishchuk
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import bisect
+import math
+import threading
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+
+__all__ = [
+    "REGISTRY",
+    "Registry",
+]
+
+# Label of the method of a JSON-RPC batch request.
+BATCH = "batch"
+DEFAULT_BUCKETS = (
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1,
+    2.5,
+    5,
+    10,
+    30,
+    60,
+)
+
+
+class _MethodStats:
+    __slots__ = (
+        "calls",
+        "requests",
+        "bytes_sent",
+        "bytes_received",
+        "errors",
+        "latency_buckets",
+        "latency_sum",
+    )
+
+    def __init__(self, buckets_number: int):
+        self.calls = 0
+        self.requests = 0
+        self.bytes_sent = 0
+        self.bytes_received = 0
+        self.errors: Dict[str, int] = {}
+        # The last bucket is +Inf.
+        self.latency_buckets = [0] * (buckets_number + 1)
+        self.latency_sum = 0.0
+
+
+class Registry:
+    """Collects metrics of RPC requests.
+
+    Metrics are kept per node, its instance and RPC method:
+
+    * calls - RPC method calls including entries of batch requests;
+    * requests - requests sent to the node, batches go under 'batch';
+    * latency - histogram of request durations in seconds;
+    * bytes sent and received;
+    * failed calls by error class, e.g. 'NetworkTimeoutError' or
+      'NodeError'.
+
+    Connectors record to the global REGISTRY by default.
+
+    Examples:
+        >>> from obm import metrics
+        >>> metrics.REGISTRY.snapshot()
+        >>> print(metrics.REGISTRY.render_prometheus())
+
+    Args:
+        buckets: Upper bounds of latency histogram buckets in seconds.
+    """
+
+    def __init__(self, buckets: Sequence[Union[int, float]] = DEFAULT_BUCKETS):
+        if list(buckets) != sorted(set(buckets)):
+            raise ValueError("Buckets must be sorted and unique")
+        self.buckets = tuple(buckets)
+        self._stats: Dict[Tuple[str, str, str], _MethodStats] = {}
+        # Metrics may be read from a thread other than the loop one.
+        self._lock = threading.Lock()
+
+    def _get(self, node: str, instance: str, method: str) -> _MethodStats:
+        key = (node, instance, method)
+        stats = self._stats.get(key)
+        if stats is None:
+            stats = self._stats[key] = _MethodStats(len(self.buckets))
+        return stats
+
+    def record_request(
+        self,
+        node: str,
+        instance: str,
+        method: str,
+        latency: float,
+        bytes_sent: int = 0,
+        bytes_received: int = 0,
+    ):
+        """Records a request sent to the node.
+
+        Args:
+            node: Node name, e.g. 'bitcoin-core'.
+            instance: Node address.
+            method: RPC method or 'batch'.
+            latency: Request duration in seconds.
+            bytes_sent: Request size.
+            bytes_received: Response size.
+        """
+        index = bisect.bisect_left(self.buckets, latency)
+        with self._lock:
+            stats = self._get(node, instance, method)
+            stats.requests += 1
+            stats.latency_buckets[index] += 1
+            stats.latency_sum += latency
+            stats.bytes_sent += bytes_sent
+            stats.bytes_received += bytes_received
+
+    def record_call(
+        self,
+        node: str,
+        instance: str,
+        method: str,
+        error: Optional[str] = None,
+    ):
+        """Records an RPC method call, e.g. an entry of a batch request.
+
+        Args:
+            error: Class name of the error the call failed with.
+        """
+        with self._lock:
+            stats = self._get(node, instance, method)
+            stats.calls += 1
+            if error is not None:
+                stats.errors[error] = stats.errors.get(error, 0) + 1
+
+    def reset(self):
+        with self._lock:
+            self._stats.clear()
+
+    def snapshot(self) -> List[dict]:
+        """Returns a copy of collected metrics.
+
+        Returns:
+            List of dicts with node, instance, method, calls, requests,
+            bytes_sent, bytes_received, errors and latency keys. Latency
+            contains count, sum and cumulative buckets, the last one is
+            math.inf.
+        """
+        with self._lock:
+            items = sorted(self._stats.items())
+            result = []
+            for (node, instance, method), stats in items:
+                buckets = {}
+                total = 0
+                bounds = self.buckets + (math.inf,)
+                for bound, count in zip(bounds, stats.latency_buckets):
+                    total += count
+                    buckets[bound] = total
+                result.append(
+                    {
+                        "node": node,
+                        "instance": instance,
+                        "method": method,
+                        "calls": stats.calls,
+                        "requests": stats.requests,
+                        "bytes_sent": stats.bytes_sent,
+                        "bytes_received": stats.bytes_received,
+                        "errors": dict(stats.errors),
+                        "latency": {
+                            "count": total,
+                            "sum": stats.latency_sum,
+                            "buckets": buckets,
+                        },
+                    }
+                )
+        return result
+
+    def render_prometheus(self, prefix: str = "obm") -> str:
+        """Renders metrics in the Prometheus text exposition format."""
+        families = {
+            "calls": ("counter", "RPC method calls."),
+            "requests": ("counter", "Requests sent to nodes."),
+            "bytes_sent": ("counter", "Bytes sent to nodes."),
+            "bytes_received": ("counter", "Bytes received from nodes."),
+            "errors": ("counter", "Failed RPC method calls by error."),
+            "request_duration_seconds": ("histogram", "Request durations."),
+        }
+        lines: Dict[str, List[str]] = {name: [] for name in families}
+        for entry in self.snapshot():
+            labels = _format_labels(
+                node=entry["node"],
+                instance=entry["instance"],
+                method=entry["method"],
+            )
+            for name in ("calls", "requests", "bytes_sent", "bytes_received"):
+                lines[name].append(
+                    f"{prefix}_rpc_{name}_total{{{labels}}} {entry[name]}"
+                )
+            for error, count in sorted(entry["errors"].items()):
+                error_labels = f'{labels},error="{_escape(error)}"'
+                lines["errors"].append(
+                    f"{prefix}_rpc_errors_total{{{error_labels}}} {count}"
+                )
+            latency = entry["latency"]
+            name = f"{prefix}_rpc_request_duration_seconds"
+            if not latency["count"]:
+                continue
+            for bound, count in latency["buckets"].items():
+                le = "+Inf" if bound == math.inf else repr(float(bound))
+                lines["request_duration_seconds"].append(
+                    f'{name}_bucket{{{labels},le="{le}"}} {count}'
+                )
+            lines["request_duration_seconds"].extend(
+                [
+                    f"{name}_sum{{{labels}}} {latency['sum']!r}",
+                    f"{name}_count{{{labels}}} {latency['count']}",
+                ]
+            )
+
+        output = []
+        for name, (kind, description) in families.items():
+            if not lines[name]:
+                continue
+            full_name = f"{prefix}_rpc_{name}"
+            if kind == "counter":
+                full_name += "_total"
+            output.append(f"# HELP {full_name} {description}")
+            output.append(f"# TYPE {full_name} {kind}")
+            output.extend(lines[name])
+        return "\n".join(output) + "\n" if output else ""
+
+
+def _escape(value: str) -> str:
+    return (
+        value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+    )
+
+
+def _format_labels(**labels: str) -> str:
+    return ",".join(
+        f'{name}="{_escape(value)}"' for name, value in labels.items()
+    )
+
+
+REGISTRY = Registry()
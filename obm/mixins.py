@@ -11,11 +11,16 @@
 # WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
 # See the License for the specific language governing permissions and
 # limitations under the License.
+import asyncio
+import time
 from decimal import Decimal
 from typing import List
+from typing import Optional
 from typing import Union
 
 from obm import connectors
+from obm import exceptions
+from obm import queries
 from obm import utils
 
 
@@ -43,9 +48,24 @@ class NodeMixin(SyncContextManagerMixin):
             self.loop,
             self.session,
             self.timeout,
+            cache=self.cache,
+            finality_depth=self.finality_depth,
+            head_ttl=self.head_ttl,
+            transport=self.transport,
+            codec=self.codec,
+            keep_info=self.keep_info,
+            retry_policy=self.retry_policy,
+            circuit_breaker=self.circuit_breaker,
+            metrics_registry=self.metrics_registry,
+            tracer=self.tracer,
         )
         return self.__connector
 
+    @property
+    def transactions(self) -> queries.TransactionQuerySet:
+        """Lazy query of in-wallet transactions."""
+        return queries.TransactionQuerySet(self)
+
     async def __aenter__(self):
         await self.open()
         return self
@@ -115,17 +135,234 @@ class NodeMixin(SyncContextManagerMixin):
         return await self.connector.fetch_in_wallet_transaction(txid)
 
     async def fetch_in_wallet_transactions(
-        self, txids: List[str]
+        self, txids: List[str], return_exceptions: bool = False
+    ) -> List[dict]:
+        """Fetches the transactions by txids from a blockchain.
+
+        Args:
+            txids: Transaction IDs to return.
+            return_exceptions: If True node errors are returned in place of
+                transactions that failed to fetch instead of raising.
+                Defaults to False.
+
+        Returns:
+            Dict that represent the transactions list.
+        """
+        return await self.connector.fetch_in_wallet_transactions(
+            txids, return_exceptions
+        )
+
+
+class _ReplicaState:
+    __slots__ = ("outstanding", "latency", "is_healthy", "head")
+
+    def __init__(self):
+        self.outstanding = 0
+        self.latency = 0.0
+        self.is_healthy = True
+        self.head: Optional[int] = None
+
+
+class NodePoolMixin(SyncContextManagerMixin):
+    # Weight of the latest response time in the latency moving average.
+    LATENCY_DECAY = 0.3
+
+    __states = None
+    __health_checker = None
+
+    @property
+    def states(self) -> dict:
+        if self.__states is None:
+            self.__states = {node: _ReplicaState() for node in self.nodes}
+        return self.__states
+
+    @property
+    def healthy_nodes(self) -> list:
+        return [node for node in self.nodes if self.states[node].is_healthy]
+
+    @property
+    def transactions(self) -> queries.TransactionQuerySet:
+        """Lazy query of in-wallet transactions on a picked node."""
+        return queries.TransactionQuerySet(self.pick())
+
+    async def __aenter__(self):
+        await self.open()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+    async def open(self):
+        await asyncio.gather(*[node.open() for node in self.nodes])
+        if self.health_check_interval and self.__health_checker is None:
+            self.__health_checker = asyncio.ensure_future(
+                self.__check_health_forever()
+            )
+
+    async def close(self):
+        if self.__health_checker is not None:
+            self.__health_checker.cancel()
+            try:
+                await self.__health_checker
+            except asyncio.CancelledError:
+                pass
+            self.__health_checker = None
+        await asyncio.gather(*[node.close() for node in self.nodes])
+
+    async def __check_health_forever(self):
+        while True:
+            await self.check_health()
+            await asyncio.sleep(self.health_check_interval)
+
+    async def check_health(self):
+        """Ejects nodes that fail or lag behind the highest head.
+
+        Ejected nodes are brought back as soon as they pass the check.
+        """
+
+        async def get_head(node):
+            return await asyncio.wait_for(
+                node.get_latest_block_number(), self.health_check_timeout
+            )
+
+        heads = await asyncio.gather(
+            *[get_head(node) for node in self.nodes], return_exceptions=True
+        )
+        known_heads = [head for head in heads if isinstance(head, int)]
+        max_head = max(known_heads, default=None)
+        for node, head in zip(self.nodes, heads):
+            state = self.states[node]
+            state.head = head if isinstance(head, int) else None
+            state.is_healthy = (
+                state.head is not None and state.head >= max_head - self.max_lag
+            )
+
+    def pick(self, exclude: tuple = ()):
+        """Picks a node to read from.
+
+        Prefers healthy nodes with the least outstanding requests weighted
+        by their average response time.
+        """
+        candidates = [
+            node for node in self.healthy_nodes if node not in exclude
+        ] or [node for node in self.nodes if node not in exclude]
+        if not candidates:
+            return None
+
+        def cost(node):
+            state = self.states[node]
+            # Outstanding requests break the tie while latency is unknown.
+            return (state.outstanding + 1) * state.latency, state.outstanding
+
+        return min(candidates, key=cost)
+
+    async def __call(self, node, method_name: str, *args, **kwargs):
+        state = self.states[node]
+        state.outstanding += 1
+        started_at = time.monotonic()
+        try:
+            result = await getattr(node, method_name)(*args, **kwargs)
+        except exceptions.NetworkError:
+            # Node is brought back by the health check.
+            state.is_healthy = False
+            raise
+        finally:
+            state.outstanding -= 1
+        latency = time.monotonic() - started_at
+        state.latency += (latency - state.latency) * self.LATENCY_DECAY
+        return result
+
+    async def __read(self, method_name: str, *args, **kwargs):
+        tried: tuple = ()
+        while True:
+            node = self.pick(exclude=tried)
+            try:
+                return await self.__call(node, method_name, *args, **kwargs)
+            except exceptions.NetworkError:
+                tried += (node,)
+                if len(tried) == len(self.nodes):
+                    raise
+
+    async def __write(self, method_name: str, *args):
+        return await self.__call(self.primary, method_name, *args)
+
+    async def get_latest_block_number(self):
+        return await self.__read("get_latest_block_number")
+
+    async def create_address(self, password: str = "") -> str:
+        return await self.__write("create_address", password)
+
+    async def estimate_fee(
+        self,
+        from_address: str = None,
+        to_address: str = None,
+        amount: str = None,
+        fee: Union[dict, Decimal] = None,
+        data: str = None,
+        conf_target: int = 1,
+    ) -> Decimal:
+        return await self.__read(
+            "estimate_fee",
+            from_address,
+            to_address,
+            amount,
+            fee,
+            data,
+            conf_target,
+        )
+
+    async def fetch_recent_transactions(
+        self, limit: int = 10, **kwargs,
+    ) -> List[dict]:
+        return await self.__read("fetch_recent_transactions", limit, **kwargs)
+
+    async def send_transaction(
+        self,
+        amount: Union[Decimal, float],
+        to_address: str,
+        from_address: str = None,
+        fee: Union[dict, Decimal] = None,
+        password: str = "",
+        subtract_fee_from_amount: bool = False,
+    ) -> dict:
+        return await self.__write(
+            "send_transaction",
+            amount,
+            to_address,
+            from_address,
+            fee,
+            password,
+            subtract_fee_from_amount,
+        )
+
+    async def fetch_in_wallet_transaction(self, txid: str) -> dict:
+        """Fetches the transaction by txid from a blockchain.
+
+        Args:
+            txid: Transaction ID to return.
+
+        Returns:
+            Dict that represent the transaction.
+        """
+        return await self.__read("fetch_in_wallet_transaction", txid)
+
+    async def fetch_in_wallet_transactions(
+        self, txids: List[str], return_exceptions: bool = False
     ) -> List[dict]:
         """Fetches the transactions by txids from a blockchain.
 
         Args:
             txids: Transaction IDs to return.
+            return_exceptions: If True node errors are returned in place of
+                transactions that failed to fetch instead of raising.
+                Defaults to False.
 
         Returns:
             Dict that represent the transactions list.
         """
-        return await self.connector.fetch_in_wallet_transactions(txids)
+        return await self.__read(
+            "fetch_in_wallet_transactions", txids, return_exceptions
+        )
 
 
 class TransactionMixin:
@@ -143,3 +380,49 @@ class TransactionMixin:
             tx = await self.node.fetch_in_wallet_transaction(txid=self.txid)
             self.block_number = tx["block_number"]
         return self
+
+    @classmethod
+    async def sync_many(cls, txs: list, chunk_size: int = 100) -> list:
+        """Synchronizes the transactions with blockchain.
+
+        Unconfirmed transactions are grouped by node and each group is
+        fetched by chunk_size at once, the others are skipped like in sync.
+        Transactions that the node fails to return stay unsynchronized.
+        If a whole chunk fails, the other chunks are still synchronized
+        and then the first error is raised.
+
+        Args:
+            txs: Transactions to synchronize.
+            chunk_size: Number of transactions to fetch at once.
+                Defaults to 100.
+
+        Returns:
+            Synchronized transactions.
+        """
+        if chunk_size < 1:
+            raise ValueError("Chunk size must be greater than zero")
+        unconfirmed_by_node: dict = {}
+        for tx in txs:
+            if tx.block_number is None:
+                unconfirmed_by_node.setdefault(tx.node, []).append(tx)
+
+        async def sync_chunk(node, chunk):
+            fetched = await node.fetch_in_wallet_transactions(
+                txids=[tx.txid for tx in chunk], return_exceptions=True
+            )
+            for tx, fetched_tx in zip(chunk, fetched):
+                if not isinstance(fetched_tx, exceptions.NodeError):
+                    tx.block_number = fetched_tx["block_number"]
+
+        results = await asyncio.gather(
+            *[
+                sync_chunk(node, group[i : i + chunk_size])
+                for node, group in unconfirmed_by_node.items()
+                for i in range(0, len(group), chunk_size)
+            ],
+            return_exceptions=True,
+        )
+        for result in results:
+            if isinstance(result, BaseException):
+                raise result
+        return txs
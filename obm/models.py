@@ -13,15 +13,26 @@
 # limitations under the License.
 import asyncio
 from decimal import Decimal
-from typing import Optional, Union
+from typing import List, Optional, Union
 
 import aiohttp
 
-from obm import connectors, mixins, validators
+from obm import (
+    caches,
+    codecs,
+    connectors,
+    metrics,
+    mixins,
+    retries,
+    tracing,
+    transports,
+    validators,
+)
 
 __all__ = [
     "Currency",
     "Node",
+    "NodePool",
 ]
 
 
@@ -50,6 +61,16 @@ class Node(mixins.NodeMixin):
         loop: Optional[asyncio.AbstractEventLoop] = None,
         session: Optional[aiohttp.ClientSession] = None,
         timeout: Union[int, float] = connectors.DEFAULT_TIMEOUT,
+        cache: Optional[caches.Cache] = None,
+        finality_depth: Optional[int] = None,
+        head_ttl: Union[int, float] = connectors.DEFAULT_HEAD_TTL,
+        transport: Union[str, transports.Transport] = transports.HTTP,
+        codec: Union[str, codecs.Codec] = codecs.DEFAULT,
+        keep_info: bool = True,
+        retry_policy: Optional[retries.RetryPolicy] = None,
+        circuit_breaker: Optional[retries.CircuitBreaker] = None,
+        metrics_registry: Optional[metrics.Registry] = None,
+        tracer: Optional[tracing.Tracer] = None,
     ):
         if not isinstance(name, str):
             raise TypeError(
@@ -64,11 +85,73 @@ class Node(mixins.NodeMixin):
         self.loop = loop
         self.session = session
         self.timeout = timeout
+        self.cache = cache
+        self.finality_depth = finality_depth
+        self.head_ttl = head_ttl
+        self.transport = transport
+        self.codec = codec
+        self.keep_info = keep_info
+        self.retry_policy = retry_policy
+        self.circuit_breaker = circuit_breaker
+        self.metrics_registry = metrics_registry
+        self.tracer = tracer
         # This statement is necessary to perform validation
         assert self.connector.node == self.name
         super().__init__()
 
 
+class NodePool(mixins.NodePoolMixin):
+    """Replicas of the same node that are used as a single node.
+
+    Reads are spread over healthy replicas, writes go to the primary.
+
+    Args:
+        nodes: Replicas of the same node.
+        primary: Node that serves address creation and sending. Defaults
+            to the first node.
+        health_check_interval: Seconds between health checks. Health
+            checks are disabled if it's zero or None.
+        health_check_timeout: Seconds to wait for a node head.
+        max_lag: Number of blocks a node may lag behind the highest head
+            before it's ejected.
+    """
+
+    def __init__(
+        self,
+        nodes: List[Node],
+        primary: Optional[Node] = None,
+        health_check_interval: Optional[Union[int, float]] = 10,
+        health_check_timeout: Union[int, float] = 5,
+        max_lag: int = 2,
+    ):
+        if not isinstance(nodes, (list, tuple)):
+            raise TypeError(
+                f"Nodes must be a list, not '{type(nodes).__name__}'"
+            )
+        if not nodes:
+            raise ValueError("Nodes must not be empty")
+        for node in nodes:
+            if not isinstance(node, Node):
+                raise TypeError(
+                    f"Node must be a obm.models.Node, "
+                    f"not '{type(node).__name__}'"
+                )
+        if len({node.name for node in nodes}) != 1:
+            raise ValueError("Nodes must be replicas of the same node")
+        if primary is not None and primary not in nodes:
+            raise ValueError("Primary must be one of the nodes")
+        if max_lag < 0:
+            raise ValueError("Max lag must not be negative")
+        self.nodes = list(nodes)
+        self.primary = primary or self.nodes[0]
+        self.name = self.primary.name
+        self.currency = self.primary.currency
+        self.health_check_interval = health_check_interval
+        self.health_check_timeout = health_check_timeout
+        self.max_lag = max_lag
+        super().__init__()
+
+
 class Transaction(mixins.TransactionMixin):
     def __init__(
         self,
@@ -0,0 +1,251 @@
+# Copyright 2020 Alexander Polishchuk
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import copy
+from typing import AsyncIterator, List, Optional, Union
+
+from obm import records
+
+__all__ = [
+    "TransactionQuerySet",
+]
+
+ORDERING_FIELDS = [
+    field for field in records.TransactionRecord.FIELDS if field != "info"
+]
+
+
+class TransactionQuerySet:
+    """Lazy query of in-wallet transactions.
+
+    Nothing is fetched until the query set is iterated over. Transactions
+    are fetched by chunks from the most recent, so iteration that stops
+    early, e.g. because of slicing, makes only the needed requests. Query
+    sets are immutable, every method returns a new one.
+
+    Examples:
+        >>> txs = node.transactions.filter(category="receive")[:20]
+        >>> async for tx in txs:
+        ...     print(tx["txid"])
+        >>> await node.transactions.filter(min_block=6394000).all()
+
+    Args:
+        node: Node to query.
+        chunk_size: Number of transactions or blocks to fetch at once.
+            Defaults to 100.
+    """
+
+    def __init__(self, node, chunk_size: int = 100):
+        if chunk_size < 1:
+            raise ValueError("Chunk size must be greater than zero")
+        self.node = node
+        self.chunk_size = chunk_size
+        self._category: Optional[str] = None
+        self._min_block: Optional[int] = None
+        self._max_block: Optional[int] = None
+        self._address: Optional[str] = None
+        self._ordering: tuple = ()
+        self._offset = 0
+        self._limit: Optional[int] = None
+
+    def __repr__(self):
+        return f"<{type(self).__name__} node={self.node.name}>"
+
+    def _clone(self, **attrs) -> "TransactionQuerySet":
+        clone = copy.copy(self)
+        for name, value in attrs.items():
+            setattr(clone, name, value)
+        return clone
+
+    def filter(
+        self,
+        category: Optional[str] = None,
+        min_block: Optional[int] = None,
+        max_block: Optional[int] = None,
+        address: Optional[str] = None,
+    ) -> "TransactionQuerySet":
+        """Narrows the query down.
+
+        Args:
+            category: One of 'send', 'receive' and 'oneself'.
+            min_block: Lowest block number to include. Unconfirmed
+                transactions are excluded if it's set.
+            max_block: Highest block number to include. Unconfirmed
+                transactions are excluded if it's set.
+            address: Sender or recipient address.
+
+        Returns:
+            New query set.
+        """
+        if self._offset or self._limit is not None:
+            raise TypeError("Cannot filter a query once a slice is taken")
+        attrs = {}
+        if category is not None:
+            attrs["_category"] = category
+        if min_block is not None:
+            attrs["_min_block"] = max(min_block, self._min_block or 0)
+        if max_block is not None:
+            attrs["_max_block"] = (
+                max_block
+                if self._max_block is None
+                else min(max_block, self._max_block)
+            )
+        if address is not None:
+            attrs["_address"] = address.lower()
+        return self._clone(**attrs)
+
+    def order_by(self, *fields: str) -> "TransactionQuerySet":
+        """Orders transactions by fields.
+
+        Transactions come from the most recent by default. Ordering by
+        fields requires all matching transactions to be fetched first, so
+        narrow the query with min_block or the connector blocks limit.
+
+        Args:
+            fields: Field names, prefixed with '-' for descending order.
+
+        Returns:
+            New query set.
+        """
+        for field in fields:
+            if field.lstrip("-") not in ORDERING_FIELDS:
+                raise ValueError(
+                    f"Unsupported ordering field: '{field}'. "
+                    f"Available only: {ORDERING_FIELDS}"
+                )
+        if self._offset or self._limit is not None:
+            raise TypeError("Cannot reorder a query once a slice is taken")
+        return self._clone(_ordering=fields)
+
+    def __getitem__(self, key: Union[int, slice]):
+        if isinstance(key, int):
+            if key < 0:
+                raise ValueError("Negative indexing is not supported")
+            return self[key : key + 1].first()
+        if not isinstance(key, slice):
+            raise TypeError(
+                f"Indices must be integers or slices, "
+                f"not '{type(key).__name__}'"
+            )
+        if key.step is not None:
+            raise ValueError("Slice step is not supported")
+        if (key.start or 0) < 0 or (key.stop or 0) < 0:
+            raise ValueError("Negative indexing is not supported")
+        offset = self._offset + (key.start or 0)
+        limit = self._limit
+        if key.stop is not None:
+            stop = self._offset + key.stop
+            if limit is not None:
+                stop = min(stop, self._offset + limit)
+            limit = max(0, stop - offset)
+        elif limit is not None:
+            limit = max(0, limit - (key.start or 0))
+        return self._clone(_offset=offset, _limit=limit)
+
+    def _matches(self, tx) -> bool:
+        if self._category is not None and tx["category"] != self._category:
+            return False
+        block_number = tx["block_number"]
+        if self._min_block is not None or self._max_block is not None:
+            if block_number is None or block_number < 0:
+                return False
+            if self._min_block is not None and block_number < self._min_block:
+                return False
+            if self._max_block is not None and block_number > self._max_block:
+                return False
+        if self._address is not None and self._address not in (
+            (tx["from_address"] or "").lower(),
+            (tx["to_address"] or "").lower(),
+        ):
+            return False
+        return True
+
+    async def _iter_matching(self) -> AsyncIterator:
+        txs = self.node.connector.iter_recent_transactions(
+            self.chunk_size, min_block=self._min_block
+        )
+        try:
+            async for tx in txs:
+                if self._matches(tx):
+                    yield tx
+        finally:
+            await txs.aclose()
+
+    def _sort(self, txs: list) -> list:
+        for field in reversed(self._ordering):
+            name = field.lstrip("-")
+            descending = field.startswith("-")
+            # None goes last in both orders.
+            txs.sort(
+                key=lambda tx, name=name, descending=descending: (
+                    (tx[name] is None) != descending,
+                    tx[name] if tx[name] is not None else 0,
+                ),
+                reverse=descending,
+            )
+        return txs
+
+    async def iterator(self, chunk_size: Optional[int] = None):
+        """Iterates over transactions fetching them by chunks.
+
+        Args:
+            chunk_size: Overrides chunk_size of the query set.
+
+        Yields:
+            Transactions.
+        """
+        query = self
+        if chunk_size is not None:
+            query = self._clone(chunk_size=chunk_size)
+        if query._limit == 0:
+            return
+        if query._ordering:
+            txs = [tx async for tx in query._iter_matching()]
+            stop = None if query._limit is None else (
+                query._offset + query._limit
+            )
+            for tx in query._sort(txs)[query._offset : stop]:
+                yield tx
+            return
+
+        skipped = 0
+        taken = 0
+        txs = query._iter_matching()
+        try:
+            async for tx in txs:
+                if skipped < query._offset:
+                    skipped += 1
+                    continue
+                yield tx
+                taken += 1
+                if query._limit is not None and taken >= query._limit:
+                    return
+        finally:
+            await txs.aclose()
+
+    def __aiter__(self):
+        return self.iterator()
+
+    async def all(self) -> List:
+        """Returns all matching transactions."""
+        return [tx async for tx in self.iterator()]
+
+    async def first(self):
+        """Returns the first matching transaction or None."""
+        txs = self[:1].iterator()
+        try:
+            async for tx in txs:
+                return tx
+        finally:
+            await txs.aclose()
+        return None
@@ -0,0 +1,98 @@
+# Copyright 2020 Alexander Polishchuk
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+from collections.abc import Mapping
+from decimal import Decimal
+from typing import Any, Iterator, Optional
+
+__all__ = [
+    "TransactionRecord",
+]
+
+
+class TransactionRecord(Mapping):
+    """Transaction in the unified format.
+
+    It's a read-only mapping with the same keys as
+    obm.serializers.Transaction, so it's used the same way as a dict, but
+    it takes several times less memory. Use to_dict() to get a plain dict.
+
+    Args:
+        info: Original node payload. None if connector is created with
+            keep_info=False.
+    """
+
+    FIELDS = (
+        "txid",
+        "from_address",
+        "to_address",
+        "amount",
+        "fee",
+        "block_number",
+        "category",
+        "timestamp",
+        "info",
+    )
+
+    __slots__ = FIELDS
+
+    def __init__(
+        self,
+        txid: str,
+        from_address: Optional[str],
+        to_address: Optional[str],
+        amount: Decimal,
+        fee: Optional[Decimal],
+        block_number: Optional[int],
+        category: Optional[str],
+        timestamp: Optional[int],
+        info: Optional[dict] = None,
+    ):
+        self.txid = txid
+        self.from_address = from_address
+        self.to_address = to_address
+        self.amount = amount
+        self.fee = fee
+        self.block_number = block_number
+        self.category = category
+        self.timestamp = timestamp
+        self.info = info
+
+    def __getitem__(self, key: str) -> Any:
+        if key not in self.FIELDS:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.FIELDS)
+
+    def __len__(self):
+        return len(self.FIELDS)
+
+    def __repr__(self):
+        fields = ", ".join(
+            f"{field}={getattr(self, field)!r}"
+            for field in self.FIELDS
+            if field != "info"
+        )
+        return f"{type(self).__name__}({fields})"
+
+    def __getstate__(self):
+        return tuple(getattr(self, field) for field in self.FIELDS)
+
+    def __setstate__(self, state):
+        for field, value in zip(self.FIELDS, state):
+            setattr(self, field, value)
+
+    def to_dict(self) -> dict:
+        return {field: getattr(self, field) for field in self.FIELDS}
@@ -0,0 +1,146 @@
+# Copyright 2020 Alexander Polishchuk
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import random
+import time
+from typing import Optional, Union
+
+from obm import exceptions
+
+__all__ = [
+    "CircuitBreaker",
+    "RetryPolicy",
+]
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half-open"
+
+
+class RetryPolicy:
+    """Retries of idempotent requests that failed because of network.
+
+    Delays grow exponentially and are randomized with full jitter, so
+    many clients don't retry at the same moment.
+
+    Args:
+        max_attempts: Max number of attempts including the first one.
+            Defaults to 3.
+        base_delay: Delay in seconds before the first retry. Defaults
+            to 0.1.
+        max_delay: Upper bound of a delay in seconds. Defaults to 10.
+        multiplier: Delay growth factor. Defaults to 2.
+        jitter: Randomize delays. Defaults to True.
+    """
+
+    def __init__(
+        self,
+        max_attempts: int = 3,
+        base_delay: Union[int, float] = 0.1,
+        max_delay: Union[int, float] = 10,
+        multiplier: Union[int, float] = 2,
+        jitter: bool = True,
+    ):
+        if max_attempts < 1:
+            raise ValueError("Max attempts must be greater than zero")
+        if base_delay < 0 or max_delay < 0:
+            raise ValueError("Delays must not be negative")
+        if multiplier < 1:
+            raise ValueError("Multiplier must not be less than one")
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.multiplier = multiplier
+        self.jitter = jitter
+
+    def delay(self, attempt: int) -> float:
+        """Returns seconds to wait after the failed attempt.
+
+        Args:
+            attempt: Number of the failed attempt starting from one.
+        """
+        delay = min(
+            self.max_delay, self.base_delay * self.multiplier ** (attempt - 1)
+        )
+        if self.jitter:
+            return random.uniform(0, delay)
+        return delay
+
+
+class CircuitBreaker:
+    """Fails requests fast while a node is down.
+
+    The breaker opens after failure_threshold consecutive network
+    failures. While it's open requests fail with NodeUnavailableError
+    without reaching the node. After recovery_timeout a single trial
+    request is let through: its success closes the breaker and its
+    failure opens it again.
+
+    Args:
+        failure_threshold: Consecutive failures that open the breaker.
+            Defaults to 5.
+        recovery_timeout: Seconds before a trial request. Defaults to 30.
+    """
+
+    def __init__(
+        self,
+        failure_threshold: int = 5,
+        recovery_timeout: Union[int, float] = 30,
+    ):
+        if failure_threshold < 1:
+            raise ValueError("Failure threshold must be greater than zero")
+        if recovery_timeout < 0:
+            raise ValueError("Recovery timeout must not be negative")
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.failures = 0
+        self._state = CLOSED
+        self._opened_at: Optional[float] = None
+        self._trial_in_flight = False
+
+    @property
+    def state(self) -> str:
+        if (
+            self._state == OPEN
+            and time.monotonic() - self._opened_at >= self.recovery_timeout
+        ):
+            return HALF_OPEN
+        return self._state
+
+    def before_call(self):
+        """Raises NodeUnavailableError if the request must not be sent."""
+        state = self.state
+        if state == CLOSED:
+            return
+        if state == HALF_OPEN and not self._trial_in_flight:
+            self._trial_in_flight = True
+            return
+        raise exceptions.NodeUnavailableError(
+            f"Node is unavailable after {self.failures} failures in a row"
+        )
+
+    def release(self):
+        """Lets another trial request through if the trial was cancelled."""
+        self._trial_in_flight = False
+
+    def record_success(self):
+        self.failures = 0
+        self._state = CLOSED
+        self._trial_in_flight = False
+
+    def record_failure(self):
+        self.failures += 1
+        if self._trial_in_flight or self.failures >= self.failure_threshold:
+            self._state = OPEN
+            self._opened_at = time.monotonic()
+        self._trial_in_flight = False
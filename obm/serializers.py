@@ -24,4 +24,4 @@ class Transaction(marshmallow.Schema):
     block_number = fields.Integer(allow_none=True, required=True)
     timestamp = fields.Integer(allow_none=True, required=True)
     fee = fields.Decimal(allow_none=True, required=True)
-    info = fields.Dict(required=True)
+    info = fields.Dict(allow_none=True, required=True)
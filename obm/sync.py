@@ -17,19 +17,30 @@ of the library so they can run the loop on their own if it's not already
 running. This rewrite may not be desirable if the end user always uses the
 methods they way they should be ran, but it's incredibly useful for quick
 scripts and the runtime overhead is relatively low.
+
+Outside of a running loop the methods run on a single background loop
+thread, so nodes may be shared between threads and called concurrently
+within one connection pool.
 """
 import functools
 import inspect
 
 from obm import mixins
 from obm import models
+from obm import queries
 from obm import utils
 
-__all__ = ["models", "mixins"]
+__all__ = ["models", "mixins", "queries"]
 
 
 def _syncify_wrap(_type, method_name):
+    is_classmethod = isinstance(
+        inspect.getattr_static(_type, method_name), classmethod
+    )
     method = getattr(_type, method_name)
+    if is_classmethod:
+        # Wrap the underlying function to keep the class it's called for.
+        method = method.__func__
 
     @functools.wraps(method)
     def syncified(*args, **kwargs):
@@ -38,6 +49,8 @@ def _syncify_wrap(_type, method_name):
 
     # Save an accessible reference to the original method
     syncified.asynchronous = method
+    if is_classmethod:
+        syncified = classmethod(syncified)
     setattr(_type, method_name, syncified)
 
 
@@ -55,4 +68,9 @@ def syncify(*types):
                     _syncify_wrap(_type, name)
 
 
-syncify(mixins.NodeMixin, mixins.TransactionMixin)
+syncify(
+    mixins.NodeMixin,
+    mixins.NodePoolMixin,
+    mixins.TransactionMixin,
+    queries.TransactionQuerySet,
+)
@@ -0,0 +1,304 @@
+# Copyright 2020 Alexander Polishchuk
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+Spans of connector work.
+
+Connectors emit nested spans: unified interface method, e.g.
+'fetch_recent_transactions', then 'rpc.call', then HTTP phases of the
+request, then 'json.decode', and 'format_transaction' for every formatted
+transaction. HTTP phases are:
+
+* http.request - from the start of the request until response headers;
+* http.connection_queued - waiting for a free connection of the pool;
+* http.connection_create - opening a new connection;
+* http.dns - resolving the host;
+* http.first_byte - from request headers sent until response headers.
+
+HTTP phases are traced only for sessions created by connectors.
+"""
+import abc
+import contextlib
+import contextvars
+import time
+from typing import Any, Dict, List, Optional
+
+import aiohttp
+
+__all__ = [
+    "NULL_TRACER",
+    "NullTracer",
+    "OpenTelemetryTracer",
+    "RecordingTracer",
+    "Span",
+    "Tracer",
+    "create_trace_config",
+    "get_current_span",
+]
+
+_current_span: contextvars.ContextVar = contextvars.ContextVar(
+    "obm_current_span", default=None
+)
+
+
+def get_current_span():
+    """Returns the span that is current in this context or None."""
+    return _current_span.get()
+
+
+class Tracer(abc.ABC):
+    """Creates spans in a tracing backend."""
+
+    # Connectors skip tracing at all if it's False.
+    enabled = True
+
+    @abc.abstractmethod
+    def start_span(
+        self,
+        name: str,
+        parent: Any = None,
+        attributes: Optional[Dict[str, Any]] = None,
+    ):
+        """Starts a span without making it current.
+
+        Args:
+            name: Span name.
+            parent: Span returned by this tracer or None for a root span.
+            attributes: Span attributes.
+
+        Returns:
+            Span object with set_attribute(key, value) and end(error=None)
+            methods.
+        """
+
+    @contextlib.contextmanager
+    def span(self, name: str, **attributes):
+        """Context manager of a span that is current within its block."""
+        span = self.start_span(name, get_current_span(), attributes)
+        token = _current_span.set(span)
+        try:
+            yield span
+        except BaseException as exc:
+            span.end(exc)
+            raise
+        else:
+            span.end()
+        finally:
+            _current_span.reset(token)
+
+
+class _NullSpan:
+    def set_attribute(self, key: str, value: Any):
+        pass
+
+    def end(self, error: Optional[BaseException] = None):
+        pass
+
+
+class NullTracer(Tracer):
+    """Tracer that records nothing, used by default."""
+
+    enabled = False
+    _span = _NullSpan()
+
+    def start_span(self, name, parent=None, attributes=None):
+        return self._span
+
+
+class Span:
+    """Span of RecordingTracer."""
+
+    __slots__ = (
+        "name",
+        "parent",
+        "attributes",
+        "start_time",
+        "end_time",
+        "error",
+        "_on_end",
+    )
+
+    def __init__(
+        self,
+        name: str,
+        parent: Optional["Span"],
+        attributes: Optional[Dict[str, Any]],
+        on_end,
+    ):
+        self.name = name
+        self.parent = parent
+        self.attributes = dict(attributes or {})
+        self.start_time = time.monotonic()
+        self.end_time: Optional[float] = None
+        self.error: Optional[BaseException] = None
+        self._on_end = on_end
+
+    def __repr__(self):
+        return f"<{type(self).__name__} {self.name}>"
+
+    @property
+    def duration(self) -> Optional[float]:
+        if self.end_time is None:
+            return None
+        return self.end_time - self.start_time
+
+    def set_attribute(self, key: str, value: Any):
+        self.attributes[key] = value
+
+    def end(self, error: Optional[BaseException] = None):
+        if self.end_time is not None:
+            return
+        self.end_time = time.monotonic()
+        self.error = error
+        self._on_end(self)
+
+
+class RecordingTracer(Tracer):
+    """Keeps finished spans in memory, e.g. for debugging and tests.
+
+    Args:
+        max_spans: Number of the latest spans to keep. Defaults to 10000.
+    """
+
+    def __init__(self, max_spans: int = 10000):
+        self.max_spans = max_spans
+        self.spans: List[Span] = []
+
+    def start_span(self, name, parent=None, attributes=None) -> Span:
+        return Span(name, parent, attributes, self._finish)
+
+    def _finish(self, span: Span):
+        self.spans.append(span)
+        if len(self.spans) > self.max_spans:
+            del self.spans[: len(self.spans) - self.max_spans]
+
+    def find(self, name: str) -> List[Span]:
+        return [span for span in self.spans if span.name == name]
+
+
+class _OpenTelemetrySpan:
+    __slots__ = ("span", "_trace")
+
+    def __init__(self, span, trace):
+        self.span = span
+        self._trace = trace
+
+    def set_attribute(self, key: str, value: Any):
+        self.span.set_attribute(key, value)
+
+    def end(self, error: Optional[BaseException] = None):
+        if error is not None:
+            self.span.record_exception(error)
+            self.span.set_status(
+                self._trace.Status(self._trace.StatusCode.ERROR, str(error))
+            )
+        self.span.end()
+
+
+class OpenTelemetryTracer(Tracer):
+    """Adapter of an OpenTelemetry tracer.
+
+    Root spans of obm become children of the active OpenTelemetry span.
+
+    Examples:
+        >>> from opentelemetry import trace
+        >>> tracer = OpenTelemetryTracer(trace.get_tracer("obm"))
+
+    Args:
+        tracer: opentelemetry.trace.Tracer.
+    """
+
+    def __init__(self, tracer):
+        try:
+            # pylint: disable=import-outside-toplevel
+            from opentelemetry import trace
+        except ImportError:
+            raise ImportError(
+                "opentelemetry-api is required to use OpenTelemetryTracer"
+            )
+        self.tracer = tracer
+        self._trace = trace
+
+    def start_span(
+        self, name, parent=None, attributes=None
+    ) -> _OpenTelemetrySpan:
+        context = None
+        if isinstance(parent, _OpenTelemetrySpan):
+            context = self._trace.set_span_in_context(parent.span)
+        span = self.tracer.start_span(
+            name, context=context, attributes=attributes
+        )
+        return _OpenTelemetrySpan(span, self._trace)
+
+
+def create_trace_config(tracer: Tracer) -> aiohttp.TraceConfig:
+    """Creates aiohttp trace config that emits spans of HTTP phases."""
+
+    def start(phase, name):
+        async def on_start(_, context, params):
+            if phase == "request":
+                context.spans = {}
+                parent = get_current_span()
+                attributes = {
+                    "http.method": params.method,
+                    "http.url": str(params.url),
+                }
+            else:
+                parent = context.spans.get("request")
+                attributes = None
+            context.spans[phase] = tracer.start_span(name, parent, attributes)
+
+        return on_start
+
+    def end(phase):
+        async def on_end(_, context, params):
+            span = context.spans.pop(phase, None)
+            if span is None:
+                return
+            if phase == "request":
+                span.set_attribute("http.status_code", params.response.status)
+            span.end()
+
+        return on_end
+
+    async def on_request_end(session, context, params):
+        await end("first_byte")(session, context, params)
+        await end("request")(session, context, params)
+
+    async def on_request_exception(_, context, params):
+        # Spans of the interrupted phases are ended by the request error too.
+        for span in reversed(list(context.spans.values())):
+            span.end(params.exception)
+        context.spans.clear()
+
+    trace_config = aiohttp.TraceConfig()
+    trace_config.on_request_start.append(start("request", "http.request"))
+    trace_config.on_connection_queued_start.append(
+        start("connection_queued", "http.connection_queued")
+    )
+    trace_config.on_connection_queued_end.append(end("connection_queued"))
+    trace_config.on_connection_create_start.append(
+        start("connection_create", "http.connection_create")
+    )
+    trace_config.on_connection_create_end.append(end("connection_create"))
+    trace_config.on_dns_resolvehost_start.append(start("dns", "http.dns"))
+    trace_config.on_dns_resolvehost_end.append(end("dns"))
+    trace_config.on_request_headers_sent.append(
+        start("first_byte", "http.first_byte")
+    )
+    trace_config.on_request_end.append(on_request_end)
+    trace_config.on_request_exception.append(on_request_exception)
+    return trace_config
+
+
+NULL_TRACER = NullTracer()
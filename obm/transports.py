@@ -0,0 +1,288 @@
+# Copyright 2020 Alexander Polishchuk
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import abc
+import asyncio
+from typing import Any, Dict, FrozenSet, Optional, Tuple, Union
+
+import aiohttp
+
+from obm import codecs, exceptions
+
+__all__ = [
+    "IPCTransport",
+    "Transport",
+    "WebSocketTransport",
+    "create",
+]
+
+HTTP = "http"
+IPC = "ipc"
+WEBSOCKET = "websocket"
+TRANSPORTS = [HTTP, IPC, WEBSOCKET]
+
+# Geth writes the whole block within a single line.
+IPC_LINE_LIMIT = 2 ** 28
+
+
+class Transport(abc.ABC):
+    """Persistent connection to a node that multiplexes JSON-RPC requests.
+
+    Requests are matched with responses by their IDs, so many requests
+    can be in flight over the same connection at once.
+
+    Args:
+        timeout: Seconds to wait for a response.
+        codec: Codec of messages. Defaults to codecs.create().
+    """
+
+    def __init__(
+        self,
+        timeout: Optional[Union[int, float]] = None,
+        codec: Optional[codecs.Codec] = None,
+    ):
+        self.timeout = timeout
+        self.codec = codec or codecs.create()
+        self._waiters: Dict[Any, asyncio.Future] = {}
+        self._reader: Optional[asyncio.Task] = None
+        self._lock: Optional[asyncio.Lock] = None
+
+    @property
+    def is_open(self) -> bool:
+        return self._reader is not None and not self._reader.done()
+
+    @staticmethod
+    def _key(message: Union[dict, list]) -> Union[Any, FrozenSet]:
+        if isinstance(message, list):
+            return frozenset(
+                item.get("id") for item in message if isinstance(item, dict)
+            )
+        return message.get("id")
+
+    async def open(self):
+        # Lock is created lazily to bind it to the running loop.
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            if self.is_open:
+                return
+            if self._reader is not None:
+                # Connection was closed by node, so clean it up before
+                # reconnecting.
+                self._reader = None
+                await self._disconnect()
+            try:
+                await self._connect()
+            except (OSError, aiohttp.ClientError) as exc:
+                raise exceptions.NetworkError(exc)
+            self._reader = asyncio.ensure_future(self._read_forever())
+
+    async def close(self):
+        if self._reader is not None:
+            self._reader.cancel()
+            try:
+                await self._reader
+            except asyncio.CancelledError:
+                pass
+            self._reader = None
+        await self._disconnect()
+        self._fail_waiters(exceptions.NetworkError("Connection is closed"))
+
+    async def request(self, payload: Union[dict, list]) -> Union[dict, list]:
+        response, _, _ = await self.exchange(payload)
+        return response
+
+    async def exchange(
+        self, payload: Union[dict, list]
+    ) -> Tuple[Union[dict, list], int, int]:
+        """Sends the payload and waits for the response.
+
+        Returns:
+            Response, sizes of the request and response messages in bytes.
+        """
+        await self.open()
+        key = self._key(payload)
+        waiter = asyncio.get_event_loop().create_future()
+        self._waiters[key] = waiter
+        try:
+            message = self.codec.dumps(payload)
+            await self._send(message)
+            response, received = await asyncio.wait_for(waiter, self.timeout)
+            return response, len(message), received
+        except asyncio.TimeoutError:
+            raise exceptions.NetworkTimeoutError(
+                f"The request to node was longer than timeout: {self.timeout}"
+            )
+        except (OSError, aiohttp.ClientError) as exc:
+            raise exceptions.NetworkError(exc)
+        finally:
+            self._waiters.pop(key, None)
+
+    async def _read_forever(self):
+        try:
+            async for message in self._receive():
+                response = self.codec.loads(message)
+                waiter = self._waiters.get(self._key(response))
+                if waiter is not None and not waiter.done():
+                    waiter.set_result((response, len(message)))
+                elif isinstance(response, dict) and "id" in response and (
+                    response["id"] is None
+                ):
+                    # Node can't parse a request, so it's unknown whose
+                    # request it is.
+                    self._fail_waiters(
+                        exceptions.NodeInvalidResponceError(response)
+                    )
+            error = exceptions.NetworkError("Connection is closed by node")
+        except (OSError, aiohttp.ClientError, ValueError) as exc:
+            error = exceptions.NetworkError(exc)
+        self._fail_waiters(error)
+
+    def _fail_waiters(self, error: Exception):
+        for waiter in self._waiters.values():
+            if not waiter.done():
+                waiter.set_exception(error)
+
+    @abc.abstractmethod
+    async def _connect(self):
+        ...
+
+    @abc.abstractmethod
+    async def _disconnect(self):
+        ...
+
+    @abc.abstractmethod
+    async def _send(self, message: bytes):
+        ...
+
+    @abc.abstractmethod
+    def _receive(self):
+        """Async iterator over incoming messages."""
+
+
+class IPCTransport(Transport):
+    """Unix domain socket transport, e.g. for geth.ipc.
+
+    Args:
+        path: Socket file path.
+    """
+
+    def __init__(self, path: str, **kwargs):
+        super().__init__(**kwargs)
+        self.path = path
+        self._stream_reader: Optional[asyncio.StreamReader] = None
+        self._stream_writer: Optional[asyncio.StreamWriter] = None
+
+    async def _connect(self):
+        (
+            self._stream_reader,
+            self._stream_writer,
+        ) = await asyncio.open_unix_connection(self.path, limit=IPC_LINE_LIMIT)
+
+    async def _disconnect(self):
+        if self._stream_writer is not None:
+            self._stream_writer.close()
+            self._stream_writer = None
+            self._stream_reader = None
+
+    async def _send(self, message: bytes):
+        self._stream_writer.write(message + b"\n")
+        await self._stream_writer.drain()
+
+    async def _receive(self):
+        while True:
+            line = await self._stream_reader.readline()
+            if not line:
+                return
+            if line.strip():
+                yield line
+
+
+class WebSocketTransport(Transport):
+    """WebSocket transport.
+
+    Args:
+        url: WebSocket endpoint URL.
+        session: Session to connect with. A new one is created by default.
+    """
+
+    def __init__(
+        self,
+        url: str,
+        session: Optional[aiohttp.ClientSession] = None,
+        **kwargs,
+    ):
+        super().__init__(**kwargs)
+        self.url = url
+        self.session = session
+        self._own_session = session is None
+        self._ws: Optional[aiohttp.ClientWebSocketResponse] = None
+
+    async def _connect(self):
+        if self.session is None:
+            self.session = aiohttp.ClientSession()
+        # Blocks don't fit into the default 4 MB message limit.
+        self._ws = await self.session.ws_connect(self.url, max_msg_size=0)
+
+    async def _disconnect(self):
+        if self._ws is not None:
+            await self._ws.close()
+            self._ws = None
+        if self._own_session and self.session is not None:
+            await self.session.close()
+            self.session = None
+
+    async def _send(self, message: bytes):
+        await self._ws.send_str(message.decode())
+
+    async def _receive(self):
+        async for message in self._ws:
+            if message.type in (
+                aiohttp.WSMsgType.TEXT,
+                aiohttp.WSMsgType.BINARY,
+            ):
+                yield message.data
+            elif message.type == aiohttp.WSMsgType.ERROR:
+                raise exceptions.NetworkError(self._ws.exception())
+
+
+def create(
+    name: str,
+    rpc_host: str,
+    rpc_port: int,
+    **kwargs,
+) -> Optional[Transport]:
+    """Creates the transport by name.
+
+    HTTP is served by the connector's own session, so there is no transport
+    object for it.
+
+    Args:
+        name: One of 'http', 'ipc' and 'websocket'.
+        rpc_host: Host or a socket path for IPC.
+        rpc_port: Port, ignored for IPC.
+
+    Returns:
+        Transport or None for HTTP.
+    """
+    if name not in TRANSPORTS:
+        raise ValueError(
+            f"Unsupported transport. Available only: {TRANSPORTS}"
+        )
+    if name == IPC:
+        return IPCTransport(rpc_host, **kwargs)
+    if name == WEBSOCKET:
+        url = f"{rpc_host}:{rpc_port}"
+        url = url if url.startswith("ws") else "ws://" + url
+        return WebSocketTransport(url, **kwargs)
+    return None
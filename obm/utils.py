@@ -1,19 +1,48 @@
 import asyncio
 import inspect
+import threading
 
+_background_loop = None
+_background_loop_lock = threading.Lock()
 
-def _get_or_create_event_loop():
+
+def get_background_loop():
+    """Returns the event loop that runs forever in a daemon thread.
+
+    The loop is started on the first call and shared by all threads, so
+    connectors and their sessions are shared between threads too.
+    """
+    global _background_loop  # pylint: disable=global-statement
+    with _background_loop_lock:
+        if _background_loop is None:
+            loop = asyncio.new_event_loop()
+            thread = threading.Thread(
+                target=loop.run_forever, name="obm-event-loop", daemon=True
+            )
+            thread.start()
+            _background_loop = loop
+    return _background_loop
+
+
+def _is_loop_running():
     try:
-        return asyncio.get_event_loop()
+        asyncio.get_running_loop()
     except RuntimeError:
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-        return loop
+        return False
+    return True
 
 
 def sync_run(coro, loop=None):
+    """Runs the coroutine to completion from synchronous code.
+
+    The coroutine is returned as is if it's called within a running loop.
+    Otherwise it runs on the given loop or, by default, on the background
+    loop, which lets any thread wait for the result.
+    """
     assert inspect.iscoroutine(coro)
-    loop = loop or _get_or_create_event_loop()
-    if loop.is_running():
+    if loop is not None and not loop.is_running():
+        return loop.run_until_complete(asyncio.ensure_future(coro, loop=loop))
+    if loop is not None or _is_loop_running():
         return coro
-    return loop.run_until_complete(asyncio.ensure_future(coro, loop=loop))
+    future = asyncio.run_coroutine_threadsafe(coro, get_background_loop())
+    return future.result()
@@ -16,7 +16,9 @@ import setuptools
 import obm
 
 EXTRAS_REQUIRE = {
-    "tests": ["pytest", "python-dotenv", "pytest-xdist"],
+    "orjson": ["orjson>=3,<4"],
+    "opentelemetry": ["opentelemetry-api>=1,<2"],
+    "tests": ["pytest", "python-dotenv", "pytest-xdist", "pytest-benchmark"],
     "lint": ["pylint", "mypy"],
     "docs": ["sphinx>=2.4,<3", "sphinx-rtd-theme"],
     "deploy": ["twine"],
@@ -40,7 +42,7 @@ setuptools.setup(
     name="obm",
     version=obm.__version__,
     packages=setuptools.find_packages(exclude=["tests*"]),
-    install_requires=["aiohttp>=3.6,<4", "web3>=5.7,<6", "marshmallow>=3.5,<4"],
+    install_requires=["aiohttp>=3.6,<4", "marshmallow>=3.5,<4"],
     extras_require=EXTRAS_REQUIRE,
     license="Apache License 2.0",
     description="Async blockchain nodes interacting tool with ORM-like api.",
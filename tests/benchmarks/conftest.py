@@ -0,0 +1,169 @@
+# Copyright 2020 Alexander Polishchuk
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+Synthetic fixtures of realistic size for benchmarks.
+
+Data is generated with a fixed seed, so results of different runs are
+comparable.
+"""
+# pylint: disable = redefined-outer-name
+import itertools
+import json
+import random
+from decimal import Decimal
+
+import pytest
+
+from obm.connectors import ethereum
+
+SEED = 0
+WALLET_SIZE = 100_000
+# Share of wallet transactions that are sent to the wallet itself.
+ONESELF_SHARE = 0.1
+BLOCK_SIZE = 300
+BLOCK_NUMBER = 10_000_000
+# Share of block transactions that belong to the wallet.
+IN_WALLET_SHARE = 0.3
+WALLET_PAGE_SIZE = 1000
+
+
+def random_hex(rand, size):
+    return "".join(rand.choice("0123456789abcdef") for _ in range(size))
+
+
+def make_wallet_entry(rand, txid, category, address, confirmations):
+    amount = Decimal(rand.randint(1, 10 ** 8)) / 10 ** 8
+    entry = {
+        "address": address,
+        "category": category,
+        "amount": -amount if category == "send" else amount,
+        "label": "",
+        "vout": rand.randint(0, 3),
+        "confirmations": confirmations,
+        "blockhash": random_hex(rand, 64),
+        "blockheight": BLOCK_NUMBER - confirmations + 1,
+        "blockindex": rand.randint(0, BLOCK_SIZE),
+        "blocktime": 1600000000,
+        "txid": txid,
+        "walletconflicts": [],
+        "time": 1600000000,
+        "timereceived": 1600000000,
+        "bip125-replaceable": "no",
+    }
+    if category == "send":
+        entry["fee"] = Decimal("-0.00000141")
+    return entry
+
+
+@pytest.fixture(scope="session")
+def wallet_entries():
+    """listtransactions entries of a wallet, the most recent first."""
+    rand = random.Random(SEED)
+    entries = []
+    while len(entries) < WALLET_SIZE:
+        txid = random_hex(rand, 64)
+        address = "tb1q" + random_hex(rand, 38)
+        confirmations = rand.randint(0, 100_000)
+        if rand.random() < ONESELF_SHARE:
+            categories = ["send", "receive"]
+        else:
+            categories = [rand.choice(["send", "receive"])]
+        for category in categories:
+            entries.append(
+                make_wallet_entry(
+                    rand, txid, category, address, confirmations
+                )
+            )
+    return entries[:WALLET_SIZE]
+
+
+@pytest.fixture(scope="session")
+def wallet_groups(wallet_entries):
+    """Wallet entries grouped by txid."""
+    return [
+        list(group)
+        for _, group in itertools.groupby(
+            wallet_entries, key=lambda entry: entry["txid"]
+        )
+    ]
+
+
+@pytest.fixture(scope="session")
+def wallet_page_message(wallet_entries):
+    """Encoded listtransactions response of a single page."""
+    return json.dumps(
+        {
+            "result": wallet_entries[:WALLET_PAGE_SIZE],
+            "error": None,
+            "id": 1,
+        },
+        default=float,
+    ).encode()
+
+
+@pytest.fixture(scope="session")
+def wallet_addresses():
+    rand = random.Random(SEED)
+    addresses = ethereum.AddressRegistry()
+    addresses.update(["0x" + random_hex(rand, 40) for _ in range(100)])
+    return addresses
+
+
+@pytest.fixture(scope="session")
+def geth_block(wallet_addresses):
+    """eth_getBlockByNumber result with full transactions."""
+    rand = random.Random(SEED)
+    in_wallet = sorted(wallet_addresses)
+    transactions = []
+    for index in range(BLOCK_SIZE):
+        sender = "0x" + random_hex(rand, 40)
+        recipient = "0x" + random_hex(rand, 40)
+        if rand.random() < IN_WALLET_SHARE:
+            if rand.random() < 0.5:
+                sender = rand.choice(in_wallet)
+            else:
+                recipient = rand.choice(in_wallet)
+        transactions.append(
+            {
+                "blockHash": "0x" + random_hex(rand, 64),
+                "blockNumber": hex(BLOCK_NUMBER),
+                "from": sender,
+                "gas": hex(rand.randint(21000, 500_000)),
+                "gasPrice": hex(rand.randint(10 ** 9, 10 ** 11)),
+                "hash": "0x" + random_hex(rand, 64),
+                "input": "0x" + random_hex(rand, rand.choice([0, 136, 520])),
+                "nonce": hex(rand.randint(0, 10 ** 5)),
+                "to": recipient,
+                "transactionIndex": hex(index),
+                "value": hex(rand.randint(0, 10 ** 20)),
+                "v": "0x1c",
+                "r": "0x" + random_hex(rand, 64),
+                "s": "0x" + random_hex(rand, 64),
+            }
+        )
+    return {
+        "number": hex(BLOCK_NUMBER),
+        "hash": "0x" + random_hex(rand, 64),
+        "parentHash": "0x" + random_hex(rand, 64),
+        "timestamp": hex(1600000000),
+        "transactions": transactions,
+    }
+
+
+@pytest.fixture(scope="session")
+def geth_block_message(geth_block):
+    """Encoded eth_getBlockByNumber response."""
+    return json.dumps(
+        {"jsonrpc": "2.0", "id": 1, "result": geth_block}
+    ).encode()
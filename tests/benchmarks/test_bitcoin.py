@@ -0,0 +1,56 @@
+# Copyright 2020 Alexander Polishchuk
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+from obm import connectors
+from tests.benchmarks.conftest import BLOCK_NUMBER
+
+
+def test_format_transaction(benchmark, wallet_entries):
+    connector = connectors.BitcoinCoreConnector()
+    format_transaction = connector.format_transaction
+
+    def format_wallet():
+        return [
+            format_transaction(entry, BLOCK_NUMBER)
+            for entry in wallet_entries
+        ]
+
+    assert len(benchmark(format_wallet)) == len(wallet_entries)
+
+
+def test_combine_duplicates(benchmark, wallet_groups):
+    combine_duplicates = connectors.BitcoinCoreConnector.combine_duplicates
+
+    def combine_wallet():
+        return [
+            entry
+            for group in wallet_groups
+            for entry in combine_duplicates(group)
+        ]
+
+    result = benchmark(combine_wallet)
+    assert len(result) == len(wallet_groups)
+
+
+def test_rpc_method_dispatch(benchmark, monkeypatch, loop):
+    async def mock_call(_, payload):
+        return {"result": 100, "error": None, "id": payload["id"]}
+
+    monkeypatch.setattr(connectors.BitcoinCoreConnector, "call", mock_call)
+    connector = connectors.BitcoinCoreConnector(loop=loop)
+
+    async def call_many():
+        for _ in range(1000):
+            await connector.rpc_get_block_count()
+
+    benchmark(lambda: loop.run_until_complete(call_many()))
@@ -0,0 +1,50 @@
+# Copyright 2020 Alexander Polishchuk
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+from decimal import Decimal
+
+import pytest
+
+from obm import codecs
+
+
+@pytest.fixture(params=codecs.CODECS)
+def codec(request):
+    try:
+        return codecs.create(request.param)
+    except ImportError:
+        pytest.skip(f"{request.param} is not installed")
+
+
+def test_decode_block(benchmark, codec, geth_block_message):
+    response = benchmark(codec.loads, geth_block_message)
+    assert len(response["result"]["transactions"]) == 300
+
+
+def test_decode_wallet_page(benchmark, codec, wallet_page_message):
+    # Amounts are floats, so they must be decoded as Decimal.
+    response = benchmark(codec.loads, wallet_page_message)
+    assert isinstance(response["result"][0]["amount"], Decimal)
+
+
+def test_encode_batch(benchmark, codec, geth_block):
+    payload = [
+        {
+            "method": "eth_getTransactionByHash",
+            "params": [tx["hash"]],
+            "jsonrpc": "2.0",
+            "id": index,
+        }
+        for index, tx in enumerate(geth_block["transactions"])
+    ]
+    benchmark(codec.dumps, payload)
@@ -0,0 +1,53 @@
+# Copyright 2020 Alexander Polishchuk
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+from obm import connectors
+from obm.connectors import ethereum
+
+
+def test_find_transactions_in(benchmark, geth_block, wallet_addresses):
+    txs = benchmark(
+        connectors.GethConnector.find_transactions_in,
+        geth_block,
+        wallet_addresses,
+    )
+    assert txs
+
+
+def test_format_transaction(benchmark, geth_block, wallet_addresses):
+    connector = connectors.GethConnector()
+    format_transaction = connector.format_transaction
+    txs = connector.find_transactions_in(geth_block, wallet_addresses)
+
+    def format_block():
+        return [format_transaction(tx, wallet_addresses) for tx in txs]
+
+    assert len(benchmark(format_block)) == len(txs)
+
+
+def test_to_int(benchmark, geth_block):
+    values = [tx["value"] for tx in geth_block["transactions"]]
+    benchmark(lambda: [ethereum.to_int(value) for value in values])
+
+
+def test_from_wei(benchmark, geth_block):
+    values = [int(tx["value"], 16) for tx in geth_block["transactions"]]
+    benchmark(lambda: [ethereum.from_wei(value) for value in values])
+
+
+def test_to_wei(benchmark, geth_block):
+    values = [
+        ethereum.from_wei(int(tx["value"], 16))
+        for tx in geth_block["transactions"]
+    ]
+    benchmark(lambda: [ethereum.to_wei(value) for value in values])
@@ -0,0 +1,28 @@
+# Copyright 2020 Alexander Polishchuk
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import subprocess
+import sys
+
+import pytest
+
+
+def run_python(statement):
+    subprocess.run([sys.executable, "-c", statement], check=True)
+
+
+# The bare interpreter start is measured as well, so it can be subtracted
+# from import times.
+@pytest.mark.parametrize("statement", ["pass", "import obm.models"])
+def test_import(benchmark, statement):
+    benchmark.pedantic(run_python, args=(statement,), rounds=10)
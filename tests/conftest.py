@@ -36,6 +36,12 @@ def pytest_addoption(parser):
         default="",
         help="Run integration tests with main test suite.",
     )
+    parser.addoption(
+        "--benchmarks",
+        action="store_true",
+        default="",
+        help="Run benchmarks, requires pytest-benchmark.",
+    )
 
 
 # pytest hooks
@@ -54,6 +60,12 @@ def pytest_runtest_setup(item):
     is_integration_test_session = item.config.getoption("--integration")
     if not is_integration_test_session and "integration" in markers:
         pytest.skip("skipped integration test")
+    is_benchmark_session = item.config.getoption("--benchmarks")
+    if "benchmark" in item.fixturenames:
+        if not is_benchmark_session:
+            pytest.skip("skipped benchmark")
+        if not item.config.pluginmanager.hasplugin("benchmark"):
+            pytest.skip("pytest-benchmark is not installed")
 
 
 # fixtures
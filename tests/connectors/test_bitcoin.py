@@ -11,13 +11,16 @@
 # WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
 # See the License for the specific language governing permissions and
 # limitations under the License.
+import asyncio
+import inspect
 import os
+from collections.abc import Mapping
 from decimal import Decimal
 
 import aiohttp
 import pytest
 
-from obm import connectors, exceptions
+from obm import caches, connectors, exceptions
 
 
 class TestBitcoinCoreConnector:
@@ -94,28 +97,574 @@ class TestBitcoinCoreConnector:
     async def test_in_wallet_transaction(
         monkeypatch, bitcoin_core, mocked_data, expected_result,
     ):
-        async def mock_call(*_, **__):
-            return {"result": mocked_data}
-
-        @property
-        async def mock_latest_block_number(_):
-            return 100
+        async def mock_call(_, payload):
+            return [
+                {
+                    "result": (
+                        100
+                        if entry["method"] == "getblockcount"
+                        else mocked_data
+                    ),
+                    "error": None,
+                    "id": entry["id"],
+                }
+                for entry in payload
+            ]
 
         monkeypatch.setattr(
             connectors.BitcoinCoreConnector,
             "call",
             mock_call,
         )
-        monkeypatch.setattr(
-            connectors.BitcoinCoreConnector,
-            "latest_block_number",
-            mock_latest_block_number,
-        )
         result = await bitcoin_core.fetch_in_wallet_transaction(
             txid=mocked_data["txid"],
         )
         assert result["category"] == expected_result["category"]
 
+    @staticmethod
+    @pytest.mark.parametrize(
+        "blockheight, block_number",
+        ((98, 98), (None, 103)),
+        ids=["block height", "head from the same batch"],
+    )
+    async def test_in_wallet_transaction_block_number(
+        monkeypatch, bitcoin_core, blockheight, block_number
+    ):
+        tx = {
+            "txid": "a",
+            "confirmations": 3,
+            "time": 1592413084,
+            "details": [{"category": "receive", "address": "b", "amount": 1}],
+        }
+        if blockheight is not None:
+            tx["blockheight"] = blockheight
+
+        async def mock_call(_, payload):
+            return [
+                {
+                    "result": 105 if entry["method"] == "getblockcount" else tx,
+                    "error": None,
+                    "id": entry["id"],
+                }
+                for entry in payload
+            ]
+
+        monkeypatch.setattr(connectors.BitcoinCoreConnector, "call", mock_call)
+        # Stale head must not be used for the block number.
+        bitcoin_core.head_tracker.update(100)
+        result = await bitcoin_core.fetch_in_wallet_transaction("a")
+        assert result["block_number"] == block_number
+        assert bitcoin_core.returns_blockheight is (blockheight is not None)
+
+    @staticmethod
+    async def test_call_batch(monkeypatch, bitcoin_core):
+        async def mock_call(_, payload):
+            assert isinstance(payload, list)
+            assert len({entry["id"] for entry in payload}) == len(payload)
+            # Node doesn't guarantee the order of batch responses.
+            return [
+                {"result": entry["method"], "error": None, "id": entry["id"]}
+                for entry in reversed(payload)
+            ]
+
+        monkeypatch.setattr(connectors.BitcoinCoreConnector, "call", mock_call)
+        results = await bitcoin_core.call_batch(
+            [("rpc_get_block_count", []), ("gettransaction", ["txid"])]
+        )
+        assert results == ["getblockcount", "gettransaction"]
+
+    @staticmethod
+    @pytest.mark.parametrize(
+        "return_exceptions", (True, False), ids=["return", "raise"],
+    )
+    async def test_call_batch_errors(
+        monkeypatch, bitcoin_core, return_exceptions
+    ):
+        error = {"code": -5, "message": "Invalid or non-wallet transaction id"}
+
+        async def mock_call(_, payload):
+            return [
+                {"result": 1, "error": None, "id": payload[0]["id"]},
+                {"result": None, "error": error, "id": payload[1]["id"]},
+            ]
+
+        monkeypatch.setattr(connectors.BitcoinCoreConnector, "call", mock_call)
+        calls = [("rpc_get_block_count", []), ("rpc_get_transaction", ["a"])]
+        if return_exceptions:
+            results = await bitcoin_core.call_batch(calls, return_exceptions)
+            assert results[0] == 1
+            assert isinstance(results[1], exceptions.NodeError)
+            assert results[1].args[0] == error
+        else:
+            with pytest.raises(exceptions.NodeError):
+                await bitcoin_core.call_batch(calls, return_exceptions)
+
+    @staticmethod
+    def mock_history(monkeypatch, history, requested):
+        """Mocks listtransactions over the history ordered from the oldest."""
+
+        def respond(payload):
+            if payload["method"] == "getblockcount":
+                result = 100
+            else:
+                _, count, skip, _ = payload["params"]
+                requested.append((count, skip))
+                end = len(history) - skip
+                result = [dict(e) for e in history[max(0, end - count) : end]]
+            return {"result": result, "error": None, "id": payload["id"]}
+
+        async def mock_call(_, payload):
+            if isinstance(payload, list):
+                return [respond(entry) for entry in payload]
+            return respond(payload)
+
+        monkeypatch.setattr(connectors.BitcoinCoreConnector, "call", mock_call)
+
+    @staticmethod
+    def make_entry(txid, category="receive", address="addr"):
+        return {
+            "txid": txid,
+            "category": category,
+            "address": address,
+            "amount": Decimal("-0.1" if category == "send" else "0.1"),
+            "fee": Decimal("-0.0001") if category == "send" else None,
+            "confirmations": 1,
+            "blockheight": 100,
+            "time": 1592413084,
+        }
+
+    @staticmethod
+    def test_oneself_entries_are_not_modified(bitcoin_core):
+        make_entry = TestBitcoinCoreConnector.make_entry
+        # Entries may be shared by coalesced calls.
+        entries = [make_entry("self", "send"), make_entry("self")]
+        (combined,) = bitcoin_core.combine_duplicates(entries)
+        tx = bitcoin_core.format_transaction(combined, 100)
+        assert tx["category"] == "oneself"
+        assert tx["info"]["category"] == "send"
+        assert [entry["category"] for entry in entries] == ["send", "receive"]
+        assert combined["category"] == "oneself"
+
+    @staticmethod
+    async def test_iter_recent_transactions_pages_history(
+        monkeypatch, bitcoin_core
+    ):
+        make_entry = TestBitcoinCoreConnector.make_entry
+        history = [make_entry(str(i)) for i in range(9)]
+        # Self-sending pair that is split between the second and the third
+        # pages.
+        history[2:2] = [make_entry("self", "send"), make_entry("self")]
+        requested = []
+        TestBitcoinCoreConnector.mock_history(
+            monkeypatch, history, requested
+        )
+
+        txs = [tx async for tx in bitcoin_core.iter_recent_transactions(4)]
+        assert [tx["txid"] for tx in txs] == [
+            str(i) for i in range(8, 1, -1)
+        ] + ["self", "1", "0"]
+        assert txs[7]["category"] == "oneself"
+        assert requested == [(4, 0), (4, 4), (4, 8)]
+
+        txs = await bitcoin_core.fetch_recent_transactions(limit=8)
+        assert [tx["txid"] for tx in txs][-1] == "self"
+
+    @staticmethod
+    async def test_iter_recent_transactions_skips_shifted_entries(
+        monkeypatch, bitcoin_core
+    ):
+        make_entry = TestBitcoinCoreConnector.make_entry
+        history = [make_entry(str(i)) for i in range(6)]
+        requested = []
+        TestBitcoinCoreConnector.mock_history(
+            monkeypatch, history, requested
+        )
+        txs = bitcoin_core.iter_recent_transactions(3)
+        txids = [(await txs.__anext__())["txid"] for _ in range(2)]
+        assert requested == [(3, 0)]
+        # New transaction shifts the history by one entry.
+        history.append(make_entry("new"))
+        txids += [tx["txid"] async for tx in txs]
+        assert txids == ["5", "4", "3", "2", "1", "0"]
+
+    @staticmethod
+    async def test_iter_recent_transactions_stops_at_min_block(
+        monkeypatch, bitcoin_core
+    ):
+        make_entry = TestBitcoinCoreConnector.make_entry
+        history = [make_entry(str(i)) for i in range(12)]
+        for height, entry in enumerate(history, start=90):
+            entry["blockheight"] = height
+        requested = []
+        TestBitcoinCoreConnector.mock_history(
+            monkeypatch, history, requested
+        )
+        txs = [
+            tx
+            async for tx in bitcoin_core.iter_recent_transactions(
+                4, min_block=98
+            )
+        ]
+        # The second page is older than min_block, so the third one isn't
+        # requested.
+        assert requested == [(4, 0), (4, 4)]
+        assert [tx["txid"] for tx in txs][:4] == ["11", "10", "9", "8"]
+
+    @staticmethod
+    async def test_sync_wallet_continues_from_checkpoint(
+        monkeypatch, bitcoin_core, tmp_path
+    ):
+        make_entry = TestBitcoinCoreConnector.make_entry
+        since_blocks = []
+        changes = {
+            "": {
+                "transactions": [
+                    make_entry("a"),
+                    make_entry("self", "send"),
+                    make_entry("self"),
+                ],
+                "removed": [],
+                "lastblock": "hash-1",
+            },
+            "hash-1": {
+                "transactions": [make_entry("b")],
+                "removed": [dict(make_entry("a"), confirmations=-3)],
+                "lastblock": "hash-2",
+            },
+        }
+
+        async def mock_call(_, payload):
+            responses = []
+            for entry in payload:
+                if entry["method"] == "getblockcount":
+                    result = 100
+                else:
+                    since_blocks.append(entry["params"][0])
+                    result = changes[entry["params"][0]]
+                responses.append(
+                    {"result": result, "error": None, "id": entry["id"]}
+                )
+            return responses
+
+        monkeypatch.setattr(connectors.BitcoinCoreConnector, "call", mock_call)
+        result = await bitcoin_core.sync_wallet()
+        assert [tx["txid"] for tx in result["transactions"]] == ["a", "self"]
+        assert result["transactions"][1]["category"] == "oneself"
+        assert result["checkpoint"] == "hash-1"
+        result = await bitcoin_core.sync_wallet()
+        assert [tx["txid"] for tx in result["transactions"]] == ["b"]
+        assert [tx["txid"] for tx in result["removed"]] == ["a"]
+        assert result["removed"][0]["block_number"] == -1
+        assert bitcoin_core.checkpoint == "hash-2"
+
+        # Checkpoint persisted by the caller is passed after restart.
+        connector = connectors.BitcoinCoreConnector(loop=bitcoin_core.loop)
+        await connector.sync_wallet(checkpoint="hash-1")
+        assert since_blocks == ["", "hash-1", "hash-1"]
+
+        # Checkpoint file survives a new connector.
+        since_blocks.clear()
+        path = str(tmp_path / "checkpoint")
+        connector = connectors.BitcoinCoreConnector(
+            loop=bitcoin_core.loop, checkpoint_path=path
+        )
+        await connector.sync_wallet()
+        connector = connectors.BitcoinCoreConnector(
+            loop=bitcoin_core.loop, checkpoint_path=path
+        )
+        assert connector.checkpoint == "hash-1"
+        await connector.sync_wallet()
+        assert since_blocks == ["", "hash-1"]
+
+    @staticmethod
+    def test_rpc_methods_are_generated():
+        method = connectors.BitcoinCoreConnector.rpc_get_block_count
+        assert method is connectors.BitcoinCoreConnector.rpc_get_block_count
+        assert method.__name__ == "rpc_get_block_count"
+        assert "'getblockcount'" in method.__doc__
+        assert str(inspect.signature(method)) == "(self, /)"
+        method = connectors.BitcoinCoreConnector.rpc_get_block
+        assert str(inspect.signature(method)) == (
+            "(self, /, blockhash, verbosity=None)"
+        )
+        assert "blockhash and optional verbosity params" in method.__doc__
+
+    @staticmethod
+    async def test_rpc_method_calls_node(monkeypatch, bitcoin_core):
+        payloads = []
+
+        async def mock_call(_, payload):
+            payloads.append(payload)
+            return {"result": 100, "error": None, "id": payload["id"]}
+
+        monkeypatch.setattr(connectors.BitcoinCoreConnector, "call", mock_call)
+        assert await bitcoin_core.rpc_get_block(1, 2) == 100
+        assert payloads[0]["method"] == "getblock"
+        assert payloads[0]["params"] == (1, 2)
+        await bitcoin_core.rpc_get_block(blockhash=3)
+        assert payloads[1]["params"] == (3,)
+        await bitcoin_core.rpc_get_transaction("a", verbose=True)
+        assert payloads[2]["params"] == ("a", None, True)
+        with pytest.raises(TypeError):
+            await bitcoin_core.rpc_get_block()
+
+    @staticmethod
+    async def test_identical_calls_share_request(monkeypatch, bitcoin_core):
+        payloads = []
+
+        async def mock_call(_, payload):
+            payloads.append(payload)
+            await asyncio.sleep(0.01)
+            if payload["params"] == ("missing",):
+                return {"result": None, "error": {"code": -5}, "id": 1}
+            return {"result": payload["params"], "error": None, "id": 1}
+
+        monkeypatch.setattr(connectors.BitcoinCoreConnector, "call", mock_call)
+        results = await asyncio.gather(
+            *[bitcoin_core.rpc_get_transaction("a") for _ in range(5)],
+            bitcoin_core.rpc_get_transaction("b"),
+            bitcoin_core.rpc_get_new_address(),
+            bitcoin_core.rpc_get_new_address(),
+        )
+        assert results[:6] == [("a",)] * 5 + [("b",)]
+        assert sorted(p["method"] for p in payloads) == [
+            "getnewaddress",
+            "getnewaddress",
+            "gettransaction",
+            "gettransaction",
+        ]
+
+        payloads.clear()
+        results = await asyncio.gather(
+            *[bitcoin_core.rpc_get_transaction("missing") for _ in range(3)],
+            return_exceptions=True,
+        )
+        assert all(isinstance(r, exceptions.NodeError) for r in results)
+        assert len(payloads) == 1
+        # Request is sent again once the previous one is completed.
+        await bitcoin_core.rpc_get_transaction("a")
+        assert len(payloads) == 2
+
+    @staticmethod
+    async def test_identical_batches_share_request(monkeypatch, bitcoin_core):
+        payloads = []
+
+        async def mock_call(_, payload):
+            payloads.append(payload)
+            await asyncio.sleep(0.01)
+            responses = []
+            for entry in payload:
+                if entry["method"] == "getblockcount":
+                    result = 100
+                else:
+                    result = {
+                        "confirmations": 1,
+                        "blockheight": 100,
+                        "txid": entry["params"][0],
+                        "time": 1592413084,
+                        "details": [
+                            {
+                                "address": "b",
+                                "category": "receive",
+                                "amount": Decimal("0.1"),
+                            }
+                        ],
+                    }
+                responses.append(
+                    {"result": result, "error": None, "id": entry["id"]}
+                )
+            return responses
+
+        monkeypatch.setattr(connectors.BitcoinCoreConnector, "call", mock_call)
+        txs = await asyncio.gather(
+            *[bitcoin_core.fetch_in_wallet_transaction("a") for _ in range(10)],
+            bitcoin_core.fetch_in_wallet_transaction("b"),
+        )
+        assert [tx["txid"] for tx in txs] == ["a"] * 10 + ["b"]
+        assert len(payloads) == 2
+
+    @staticmethod
+    async def test_fetch_in_wallet_transactions_in_one_request(
+        monkeypatch, bitcoin_core
+    ):
+        payloads = []
+
+        async def mock_call(_, payload):
+            payloads.append(payload)
+            responses = []
+            for entry in payload:
+                if entry["method"] == "getblockcount":
+                    result = 100
+                else:
+                    result = {
+                        "amount": Decimal("0.1"),
+                        "confirmations": 10,
+                        "blockheight": 91,
+                        "txid": entry["params"][0],
+                        "time": 1592413084,
+                        "details": [
+                            {
+                                "address": "32A5JFirRRoEz7dhsmqHRNWWe36Z9cmRET",
+                                "category": "receive",
+                                "amount": Decimal("0.1"),
+                            }
+                        ],
+                    }
+                responses.append(
+                    {"result": result, "error": None, "id": entry["id"]}
+                )
+            return responses
+
+        monkeypatch.setattr(connectors.BitcoinCoreConnector, "call", mock_call)
+        txs = await bitcoin_core.fetch_in_wallet_transactions(["a", "b", "c"])
+        assert len(payloads) == 1
+        # Head isn't needed as the node returns block heights.
+        assert {entry["method"] for entry in payloads[0]} == {"gettransaction"}
+        assert [tx["txid"] for tx in txs] == ["a", "b", "c"]
+        assert {tx["block_number"] for tx in txs} == {91}
+
+    @staticmethod
+    async def test_fetch_in_wallet_transactions_uses_cache(
+        monkeypatch, bitcoin_core
+    ):
+        payloads = []
+        latest_block_number = 100
+
+        async def mock_call(_, payload):
+            payloads.append(payload)
+            if isinstance(payload, dict):
+                return {
+                    "result": latest_block_number,
+                    "error": None,
+                    "id": payload["id"],
+                }
+            responses = []
+            for entry in payload:
+                if entry["method"] == "getblockcount":
+                    result = latest_block_number
+                else:
+                    txid = entry["params"][0]
+                    confirmations = 10 if txid == "final" else 1
+                    result = {
+                        "amount": Decimal("0.1"),
+                        "confirmations": confirmations,
+                        "blockheight": latest_block_number - confirmations + 1,
+                        "txid": txid,
+                        "time": 1592413084,
+                        "details": [
+                            {
+                                "address": "32A5JFirRRoEz7dhsmqHRNWWe36Z9cmRET",
+                                "category": "receive",
+                                "amount": Decimal("0.1"),
+                            }
+                        ],
+                    }
+                responses.append(
+                    {"result": result, "error": None, "id": entry["id"]}
+                )
+            return responses
+
+        monkeypatch.setattr(connectors.BitcoinCoreConnector, "call", mock_call)
+        bitcoin_core.cache = caches.LRUCache()
+        txids = ["final", "fresh"]
+        await bitcoin_core.fetch_in_wallet_transactions(txids)
+        latest_block_number = 105
+        txs = await bitcoin_core.fetch_in_wallet_transactions(txids)
+        requested = [entry["method"] for entry in payloads[1]]
+        assert requested == ["gettransaction"]
+        assert payloads[1][0]["params"] == ["fresh"]
+        # Head is needed only to refresh confirmations of the cached one.
+        assert payloads[2]["method"] == "getblockcount"
+        assert txs[0]["block_number"] == 91
+        assert txs[0]["info"]["confirmations"] == 15
+
+    @staticmethod
+    async def test_cache_is_shared_between_nodes(monkeypatch, loop):
+        async def mock_call(connector, payload):
+            responses = []
+            for entry in payload:
+                if entry["method"] == "getblockcount":
+                    result = 100
+                else:
+                    result = {
+                        "confirmations": 10,
+                        "blockheight": 91,
+                        "txid": entry["params"][0],
+                        "time": 1592413084,
+                        "details": [
+                            {
+                                "address": connector.rpc_address,
+                                "category": "receive",
+                                "amount": Decimal("0.1"),
+                            }
+                        ],
+                    }
+                responses.append(
+                    {"result": result, "error": None, "id": entry["id"]}
+                )
+            return responses
+
+        monkeypatch.setattr(connectors.BitcoinCoreConnector, "call", mock_call)
+        cache = caches.LRUCache()
+        first, second = [
+            connectors.BitcoinCoreConnector(
+                rpc_host=host, loop=loop, cache=cache
+            )
+            for host in ("first", "second")
+        ]
+        (tx,) = await first.fetch_in_wallet_transactions(["a"])
+        assert tx["to_address"] == "first:18332"
+        # Wallet transactions of another node aren't taken from the cache.
+        (tx,) = await second.fetch_in_wallet_transactions(["a"])
+        assert tx["to_address"] == "second:18332"
+        assert len(cache) == 2
+
+    @staticmethod
+    async def test_fetch_in_wallet_transactions_return_exceptions(
+        monkeypatch, bitcoin_core
+    ):
+        async def mock_call(_, payload):
+            responses = []
+            for entry in payload:
+                if entry["method"] == "getblockcount":
+                    response = {"result": 100, "error": None}
+                elif entry["params"] == ["unknown"]:
+                    response = {
+                        "result": None,
+                        "error": {
+                            "code": -5,
+                            "message": "Invalid or non-wallet transaction id",
+                        },
+                    }
+                else:
+                    response = {
+                        "result": {
+                            "confirmations": 1,
+                            "txid": entry["params"][0],
+                            "time": 1592413084,
+                            "details": [
+                                {
+                                    "address": "b",
+                                    "category": "receive",
+                                    "amount": Decimal("0.1"),
+                                }
+                            ],
+                        },
+                        "error": None,
+                    }
+                responses.append({**response, "id": entry["id"]})
+            return responses
+
+        monkeypatch.setattr(connectors.BitcoinCoreConnector, "call", mock_call)
+        txids = ["a", "unknown"]
+        with pytest.raises(exceptions.NodeError):
+            await bitcoin_core.fetch_in_wallet_transactions(txids)
+        tx, error = await bitcoin_core.fetch_in_wallet_transactions(
+            txids, return_exceptions=True
+        )
+        assert tx["block_number"] == 100
+        assert isinstance(error, exceptions.NodeError)
+
 
 @pytest.mark.integration
 class TestBitcoinCoreConnectorIntegration:
@@ -128,7 +677,7 @@ class TestBitcoinCoreConnectorIntegration:
         assert "result" in result
 
     @staticmethod
-    async def test_call_via_getattribute(bitcoin_core):
+    async def test_call_via_rpc_method(bitcoin_core):
         response = await bitcoin_core.rpc_list_transactions("*", 1000)
         assert isinstance(response, list)
 
@@ -171,7 +720,7 @@ class TestBitcoinCoreConnectorIntegration:
             amount=0.00001,
             to_address=os.environ.get("BITCOIN_CORE_IN_WALLET_ADDRESS"),
         )
-        assert isinstance(fee, dict)
+        assert isinstance(fee, Mapping)
 
     @staticmethod
     async def test_send_transaction_on_outside_wallet(bitcoin_core):
@@ -179,7 +728,7 @@ class TestBitcoinCoreConnectorIntegration:
             amount=0.00001,
             to_address=os.environ.get("BITCOIN_CORE_OUT_WALLET_ADDRESS"),
         )
-        assert isinstance(fee, dict)
+        assert isinstance(fee, Mapping)
 
     @staticmethod
     async def test_fetch_recent_transactions(bitcoin_core):
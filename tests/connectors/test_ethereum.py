@@ -11,13 +11,485 @@
 # WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
 # See the License for the specific language governing permissions and
 # limitations under the License.
+import asyncio
 import os
 from decimal import Decimal
 
 import pytest
 
+from obm import caches, exceptions, indexes
 from obm.connectors import ethereum
 
+IN_WALLET_ADDRESS = "0xe1082e71f1ced0efb0952edd23595e4f76840128"
+OUT_WALLET_ADDRESS = "0x81b7e08f65bdf5648606c89998a9cc8164397647"
+NEW_ADDRESS = "0x0a1b2c3d4e5f60718293a4b5c6d7e8f901234567"
+
+
+def make_tx(
+    txid, from_address=IN_WALLET_ADDRESS, to_address=OUT_WALLET_ADDRESS
+):
+    return {
+        "hash": txid,
+        "from": from_address,
+        "to": to_address,
+        "value": "0xde0b6b3a7640000",
+        "gas": "0x5208",
+        "gasPrice": "0x3b9aca00",
+        "blockNumber": "0x64",
+    }
+
+
+def make_block(number, txs, fork="", parent_fork=None):
+    # Blocks of the same fork are chained by hashes.
+    parent = ethereum.to_hex(max(ethereum.to_int(number) - 1, 0))
+    if parent_fork is None:
+        parent_fork = fork
+    return {
+        "number": number,
+        "hash": f"hash{fork}-{number}",
+        "parentHash": f"hash{parent_fork}-{parent}",
+        "transactions": txs,
+    }
+
+
+class TestWeiConversion:
+    @staticmethod
+    @pytest.mark.parametrize(
+        "ether, wei",
+        (
+            (10, 10 * 10 ** 18),
+            (0.00001, 10 ** 13),
+            (0.1, 10 ** 17),
+            ("1.5", 15 * 10 ** 17),
+            (Decimal("0.000021"), 21 * 10 ** 12),
+        ),
+    )
+    def test_to_wei(ether, wei):
+        assert ethereum.to_wei(ether) == wei
+
+    @staticmethod
+    @pytest.mark.parametrize(
+        "wei, ether",
+        (
+            (0, 0),
+            (1, Decimal("1E-18")),
+            (21 * 10 ** 12, Decimal("0.000021")),
+            (123456789012345678901, Decimal("123.456789012345678901")),
+        ),
+    )
+    def test_from_wei(wei, ether):
+        result = ethereum.from_wei(wei)
+        assert result == ether
+        assert str(result) == str(ether)
+
+    @staticmethod
+    @pytest.mark.parametrize(
+        "func, value, error",
+        (
+            (ethereum.to_wei, -1, ValueError),
+            (ethereum.to_wei, None, TypeError),
+            (ethereum.from_wei, 2 ** 256, ValueError),
+            (ethereum.to_hex, "0x1", TypeError),
+        ),
+    )
+    def test_validation(func, value, error):
+        with pytest.raises(error):
+            func(value)
+
+
+class TestGethConnector:
+    @staticmethod
+    async def test_fetch_in_wallet_transactions_in_one_request(
+        monkeypatch, geth
+    ):
+        payloads = []
+
+        def respond(entry):
+            if entry["method"] == "personal_listAccounts":
+                result = [IN_WALLET_ADDRESS.upper()]
+            else:
+                result = make_tx(entry["params"][0])
+            return {"jsonrpc": "2.0", "result": result, "id": entry["id"]}
+
+        async def mock_call(_, payload):
+            payloads.append(payload)
+            if isinstance(payload, list):
+                return [respond(entry) for entry in payload]
+            return respond(payload)
+
+        monkeypatch.setattr(ethereum.GethConnector, "call", mock_call)
+        for _ in range(2):
+            txs = await geth.fetch_in_wallet_transactions(["0x1", "0x2"])
+            assert [tx["txid"] for tx in txs] == ["0x1", "0x2"]
+            assert {tx["category"] for tx in txs} == {"send"}
+            assert {tx["block_number"] for tx in txs} == {100}
+        # Addresses are fetched once and cached.
+        assert len(payloads) == 3
+        assert [
+            payload["method"]
+            for payload in payloads
+            if isinstance(payload, dict)
+        ] == ["personal_listAccounts"]
+
+    @staticmethod
+    async def test_fetch_in_wallet_transactions_return_exceptions(
+        monkeypatch, geth
+    ):
+        def respond(entry):
+            if entry["method"] == "personal_listAccounts":
+                result = [IN_WALLET_ADDRESS]
+            elif entry["params"] == ["0x2"]:
+                # Unknown transaction.
+                result = None
+            else:
+                result = make_tx(entry["params"][0])
+            return {"jsonrpc": "2.0", "result": result, "id": entry["id"]}
+
+        async def mock_call(_, payload):
+            if isinstance(payload, list):
+                return [respond(entry) for entry in payload]
+            return respond(payload)
+
+        monkeypatch.setattr(ethereum.GethConnector, "call", mock_call)
+        with pytest.raises(exceptions.NodeError):
+            await geth.fetch_in_wallet_transactions(["0x1", "0x2"])
+        tx, error = await geth.fetch_in_wallet_transactions(
+            ["0x1", "0x2"], return_exceptions=True
+        )
+        assert tx["txid"] == "0x1"
+        assert isinstance(error, exceptions.NodeError)
+
+    @staticmethod
+    async def test_addresses_registry(monkeypatch, geth):
+        calls = 0
+
+        async def mock_call(_, payload):
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.001)
+            if payload["method"] == "personal_newAccount":
+                result = OUT_WALLET_ADDRESS
+            else:
+                result = [IN_WALLET_ADDRESS]
+            return {"jsonrpc": "2.0", "result": result, "id": payload["id"]}
+
+        monkeypatch.setattr(ethereum.GethConnector, "call", mock_call)
+        registries = await asyncio.gather(
+            *[geth.get_addresses() for _ in range(10)]
+        )
+        assert calls == 1
+        assert all(registry is geth.addresses for registry in registries)
+        assert IN_WALLET_ADDRESS.upper() in geth.addresses
+        assert None not in geth.addresses
+        await geth.create_address()
+        assert OUT_WALLET_ADDRESS in geth.addresses
+        geth.addresses.invalidate()
+        await geth.get_addresses()
+        assert calls == 3
+        assert OUT_WALLET_ADDRESS not in geth.addresses
+
+    @staticmethod
+    async def test_iter_blocks_keeps_window_and_order(monkeypatch, geth):
+        in_flight = 0
+        max_in_flight = 0
+
+        async def mock_call(_, payload):
+            nonlocal in_flight, max_in_flight
+            in_flight += 1
+            max_in_flight = max(max_in_flight, in_flight)
+            number = ethereum.to_int(payload["params"][0])
+            # Make later blocks respond earlier.
+            await asyncio.sleep(0.001 * (5 - number % 5))
+            in_flight -= 1
+            return {
+                "jsonrpc": "2.0",
+                "result": {"number": payload["params"][0]},
+                "id": payload["id"],
+            }
+
+        monkeypatch.setattr(ethereum.GethConnector, "call", mock_call)
+        numbers = []
+        async for block in geth.iter_blocks(10, 40, window=5):
+            assert in_flight <= 5
+            numbers.append(ethereum.to_int(block["number"]))
+        assert numbers == list(range(10, 40))
+        assert max_in_flight == 5
+
+    @staticmethod
+    async def test_iter_recent_transactions_scans_lazily(monkeypatch, geth):
+        requested = []
+
+        async def mock_call(_, payload):
+            if payload["method"] == "personal_listAccounts":
+                result = [IN_WALLET_ADDRESS]
+            elif payload["method"] == "eth_blockNumber":
+                result = ethereum.to_hex(100)
+            else:
+                number = payload["params"][0]
+                requested.append(ethereum.to_int(number))
+                tx = make_tx(f"tx-{ethereum.to_int(number)}")
+                result = {"number": number, "transactions": [tx]}
+            return {"jsonrpc": "2.0", "result": result, "id": payload["id"]}
+
+        monkeypatch.setattr(ethereum.GethConnector, "call", mock_call)
+        txs = geth.iter_recent_transactions(chunk_size=5)
+        txids = [(await txs.__anext__())["txid"] for _ in range(3)]
+        await txs.aclose()
+        assert txids == ["tx-100", "tx-99", "tx-98"]
+        # Only the consumed blocks and the window ahead are requested.
+        assert set(requested) <= set(range(93, 101))
+
+        requested.clear()
+        txs = [tx async for tx in geth.iter_recent_transactions(min_block=95)]
+        assert len(txs) == 6
+        assert min(requested) == 95
+
+    @staticmethod
+    async def test_fetch_recent_transactions_without_duplicates(
+        monkeypatch, geth
+    ):
+        requested = []
+
+        async def mock_call(_, payload):
+            if payload["method"] == "personal_listAccounts":
+                result = [IN_WALLET_ADDRESS]
+            elif payload["method"] == "eth_blockNumber":
+                result = ethereum.to_hex(100)
+            else:
+                number = payload["params"][0]
+                requested.append(ethereum.to_int(number))
+                tx = make_tx(f"tx-{ethereum.to_int(number)}")
+                result = {"number": number, "transactions": [tx]}
+            return {"jsonrpc": "2.0", "result": result, "id": payload["id"]}
+
+        monkeypatch.setattr(ethereum.GethConnector, "call", mock_call)
+        txs = await geth.fetch_recent_transactions(limit=12, batch_size=5)
+        assert [tx["txid"] for tx in txs] == [
+            f"tx-{number}" for number in range(100, 88, -1)
+        ]
+        # Each block is requested once.
+        assert len(requested) == len(set(requested))
+
+    @staticmethod
+    async def test_iter_blocks_caches_only_final_blocks(monkeypatch, geth):
+        requested = []
+
+        async def mock_call(_, payload):
+            if payload["method"] == "eth_blockNumber":
+                return {"jsonrpc": "2.0", "result": "0x64", "id": payload["id"]}
+            number = payload["params"][0]
+            requested.append(ethereum.to_int(number))
+            return {
+                "jsonrpc": "2.0",
+                "result": {"number": number, "hash": f"hash-{number}"},
+                "id": payload["id"],
+            }
+
+        monkeypatch.setattr(ethereum.GethConnector, "call", mock_call)
+        geth.cache = caches.LRUCache()
+        geth.finality_depth = 10
+        for _ in range(2):
+            blocks = [block async for block in geth.iter_blocks(80, 101)]
+            assert len(blocks) == 21
+        # Blocks from 91 to 100 aren't final so they are fetched twice.
+        assert sorted(requested) == sorted(
+            list(range(80, 101)) + list(range(91, 101))
+        )
+        assert geth.cache.stats()["hits"] == 11
+        block = await geth.get_block(f"hash-{ethereum.to_hex(85)}")
+        assert ethereum.to_int(block["number"]) == 85
+
+    @staticmethod
+    async def test_index_scans_each_final_block_once(
+        monkeypatch, geth, tmp_path
+    ):
+        latest_block_number = 100
+        requested = []
+
+        async def mock_call(_, payload):
+            if payload["method"] == "personal_listAccounts":
+                result = [IN_WALLET_ADDRESS]
+            elif payload["method"] == "eth_blockNumber":
+                result = ethereum.to_hex(latest_block_number)
+            else:
+                number = payload["params"][0]
+                requested.append(ethereum.to_int(number))
+                txs = []
+                if ethereum.to_int(number) % 10 == 0:
+                    tx = make_tx(f"tx-{number}")
+                    tx["blockNumber"] = number
+                    txs.append(tx)
+                result = make_block(number, txs)
+            return {"jsonrpc": "2.0", "result": result, "id": payload["id"]}
+
+        monkeypatch.setattr(ethereum.GethConnector, "call", mock_call)
+        path = str(tmp_path / "index.jsonl")
+        geth.index = indexes.WalletIndex(start_block=50, path=path)
+        geth.finality_depth = 10
+        txs = await geth.fetch_recent_transactions(limit=3)
+        assert [tx["block_number"] for tx in txs] == [100, 90, 80]
+        assert sorted(requested) == list(range(50, 101))
+        assert geth.index.checkpoint == 90
+
+        requested.clear()
+        latest_block_number = 110
+        geth.head_tracker.invalidate()
+        txs = await geth.fetch_recent_transactions(limit=100)
+        assert [tx["block_number"] for tx in txs] == list(range(110, 49, -10))
+        # Kept blocks from 91 to 100 are checked by the hash of the latest.
+        assert sorted(requested) == list(range(100, 111))
+        txs = [
+            tx async for tx in geth.iter_recent_transactions(min_block=85)
+        ]
+        assert [tx["block_number"] for tx in txs] == [110, 100, 90]
+
+        restored = indexes.WalletIndex(path=path)
+        assert restored.checkpoint == 100
+        assert len(restored) == 6
+        assert restored.next_block() == 101
+
+    @staticmethod
+    async def test_index_keeps_unfinal_blocks(monkeypatch, geth):
+        latest_block_number = 100
+        fork = ""
+        requested = []
+
+        async def mock_call(_, payload):
+            if payload["method"] == "personal_listAccounts":
+                result = [IN_WALLET_ADDRESS]
+            elif payload["method"] == "eth_blockNumber":
+                result = ethereum.to_hex(latest_block_number)
+            else:
+                number, full_transactions = payload["params"]
+                requested.append((ethereum.to_int(number), full_transactions))
+                tx = make_tx(f"tx{fork}-{number}")
+                tx["blockNumber"] = number
+                # Fork replaces blocks since 98.
+                number_int = ethereum.to_int(number)
+                result = make_block(
+                    number,
+                    [tx],
+                    fork if number_int >= 98 else "",
+                    fork if number_int >= 99 else "",
+                )
+            return {"jsonrpc": "2.0", "result": result, "id": payload["id"]}
+
+        monkeypatch.setattr(ethereum.GethConnector, "call", mock_call)
+        geth.head_tracker.ttl = 0
+        geth.index = indexes.WalletIndex(start_block=90)
+        geth.finality_depth = 10
+        for _ in range(3):
+            await geth.update_index()
+        # Polls at the same head only check the hash of the head.
+        assert requested == [(n, True) for n in range(90, 101)] + [
+            (100, False)
+        ] * 2
+
+        requested.clear()
+        latest_block_number = 101
+        await geth.update_index()
+        assert requested == [(100, False), (101, True)]
+        assert geth.index.checkpoint == 91
+
+        requested.clear()
+        fork = "-fork"
+        await geth.update_index()
+        # Reorganized blocks are fetched again.
+        assert requested == [(101, False)] + [
+            (n, True) for n in range(92, 102)
+        ]
+        txids = [tx["hash"] for tx in geth.index.history()]
+        assert txids[:5] == [
+            "tx-fork-0x65",
+            "tx-fork-0x64",
+            "tx-fork-0x63",
+            "tx-fork-0x62",
+            "tx-fork-0x61",
+        ]
+        assert len(txids) == 12
+
+    @staticmethod
+    async def test_unknown_address_refreshes_registry(monkeypatch, geth):
+        accounts = [IN_WALLET_ADDRESS]
+        listed = 0
+
+        async def mock_call(_, payload):
+            nonlocal listed
+            if payload["method"] == "personal_listAccounts":
+                listed += 1
+                result = list(accounts)
+            else:
+                result = make_tx("0x1", OUT_WALLET_ADDRESS, NEW_ADDRESS)
+            return {"jsonrpc": "2.0", "result": result, "id": payload["id"]}
+
+        monkeypatch.setattr(ethereum.GethConnector, "call", mock_call)
+        await geth.get_addresses()
+        # Account is created by another process within the TTL.
+        accounts.append(NEW_ADDRESS)
+        tx = await geth.fetch_in_wallet_transaction("0x1")
+        assert tx["category"] == "receive"
+        assert listed == 2
+
+        accounts.remove(NEW_ADDRESS)
+        geth.addresses.invalidate()
+        with pytest.raises(RuntimeError):
+            await geth.fetch_in_wallet_transaction("0x1")
+        # Addresses are refetched only once before raising.
+        assert listed == 4
+
+    @staticmethod
+    async def test_index_rescans_for_new_addresses(monkeypatch, geth):
+        accounts = [IN_WALLET_ADDRESS]
+
+        async def mock_call(_, payload):
+            if payload["method"] == "personal_listAccounts":
+                result = list(accounts)
+            elif payload["method"] == "eth_blockNumber":
+                result = ethereum.to_hex(100)
+            else:
+                number = payload["params"][0]
+                if ethereum.to_int(number) == 60:
+                    # Account appears while blocks are being scanned.
+                    accounts.append(NEW_ADDRESS)
+                tx = make_tx(f"tx-{number}", OUT_WALLET_ADDRESS, NEW_ADDRESS)
+                tx["blockNumber"] = number
+                txs = [tx] if ethereum.to_int(number) == 55 else []
+                result = make_block(number, txs)
+            return {"jsonrpc": "2.0", "result": result, "id": payload["id"]}
+
+        monkeypatch.setattr(ethereum.GethConnector, "call", mock_call)
+        geth.index = indexes.WalletIndex(start_block=50)
+        geth.finality_depth = 10
+        await geth.update_index()
+        assert geth.index.checkpoint == 90
+        assert [tx["hash"] for tx in geth.index.final_transactions] == [
+            "tx-0x37"
+        ]
+
+    @staticmethod
+    async def test_latest_block_number_is_cached_and_shared(monkeypatch, geth):
+        payloads = []
+
+        async def mock_call(_, payload):
+            payloads.append(payload)
+            await asyncio.sleep(0.001)
+            return {"jsonrpc": "2.0", "result": "0x64", "id": payload["id"]}
+
+        monkeypatch.setattr(ethereum.GethConnector, "call", mock_call)
+        assert geth.head is None
+        numbers = await asyncio.gather(
+            *[geth.latest_block_number for _ in range(10)]
+        )
+        assert numbers == [100] * 10
+        assert await geth.latest_block_number == 100
+        assert geth.head == 100
+        assert [payload["method"] for payload in payloads] == [
+            "eth_blockNumber"
+        ]
+        geth.head_tracker.invalidate()
+        assert await geth.latest_block_number == 100
+        assert len(payloads) == 2
+
 
 @pytest.mark.integration
 class TestGethConnectorIntegration:
@@ -44,14 +516,14 @@ class TestGethConnectorIntegration:
         assert "result" in response
 
     @staticmethod
-    async def test_call_via_getattribute(geth):
+    async def test_call_via_rpc_method(geth):
         result = await geth.rpc_personal_new_account("superstrong")
         assert isinstance(result, str)
 
     async def test_fetch_blocks_range(self, geth):
         latest = await geth.latest_block_number
         blocks_range = await geth.fetch_blocks_range(
-            start=latest - 50, end=latest, bunch_size=5, delay=0.1
+            start=latest - 50, end=latest, window=5
         )
         numbers = [int(block["number"], 16) for block in blocks_range]
         assert latest not in numbers
@@ -61,7 +533,7 @@ class TestGethConnectorIntegration:
     async def test_fetch_blocks_range_with_default_end(self, geth):
         latest = await geth.latest_block_number
         blocks_range = await geth.fetch_blocks_range(
-            start=latest - 100, bunch_size=10, delay=0.1
+            start=latest - 100, window=10
         )
         numbers = [int(block["number"], 16) for block in blocks_range]
         assert latest in numbers
@@ -71,7 +543,7 @@ class TestGethConnectorIntegration:
     async def test_fetch_recent_blocks_range(self, geth):
         latest = await geth.latest_block_number
         blocks_range = await geth.fetch_recent_blocks_range(
-            length=100, bunch_size=10, delay=0.1
+            length=100, window=10
         )
         numbers = [int(block["number"], 16) for block in blocks_range]
         assert latest in numbers
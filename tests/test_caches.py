@@ -0,0 +1,106 @@
+# Copyright 2020 Alexander Polishchuk
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+from decimal import Decimal
+
+import pytest
+
+from obm import caches
+
+
+class TestLRUCache:
+    @staticmethod
+    @pytest.mark.parametrize(
+        "kwargs",
+        (
+            {"max_items": None, "max_bytes": None},
+            {"max_items": 0},
+            {"max_bytes": -1},
+        ),
+    )
+    def test_init_validation(kwargs):
+        with pytest.raises(ValueError):
+            caches.LRUCache(**kwargs)
+
+    @staticmethod
+    def test_evicts_least_recently_used_by_count():
+        cache = caches.LRUCache(max_items=2)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        assert cache.get("a") == 1
+        cache.set("c", 3)
+        assert "b" not in cache
+        assert cache.get("a") == 1
+        assert cache.get("c") == 3
+        assert cache.get("b") is None
+        assert cache.stats() == {
+            "hits": 3,
+            "misses": 1,
+            "evictions": 1,
+            "items": 2,
+            "bytes": 0,
+        }
+
+    @staticmethod
+    def test_evicts_by_size():
+        cache = caches.LRUCache(max_items=None, max_bytes=10, sizeof=len)
+        cache.set("a", "x" * 4)
+        cache.set("b", "x" * 4)
+        cache.set("c", "x" * 4)
+        assert len(cache) == 2
+        assert cache.size == 8
+        cache.set("d", "x" * 11)
+        assert "d" not in cache
+        cache.set("c", "x" * 2)
+        assert cache.size == 6
+
+
+class TestSQLiteCache:
+    @staticmethod
+    def test_persists_between_instances(tmp_path):
+        path = str(tmp_path / "cache.sqlite")
+        cache = caches.SQLiteCache(path)
+        cache.set("tx", {"amount": Decimal("0.00015000")})
+        cache.close()
+
+        cache = caches.SQLiteCache(path)
+        assert len(cache) == 1
+        assert cache.get("tx") == {"amount": Decimal("0.00015000")}
+        assert cache.get("unknown") is None
+        assert cache.stats()["hits"] == 1
+        assert cache.stats()["misses"] == 1
+
+    @staticmethod
+    def test_evicts_least_recently_used(tmp_path):
+        path = str(tmp_path / "cache.sqlite")
+        cache = caches.SQLiteCache(path, max_items=2)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")
+        cache.set("c", 3)
+        assert "a" in cache
+        assert "b" not in cache
+        assert "c" in cache
+        assert cache.evictions == 1
+
+    @staticmethod
+    def test_evicts_by_size(tmp_path):
+        path = str(tmp_path / "cache.sqlite")
+        cache = caches.SQLiteCache(path, max_bytes=100)
+        cache.set("big", "x" * 200)
+        assert "big" not in cache
+        for key in "abcdef":
+            cache.set(key, "x" * 20)
+        assert cache.size <= 100
+        assert "f" in cache
+        assert "a" not in cache
@@ -0,0 +1,92 @@
+# Copyright 2020 Alexander Polishchuk
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import json
+from decimal import Decimal
+
+import pytest
+
+from obm import codecs
+
+CODECS = [codecs.STDLIB]
+if codecs.orjson is not None:
+    CODECS.append(codecs.ORJSON)
+
+
+@pytest.fixture(params=CODECS)
+def codec(request):
+    return codecs.create(request.param)
+
+
+class TestCodec:
+    @staticmethod
+    @pytest.mark.parametrize(
+        "message, expect",
+        (
+            (
+                b'{"result":{"amount":-0.00000866,"fee":1e-05},"id":1}',
+                {"result": {"amount": Decimal("-0.00000866"), "fee": Decimal("1e-05")}},
+            ),
+            (
+                b'[{"result":[20999999.99999999],"id":1}]',
+                [{"result": [Decimal("20999999.99999999")]}],
+            ),
+            (
+                b'{"result":{"number":"0x1b4","v":"1.0"},"id":1}',
+                {"result": {"number": "0x1b4", "v": "1.0"}},
+            ),
+            (
+                b'{"result":123456789012345678901234567890,"id":1}',
+                {"result": 123456789012345678901234567890},
+            ),
+            (
+                b'{"result":[-18446744073709551616,1],"id":1}',
+                {"result": [-18446744073709551616, 1]},
+            ),
+        ),
+        ids=(
+            "fractions",
+            "big amount",
+            "no fractions",
+            "big integer",
+            "negative big integer",
+        ),
+    )
+    def test_loads_keeps_decimal_precision(codec, message, expect):
+        result = codec.loads(message)
+        if isinstance(result, list):
+            assert result[0]["result"] == expect[0]["result"]
+        else:
+            assert result["result"] == expect["result"]
+        assert codec.loads(message.decode()) == result
+
+    @staticmethod
+    def test_dumps_encodes_decimal_as_string(codec):
+        payload = {"params": [Decimal("0.00000866"), 1, "a"], "id": 1}
+        assert json.loads(codec.dumps(payload)) == {
+            "params": ["0.00000866", 1, "a"],
+            "id": 1,
+        }
+
+    @staticmethod
+    def test_dumps_unsupported_type(codec):
+        with pytest.raises(TypeError):
+            codec.dumps({"params": [object()]})
+
+    @staticmethod
+    def test_create_unsupported_codec():
+        with pytest.raises(ValueError) as exc_info:
+            codecs.create("pickle")
+        assert exc_info.value.args[0] == (
+            "Unsupported codec. Available only: ['json', 'orjson']"
+        )
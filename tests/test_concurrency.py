@@ -0,0 +1,89 @@
+# Copyright 2020 Alexander Polishchuk
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import asyncio
+
+import pytest
+
+from obm import concurrency
+
+
+class TestAdaptiveConcurrency:
+    @staticmethod
+    @pytest.mark.parametrize(
+        "kwargs",
+        (
+            {"initial_limit": 0},
+            {"min_limit": 20, "initial_limit": 10},
+            {"max_limit": 5},
+            {"backoff_ratio": 1},
+            {"latency_target": 0},
+            {"latency_tolerance": 1},
+        ),
+    )
+    def test_init_validation(kwargs):
+        with pytest.raises(ValueError):
+            concurrency.AdaptiveConcurrency(**kwargs)
+
+    @staticmethod
+    async def test_grows_while_node_is_fast():
+        controller = concurrency.AdaptiveConcurrency(
+            initial_limit=2, latency_target=1
+        )
+        for _ in range(20):
+            async with controller.track():
+                pass
+        assert controller.limit > 2
+        assert controller.successes == 20
+
+    @staticmethod
+    async def test_shrinks_once_per_congestion():
+        controller = concurrency.AdaptiveConcurrency(initial_limit=16)
+
+        async def fail():
+            async with controller.track():
+                await asyncio.sleep(0.01)
+                raise RuntimeError
+
+        await asyncio.gather(
+            *[fail() for _ in range(8)], return_exceptions=True
+        )
+        assert controller.errors == 8
+        assert controller.congestions == 1
+        assert controller.limit == 8
+
+    @staticmethod
+    async def test_shrinks_on_slow_responses():
+        controller = concurrency.AdaptiveConcurrency(
+            initial_limit=16, latency_target=0.001
+        )
+        async with controller.track():
+            await asyncio.sleep(0.01)
+        assert controller.limit == 8
+
+    @staticmethod
+    async def test_limits_in_flight_requests():
+        controller = concurrency.AdaptiveConcurrency(
+            initial_limit=3, max_limit=3
+        )
+        max_in_flight = 0
+
+        async def request():
+            nonlocal max_in_flight
+            async with controller.track():
+                max_in_flight = max(max_in_flight, controller.in_flight)
+                await asyncio.sleep(0.001)
+
+        await asyncio.gather(*[request() for _ in range(20)])
+        assert max_in_flight == 3
+        assert controller.in_flight == 0
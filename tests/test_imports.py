@@ -0,0 +1,55 @@
+# Copyright 2020 Alexander Polishchuk
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import subprocess
+import sys
+
+
+def import_times(statement):
+    """Imports in a clean interpreter and returns cumulative import times
+    in microseconds by module.
+    """
+    process = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", statement],
+        capture_output=True,
+        check=True,
+        text=True,
+    )
+    times = {}
+    for line in process.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, module = line.split("|")
+        times[module.strip()] = int(cumulative)
+    return times
+
+
+class TestImport:
+    @staticmethod
+    def test_models_import_is_lazy():
+        times = import_times("import obm.models")
+        assert "web3" not in times
+        assert "obm.connectors.ethereum" not in times
+        assert "obm.connectors.bitcoin" not in times
+
+    @staticmethod
+    def test_connectors_are_loaded_on_access():
+        statement = (
+            "import sys\n"
+            "from obm import connectors\n"
+            "assert connectors.MAPPING['geth'].node == 'geth'\n"
+            "assert 'obm.connectors.ethereum' in sys.modules\n"
+            "assert 'obm.connectors.bitcoin' not in sys.modules\n"
+            "assert 'web3' not in sys.modules\n"
+        )
+        subprocess.run([sys.executable, "-c", statement], check=True)
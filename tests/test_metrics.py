@@ -0,0 +1,168 @@
+# Copyright 2020 Alexander Polishchuk
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import math
+
+import pytest
+
+from obm import connectors, exceptions, metrics
+
+
+def mock_exchange(monkeypatch, fail=False):
+    async def exchange(_, payload):
+        if fail:
+            raise exceptions.NetworkTimeoutError("Timeout")
+        if isinstance(payload, list):
+            response = [
+                {"result": None, "error": {"code": -5}, "id": item["id"]}
+                if item["method"] == "gettransaction"
+                else {"result": 100, "error": None, "id": item["id"]}
+                for item in payload
+            ]
+        else:
+            response = {"result": 100, "error": None, "id": payload["id"]}
+        return response, 10, 20
+
+    monkeypatch.setattr(
+        connectors.BitcoinCoreConnector, "_exchange", exchange
+    )
+
+
+def by_method(registry):
+    return {entry["method"]: entry for entry in registry.snapshot()}
+
+
+class TestRegistry:
+    @staticmethod
+    def test_snapshot():
+        registry = metrics.Registry(buckets=[0.1, 1])
+        registry.record_request("geth", "localhost:8545", "eth_call", 0.05)
+        registry.record_request(
+            "geth", "localhost:8545", "eth_call", 0.5, 10, 20
+        )
+        registry.record_request("geth", "localhost:8545", "eth_call", 5)
+        registry.record_call("geth", "localhost:8545", "eth_call")
+        registry.record_call(
+            "geth", "localhost:8545", "eth_call", "NodeError"
+        )
+        assert registry.snapshot() == [
+            {
+                "node": "geth",
+                "instance": "localhost:8545",
+                "method": "eth_call",
+                "calls": 2,
+                "requests": 3,
+                "bytes_sent": 10,
+                "bytes_received": 20,
+                "errors": {"NodeError": 1},
+                "latency": {
+                    "count": 3,
+                    "sum": 5.55,
+                    "buckets": {0.1: 1, 1: 2, math.inf: 3},
+                },
+            }
+        ]
+        registry.reset()
+        assert registry.snapshot() == []
+
+    @staticmethod
+    def test_render_prometheus():
+        registry = metrics.Registry(buckets=[0.1])
+        registry.record_request("geth", 'local"host', "eth_call", 0.5, 1, 2)
+        registry.record_call("geth", 'local"host', "eth_call", "NodeError")
+        labels = 'node="geth",instance="local\\"host",method="eth_call"'
+        assert registry.render_prometheus().splitlines() == [
+            "# HELP obm_rpc_calls_total RPC method calls.",
+            "# TYPE obm_rpc_calls_total counter",
+            f"obm_rpc_calls_total{{{labels}}} 1",
+            "# HELP obm_rpc_requests_total Requests sent to nodes.",
+            "# TYPE obm_rpc_requests_total counter",
+            f"obm_rpc_requests_total{{{labels}}} 1",
+            "# HELP obm_rpc_bytes_sent_total Bytes sent to nodes.",
+            "# TYPE obm_rpc_bytes_sent_total counter",
+            f"obm_rpc_bytes_sent_total{{{labels}}} 1",
+            "# HELP obm_rpc_bytes_received_total Bytes received from nodes.",
+            "# TYPE obm_rpc_bytes_received_total counter",
+            f"obm_rpc_bytes_received_total{{{labels}}} 2",
+            "# HELP obm_rpc_errors_total Failed RPC method calls by error.",
+            "# TYPE obm_rpc_errors_total counter",
+            f'obm_rpc_errors_total{{{labels},error="NodeError"}} 1',
+            "# HELP obm_rpc_request_duration_seconds Request durations.",
+            "# TYPE obm_rpc_request_duration_seconds histogram",
+            f'obm_rpc_request_duration_seconds_bucket{{{labels},le="0.1"}} 0',
+            f'obm_rpc_request_duration_seconds_bucket{{{labels},le="+Inf"}} 1',
+            f"obm_rpc_request_duration_seconds_sum{{{labels}}} 0.5",
+            f"obm_rpc_request_duration_seconds_count{{{labels}}} 1",
+        ]
+        assert metrics.Registry().render_prometheus() == ""
+
+    @staticmethod
+    def test_buckets_validation():
+        with pytest.raises(ValueError):
+            metrics.Registry(buckets=[1, 0.1])
+
+
+class TestConnectorMetrics:
+    @staticmethod
+    async def test_call(monkeypatch, loop):
+        mock_exchange(monkeypatch)
+        registry = metrics.Registry()
+        connector = connectors.BitcoinCoreConnector(
+            loop=loop, metrics_registry=registry
+        )
+        assert await connector.rpc_get_block_count() == 100
+        entry = by_method(registry)["getblockcount"]
+        assert entry["node"] == "bitcoin-core"
+        assert entry["instance"] == "localhost:18332"
+        assert entry["calls"] == 1
+        assert entry["requests"] == 1
+        assert entry["bytes_sent"] == 10
+        assert entry["bytes_received"] == 20
+        assert entry["errors"] == {}
+        assert entry["latency"]["count"] == 1
+
+    @staticmethod
+    async def test_batch(monkeypatch, loop):
+        mock_exchange(monkeypatch)
+        registry = metrics.Registry()
+        connector = connectors.BitcoinCoreConnector(
+            loop=loop, metrics_registry=registry
+        )
+        await connector.call_batch(
+            [("rpc_get_block_count", []), ("rpc_get_transaction", ["a"])],
+            return_exceptions=True,
+        )
+        entries = by_method(registry)
+        assert entries["batch"]["requests"] == 1
+        assert entries["batch"]["calls"] == 0
+        assert entries["getblockcount"]["calls"] == 1
+        assert entries["getblockcount"]["requests"] == 0
+        assert entries["gettransaction"]["errors"] == {"NodeError": 1}
+
+    @staticmethod
+    async def test_network_error(monkeypatch, loop):
+        mock_exchange(monkeypatch, fail=True)
+        registry = metrics.Registry()
+        connector = connectors.BitcoinCoreConnector(
+            loop=loop, metrics_registry=registry
+        )
+        with pytest.raises(exceptions.NetworkTimeoutError):
+            await connector.rpc_get_block_count()
+        entry = by_method(registry)["getblockcount"]
+        assert entry["requests"] == 1
+        assert entry["errors"] == {"NetworkTimeoutError": 1}
+
+    @staticmethod
+    def test_global_registry_by_default(loop):
+        connector = connectors.BitcoinCoreConnector(loop=loop)
+        assert connector.metrics_registry is metrics.REGISTRY
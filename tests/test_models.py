@@ -11,7 +11,9 @@
 # WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
 # See the License for the specific language governing permissions and
 # limitations under the License.
+import asyncio
 import os
+from collections.abc import Mapping
 from decimal import Decimal
 
 import pytest
@@ -75,6 +77,59 @@ class TestNode:
                 ValueError,
                 "Timeout must be greater than zero",
             ),
+            (
+                {"cache": 111},
+                TypeError,
+                "Cache must be a obm.caches.Cache, not 'int'",
+            ),
+            (
+                {"finality_depth": -1},
+                ValueError,
+                "Finality depth must not be negative",
+            ),
+            (
+                {"transport": "pigeon"},
+                ValueError,
+                "Unsupported transport. Available only: "
+                "['http', 'ipc', 'websocket']",
+            ),
+            (
+                {"transport": 111},
+                TypeError,
+                "Transport must be a string or obm.transports.Transport, "
+                "not 'int'",
+            ),
+            (
+                {"codec": "pickle"},
+                ValueError,
+                "Unsupported codec. Available only: ['json', 'orjson']",
+            ),
+            (
+                {"codec": 111},
+                TypeError,
+                "Codec must be a string or obm.codecs.Codec, not 'int'",
+            ),
+            (
+                {"retry_policy": 111},
+                TypeError,
+                "Retry policy must be a obm.retries.RetryPolicy, not 'int'",
+            ),
+            (
+                {"circuit_breaker": 111},
+                TypeError,
+                "Circuit breaker must be a obm.retries.CircuitBreaker, "
+                "not 'int'",
+            ),
+            (
+                {"metrics_registry": 111},
+                TypeError,
+                "Metrics registry must be a obm.metrics.Registry, not 'int'",
+            ),
+            (
+                {"tracer": 111},
+                TypeError,
+                "Tracer must be a obm.tracing.Tracer, not 'int'",
+            ),
         ),
         ids=(
             "wrong host type",
@@ -82,6 +137,16 @@ class TestNode:
             "wrong session type",
             "wrong timeout type",
             "wrong timeout value",
+            "wrong cache type",
+            "wrong finality depth value",
+            "unsupported transport",
+            "wrong transport type",
+            "unsupported codec",
+            "wrong codec type",
+            "wrong retry policy type",
+            "wrong circuit breaker type",
+            "wrong metrics registry type",
+            "wrong tracer type",
         ),
     )
     def test_init_connector_validation(node_name, kwargs, error, error_msg):
@@ -139,6 +204,154 @@ class TestNode:
         assert node.connector.timeout == expect["timeout"]
 
 
+class TestNodePool:
+    @staticmethod
+    def make_pool(node_name, size=3, **kwargs):
+        nodes = [
+            models.Node(name=node_name, rpc_port=8000 + i) for i in range(size)
+        ]
+        return models.NodePool(nodes, **kwargs)
+
+    @staticmethod
+    def patch_heads(monkeypatch, heads):
+        async def fetch_latest_block_number(connector):
+            head = heads[connector.rpc_port]
+            if isinstance(head, Exception):
+                raise head
+            return head
+
+        monkeypatch.setattr(
+            connectors.base.Connector,
+            "latest_block_number",
+            property(fetch_latest_block_number),
+        )
+
+    @staticmethod
+    @pytest.mark.parametrize(
+        "args, kwargs, error, error_msg",
+        (
+            ((111,), {}, TypeError, "Nodes must be a list, not 'int'"),
+            (([],), {}, ValueError, "Nodes must not be empty"),
+            (
+                ([111],),
+                {},
+                TypeError,
+                "Node must be a obm.models.Node, not 'int'",
+            ),
+            (
+                (
+                    [
+                        models.Node(name="geth"),
+                        models.Node(name="bitcoin-core"),
+                    ],
+                ),
+                {},
+                ValueError,
+                "Nodes must be replicas of the same node",
+            ),
+            (
+                ([models.Node(name="geth")],),
+                {"primary": models.Node(name="geth")},
+                ValueError,
+                "Primary must be one of the nodes",
+            ),
+            (
+                ([models.Node(name="geth")],),
+                {"max_lag": -1},
+                ValueError,
+                "Max lag must not be negative",
+            ),
+        ),
+        ids=(
+            "wrong nodes type",
+            "empty nodes",
+            "wrong node type",
+            "different nodes",
+            "foreign primary",
+            "wrong max lag value",
+        ),
+    )
+    def test_init_validation(args, kwargs, error, error_msg):
+        with pytest.raises(error) as exc_info:
+            models.NodePool(*args, **kwargs)
+        assert exc_info.value.args[0] == error_msg
+
+    @staticmethod
+    async def test_check_health_ejects_lagging_and_failing_nodes(
+        monkeypatch, node_name
+    ):
+        pool = TestNodePool.make_pool(node_name, size=4, max_lag=2)
+        TestNodePool.patch_heads(
+            monkeypatch,
+            {
+                8000: 100,
+                8001: 98,
+                8002: 97,
+                8003: exceptions.NetworkError("Connection refused"),
+            },
+        )
+        await pool.check_health()
+        assert pool.healthy_nodes == pool.nodes[:2]
+        assert pool.states[pool.nodes[1]].head == 98
+        assert pool.states[pool.nodes[3]].head is None
+
+    @staticmethod
+    async def test_reads_are_spread_and_writes_go_to_primary(
+        monkeypatch, node_name
+    ):
+        pool = TestNodePool.make_pool(node_name, size=3)
+        used_ports = []
+
+        async def fetch_in_wallet_transaction(connector, txid):
+            used_ports.append(connector.rpc_port)
+            await asyncio.sleep(0.01)
+            return {"txid": txid}
+
+        async def create_address(connector, password=""):
+            used_ports.append(connector.rpc_port)
+            return "address"
+
+        monkeypatch.setattr(
+            connectors.MAPPING[node_name],
+            "fetch_in_wallet_transaction",
+            fetch_in_wallet_transaction,
+        )
+        monkeypatch.setattr(
+            connectors.MAPPING[node_name], "create_address", create_address,
+        )
+        txs = await asyncio.gather(
+            *[pool.fetch_in_wallet_transaction(str(i)) for i in range(3)]
+        )
+        assert [tx["txid"] for tx in txs] == ["0", "1", "2"]
+        assert sorted(used_ports) == [8000, 8001, 8002]
+
+        used_ports.clear()
+        await pool.create_address()
+        assert used_ports == [8000]
+
+    @staticmethod
+    async def test_read_retries_on_another_node(monkeypatch, node_name):
+        pool = TestNodePool.make_pool(node_name, size=2)
+        TestNodePool.patch_heads(
+            monkeypatch,
+            {8000: exceptions.NetworkError("Connection refused"), 8001: 10},
+        )
+        assert await pool.get_latest_block_number() == 10
+        assert pool.healthy_nodes == pool.nodes[1:]
+        # Node is brought back once it passes the health check.
+        TestNodePool.patch_heads(monkeypatch, {8000: 10, 8001: 10})
+        await pool.check_health()
+        assert pool.healthy_nodes == pool.nodes
+
+    @staticmethod
+    async def test_read_fails_when_all_nodes_fail(monkeypatch, node_name):
+        pool = TestNodePool.make_pool(node_name, size=2)
+        error = exceptions.NetworkError("Connection refused")
+        TestNodePool.patch_heads(monkeypatch, {8000: error, 8001: error})
+        with pytest.raises(exceptions.NetworkError):
+            await pool.get_latest_block_number()
+
+
 @pytest.mark.integration
 class TestNodeIntegration:
     @staticmethod
@@ -180,7 +393,7 @@ class TestNodeIntegration:
             },
         }
         tx = await node.send_transaction(**tx_data[node.name])
-        assert isinstance(tx, dict)
+        assert isinstance(tx, Mapping)
         assert tx["fee"] > Decimal("0")
         assert serializers.Transaction().validate(tx) == {}
 
@@ -201,7 +414,7 @@ class TestNodeIntegration:
             },
         }
         tx = await node.send_transaction(**tx_data[node.name])
-        assert isinstance(tx, dict)
+        assert isinstance(tx, Mapping)
         assert tx["fee"] > Decimal("0")
         assert serializers.Transaction().validate(tx) == {}
         assert tx_data[node.name]["amount"] - tx["fee"] == tx["amount"]
@@ -211,7 +424,7 @@ class TestNodeIntegration:
         tx = await node.fetch_in_wallet_transaction(
             txid=TXIDS_BY_CURRENCY[node.currency.name]
         )
-        assert isinstance(tx, dict)
+        assert isinstance(tx, Mapping)
         assert serializers.Transaction().validate(tx) == {}
 
     @staticmethod
@@ -224,6 +437,90 @@ class TestNodeIntegration:
         assert serializers.Transaction().validate(txs, many=True) == {}
 
 
+class TestTransaction:
+    @staticmethod
+    async def test_sync_many(monkeypatch, loop):
+        geth = models.Node(name="geth", loop=loop)
+        bitcoin_core = models.Node(name="bitcoin-core", loop=loop)
+        requested = []
+
+        async def fetch_in_wallet_transactions(
+            connector, txids, return_exceptions=False
+        ):
+            requested.append((connector.node, txids))
+            return [{"block_number": int(txid)} for txid in txids]
+
+        for connector in connectors.MAPPING.values():
+            monkeypatch.setattr(
+                connector,
+                "fetch_in_wallet_transactions",
+                fetch_in_wallet_transactions,
+            )
+        txs = [
+            models.Transaction(
+                node=node,
+                to_address="fake-addr",
+                amount=1,
+                txid=str(i),
+                block_number=block_number,
+            )
+            for i, (node, block_number) in enumerate(
+                [
+                    (geth, None),
+                    (bitcoin_core, None),
+                    (geth, 10),
+                    (geth, None),
+                ]
+            )
+        ]
+        assert await models.Transaction.sync_many(txs) is txs
+        assert sorted(requested) == [
+            ("bitcoin-core", ["1"]),
+            ("geth", ["0", "3"]),
+        ]
+        assert [tx.block_number for tx in txs] == [0, 1, 10, 3]
+
+    @staticmethod
+    async def test_sync_many_skips_failed(monkeypatch, loop):
+        geth = models.Node(name="geth", loop=loop)
+        bitcoin_core = models.Node(name="bitcoin-core", loop=loop)
+        requested = []
+
+        async def fetch_in_wallet_transactions(
+            connector, txids, return_exceptions=False
+        ):
+            assert return_exceptions
+            requested.append(txids)
+            if connector.node == "bitcoin-core":
+                raise exceptions.NetworkError("Node is down")
+            return [
+                exceptions.NodeError("Not found")
+                if txid == "1"
+                else {"block_number": int(txid)}
+                for txid in txids
+            ]
+
+        for connector in connectors.MAPPING.values():
+            monkeypatch.setattr(
+                connector,
+                "fetch_in_wallet_transactions",
+                fetch_in_wallet_transactions,
+            )
+        txs = [
+            models.Transaction(
+                node=node,
+                to_address="fake-addr",
+                amount=1,
+                txid=str(i),
+            )
+            for i, node in enumerate([geth, geth, geth, bitcoin_core])
+        ]
+        with pytest.raises(exceptions.NetworkError):
+            await models.Transaction.sync_many(txs, chunk_size=2)
+        assert sorted(requested) == [["0", "1"], ["2"], ["3"]]
+        assert [tx.block_number for tx in txs] == [0, None, 2, None]
+
+
 @pytest.mark.integration
 class TestTransactionIntegration:
     @staticmethod
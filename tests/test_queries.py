@@ -0,0 +1,183 @@
+# Copyright 2020 Alexander Polishchuk
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# pylint: disable = redefined-outer-name
+from decimal import Decimal
+
+import pytest
+
+from obm import connectors, models, queries, records
+
+
+def make_txs(count):
+    # Block 100 holds unconfirmed transactions, the others are one per block.
+    return [
+        records.TransactionRecord(
+            txid=str(i),
+            from_address="0xA" if i % 2 else None,
+            to_address="0xB",
+            amount=Decimal(i),
+            fee=Decimal("0.1"),
+            block_number=None if i == 0 else 100 - i,
+            category="send" if i % 2 else "receive",
+            timestamp=None,
+        )
+        for i in range(count)
+    ]
+
+
+@pytest.fixture
+def fetched(monkeypatch):
+    fetched = []
+    txs = make_txs(50)
+
+    async def fetch_recent_transactions(_, limit=10, **__):
+        fetched.append(limit)
+        return txs[:limit]
+
+    monkeypatch.setattr(
+        connectors.BitcoinCoreConnector,
+        "fetch_recent_transactions",
+        fetch_recent_transactions,
+    )
+    # Test against paging by fetch_recent_transactions.
+    monkeypatch.setattr(
+        connectors.BitcoinCoreConnector,
+        "iter_recent_transactions",
+        connectors.base.Connector.iter_recent_transactions,
+    )
+    return fetched
+
+
+@pytest.fixture
+def node(loop):
+    return models.Node(name="bitcoin-core", loop=loop)
+
+
+class TestTransactionQuerySet:
+    @staticmethod
+    async def test_is_lazy(node, fetched):
+        query = node.transactions.filter(category="send")[2:4]
+        assert fetched == []
+        txs = await query.all()
+        assert [tx["txid"] for tx in txs] == ["5", "7"]
+        assert fetched == [100]
+
+    @staticmethod
+    async def test_fetches_by_chunks(node, fetched):
+        query = queries.TransactionQuerySet(node, chunk_size=10)
+        txids = [tx["txid"] async for tx in query[:25]]
+        assert txids == [str(i) for i in range(25)]
+        assert fetched == [10, 20, 40]
+        fetched.clear()
+        assert len([tx async for tx in query.iterator(chunk_size=20)]) == 50
+        assert fetched == [20, 40, 80]
+
+    @staticmethod
+    async def test_new_transactions_dont_shift_pages(monkeypatch, node):
+        txs = make_txs(30)
+
+        async def fetch_recent_transactions(_, limit=10, **__):
+            result = txs[:limit]
+            # Transaction is received after each request.
+            txs.insert(
+                0,
+                records.TransactionRecord(
+                    txid=f"new-{len(txs)}",
+                    from_address=None,
+                    to_address="0xB",
+                    amount=Decimal(1),
+                    fee=Decimal("0.1"),
+                    block_number=None,
+                    category="receive",
+                    timestamp=None,
+                ),
+            )
+            return result
+
+        monkeypatch.setattr(
+            connectors.BitcoinCoreConnector,
+            "fetch_recent_transactions",
+            fetch_recent_transactions,
+        )
+        monkeypatch.setattr(
+            connectors.BitcoinCoreConnector,
+            "iter_recent_transactions",
+            connectors.base.Connector.iter_recent_transactions,
+        )
+        query = queries.TransactionQuerySet(node, chunk_size=10)
+        txids = [tx["txid"] async for tx in query]
+        assert txids == [str(i) for i in range(30)]
+
+    @staticmethod
+    @pytest.mark.parametrize(
+        "filters, expect",
+        (
+            ({"category": "receive"}, [str(i) for i in range(0, 50, 2)]),
+            ({"min_block": 95}, ["1", "2", "3", "4", "5"]),
+            ({"max_block": 52, "min_block": 51}, ["48", "49"]),
+            (
+                {"address": "0xa", "min_block": 90},
+                ["1", "3", "5", "7", "9"],
+            ),
+        ),
+        ids=("category", "min block", "blocks range", "address"),
+    )
+    async def test_filter(node, fetched, filters, expect):
+        txs = await node.transactions.filter(**filters).all()
+        assert [tx["txid"] for tx in txs] == expect
+
+    @staticmethod
+    async def test_order_by(node, fetched):
+        query = node.transactions.filter(min_block=96)
+        txs = await query.order_by("block_number").all()
+        assert [tx["txid"] for tx in txs] == ["4", "3", "2", "1"]
+        txs = await node.transactions.order_by("-block_number")[:2].all()
+        assert [tx["txid"] for tx in txs] == ["1", "2"]
+        # Unconfirmed transactions go last.
+        txs = await node.transactions.order_by("block_number").all()
+        assert txs[-1]["txid"] == "0"
+
+    @staticmethod
+    async def test_first_and_index(node, fetched):
+        assert (await node.transactions.first())["txid"] == "0"
+        assert (await node.transactions[3])["txid"] == "3"
+        assert await node.transactions.filter(min_block=1000).first() is None
+
+    @staticmethod
+    @pytest.mark.parametrize(
+        "build, error, error_msg",
+        (
+            (
+                lambda query: query.order_by("info"),
+                ValueError,
+                "Unsupported ordering field: 'info'. Available only: "
+                f"{queries.ORDERING_FIELDS}",
+            ),
+            (
+                lambda query: query[-1],
+                ValueError,
+                "Negative indexing is not supported",
+            ),
+            (
+                lambda query: query[:2].filter(category="send"),
+                TypeError,
+                "Cannot filter a query once a slice is taken",
+            ),
+        ),
+        ids=("wrong ordering field", "negative index", "filter after slice"),
+    )
+    def test_validation(node, build, error, error_msg):
+        with pytest.raises(error) as exc_info:
+            build(node.transactions)
+        assert exc_info.value.args[0] == error_msg
@@ -0,0 +1,75 @@
+# Copyright 2020 Alexander Polishchuk
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import pickle
+from decimal import Decimal
+
+import pytest
+
+from obm import connectors, records, serializers
+
+TX = {
+    "txid": "0x1",
+    "from_address": "0xa",
+    "to_address": "0xb",
+    "amount": Decimal("1"),
+    "fee": Decimal("0.000021"),
+    "block_number": 100,
+    "category": "send",
+    "timestamp": None,
+    "info": {"hash": "0x1"},
+}
+
+
+class TestTransactionRecord:
+    @staticmethod
+    def test_behaves_as_mapping():
+        record = records.TransactionRecord(**TX)
+        assert record == TX
+        assert TX == record
+        assert record["txid"] == record.txid == "0x1"
+        assert list(record) == list(records.TransactionRecord.FIELDS)
+        assert record.to_dict() == dict(record) == TX
+        assert serializers.Transaction().validate(record) == {}
+        with pytest.raises(KeyError):
+            record["hash"]  # pylint: disable=pointless-statement
+
+    @staticmethod
+    def test_has_no_instance_dict():
+        record = records.TransactionRecord(**TX)
+        assert not hasattr(record, "__dict__")
+        with pytest.raises(AttributeError):
+            record.extra = 1
+
+    @staticmethod
+    def test_pickle():
+        record = records.TransactionRecord(**TX)
+        assert pickle.loads(pickle.dumps(record)) == record
+
+    @staticmethod
+    @pytest.mark.parametrize("keep_info", (True, False))
+    def test_connector_keep_info(loop, keep_info):
+        geth = connectors.GethConnector(loop=loop, keep_info=keep_info)
+        tx = {
+            "hash": "0x1",
+            "from": "0xa",
+            "to": "0xb",
+            "value": "0xde0b6b3a7640000",
+            "gas": "0x5208",
+            "gasPrice": "0x3b9aca00",
+            "blockNumber": "0x64",
+        }
+        record = geth.format_transaction(tx, {"0xa"})
+        assert isinstance(record, records.TransactionRecord)
+        assert record["info"] == (tx if keep_info else None)
+        assert serializers.Transaction().validate(record) == {}
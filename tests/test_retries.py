@@ -0,0 +1,143 @@
+# Copyright 2020 Alexander Polishchuk
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import pytest
+
+from obm import connectors, exceptions, retries
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(retries.time, "monotonic", clock)
+    return clock
+
+
+def mock_send(monkeypatch, failures):
+    """Makes the node fail the given number of requests."""
+    sent = []
+
+    async def send(_, payload):
+        sent.append(payload["method"])
+        if len(sent) <= failures:
+            raise exceptions.NetworkError("Connection reset by peer")
+        return {"result": 100, "error": None, "id": payload["id"]}
+
+    monkeypatch.setattr(connectors.BitcoinCoreConnector, "send", send)
+    return sent
+
+
+class TestRetryPolicy:
+    @staticmethod
+    def test_delay_grows_exponentially():
+        policy = retries.RetryPolicy(base_delay=1, max_delay=5, jitter=False)
+        assert [policy.delay(attempt) for attempt in range(1, 5)] == [
+            1,
+            2,
+            4,
+            5,
+        ]
+
+    @staticmethod
+    def test_delay_jitter():
+        policy = retries.RetryPolicy(base_delay=1, max_delay=5)
+        delays = [policy.delay(3) for _ in range(100)]
+        assert all(0 <= delay <= 4 for delay in delays)
+        assert len(set(delays)) > 1
+
+    @staticmethod
+    async def test_connector_retries_idempotent_methods(monkeypatch, loop):
+        sent = mock_send(monkeypatch, failures=2)
+        connector = connectors.BitcoinCoreConnector(
+            loop=loop, retry_policy=retries.RetryPolicy(base_delay=0)
+        )
+        assert await connector.rpc_get_block_count() == 100
+        assert sent == ["getblockcount"] * 3
+
+    @staticmethod
+    async def test_connector_gives_up_after_max_attempts(monkeypatch, loop):
+        sent = mock_send(monkeypatch, failures=3)
+        connector = connectors.BitcoinCoreConnector(
+            loop=loop, retry_policy=retries.RetryPolicy(base_delay=0)
+        )
+        with pytest.raises(exceptions.NetworkError):
+            await connector.rpc_get_block_count()
+        assert len(sent) == 3
+
+    @staticmethod
+    async def test_connector_doesnt_retry_writes(monkeypatch, loop):
+        sent = mock_send(monkeypatch, failures=1)
+        connector = connectors.BitcoinCoreConnector(
+            loop=loop, retry_policy=retries.RetryPolicy(base_delay=0)
+        )
+        with pytest.raises(exceptions.NetworkError):
+            await connector.rpc_send_to_address("address", 1)
+        assert sent == ["sendtoaddress"]
+
+
+class TestCircuitBreaker:
+    @staticmethod
+    def test_state_transitions(clock):
+        breaker = retries.CircuitBreaker(
+            failure_threshold=2, recovery_timeout=10
+        )
+        breaker.before_call()
+        breaker.record_failure()
+        assert breaker.state == retries.CLOSED
+        breaker.record_failure()
+        assert breaker.state == retries.OPEN
+        with pytest.raises(exceptions.NodeUnavailableError):
+            breaker.before_call()
+
+        clock.now = 10
+        assert breaker.state == retries.HALF_OPEN
+        # Only a single trial request is let through.
+        breaker.before_call()
+        with pytest.raises(exceptions.NodeUnavailableError):
+            breaker.before_call()
+        breaker.record_failure()
+        assert breaker.state == retries.OPEN
+
+        clock.now = 20
+        breaker.before_call()
+        breaker.record_success()
+        assert breaker.state == retries.CLOSED
+        assert breaker.failures == 0
+
+    @staticmethod
+    async def test_connector_fails_fast(monkeypatch, loop, clock):
+        sent = mock_send(monkeypatch, failures=2)
+        connector = connectors.BitcoinCoreConnector(
+            loop=loop,
+            circuit_breaker=retries.CircuitBreaker(
+                failure_threshold=2, recovery_timeout=10
+            ),
+        )
+        for _ in range(2):
+            with pytest.raises(exceptions.NetworkError):
+                await connector.rpc_get_block_count()
+        with pytest.raises(exceptions.NodeUnavailableError):
+            await connector.rpc_get_block_count()
+        assert len(sent) == 2
+
+        clock.now = 10
+        assert await connector.rpc_get_block_count() == 100
+        assert connector.circuit_breaker.state == retries.CLOSED
@@ -13,11 +13,17 @@
 # limitations under the License.
 
 # pylint: disable = redefined-outer-name
+import asyncio
+import json
 import os
+import threading
+from concurrent import futures
+from collections.abc import Mapping
+from http import server
 
 import pytest
 
-from obm import serializers
+from obm import connectors, serializers
 from obm.sync import models
 
 
@@ -50,6 +56,33 @@ def sync_node(request, sync_geth_node, sync_bitcoin_core_node):
     return node_mapping[request.param]
 
 
+@pytest.fixture
+def http_node_port():
+    class Handler(server.BaseHTTPRequestHandler):
+        def do_POST(self):  # pylint: disable = invalid-name
+            length = int(self.headers["Content-Length"])
+            payload = json.loads(self.rfile.read(length))
+            body = json.dumps(
+                {"result": 100, "error": None, "id": payload["id"]}
+            ).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):  # pylint: disable = arguments-differ
+            pass
+
+    # Server runs in its own thread, so it doesn't depend on any loop.
+    http_server = server.ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=http_server.serve_forever, daemon=True)
+    thread.start()
+    yield http_server.server_address[1]
+    http_server.shutdown()
+    http_server.server_close()
+
+
 @pytest.mark.integration
 class TestNodeIntegration:
     @staticmethod
@@ -82,13 +115,78 @@ class TestNodeIntegration:
             },
         }
         tx = node.send_transaction(**tx_data[node.name])
-        assert isinstance(tx, dict)
+        assert isinstance(tx, Mapping)
         assert serializers.Transaction().validate(tx) == {}
 
 
 class TestNode:
+    @staticmethod
+    def test_given_loop(http_node_port):
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        try:
+            node = models.Node(
+                name="bitcoin-core",
+                rpc_host="127.0.0.1",
+                rpc_port=http_node_port,
+                rpc_username="user",
+                rpc_password="pass",
+                loop=loop,
+            )
+            with node:
+                assert node.get_latest_block_number() == 100
+        finally:
+            asyncio.set_event_loop(None)
+            loop.close()
+
     @staticmethod
     def test_sync_context_methods(node):
         with node:
             assert node.connector.session is not None
         assert node.connector.session is None
+
+
+class TestTransaction:
+    @staticmethod
+    def test_sync_many(monkeypatch, loop):
+        async def fetch_in_wallet_transactions(
+            _, txids, return_exceptions=False
+        ):
+            return [{"block_number": 1} for _ in txids]
+
+        monkeypatch.setattr(
+            connectors.GethConnector,
+            "fetch_in_wallet_transactions",
+            fetch_in_wallet_transactions,
+        )
+        node = models.Node(name="geth", loop=loop)
+        tx = models.Transaction(
+            node=node, to_address="fake-addr", amount=1, txid="0x1"
+        )
+        assert models.Transaction.sync_many([tx]) == [tx]
+        assert tx.block_number == 1
+
+
+class TestBackgroundLoop:
+    @staticmethod
+    def test_threads_share_node(monkeypatch):
+        calls = []
+
+        async def fetch_latest_block_number(_):
+            calls.append(threading.current_thread().name)
+            await asyncio.sleep(0.05)
+            return 100
+
+        monkeypatch.setattr(
+            connectors.GethConnector,
+            "fetch_latest_block_number",
+            fetch_latest_block_number,
+        )
+        node = models.Node(name="geth")
+        with futures.ThreadPoolExecutor(max_workers=8) as executor:
+            heads = list(
+                executor.map(lambda _: node.get_latest_block_number(), range(8))
+            )
+        assert heads == [100] * 8
+        # Concurrent calls from all threads share the same request.
+        assert calls == ["obm-event-loop"]
@@ -0,0 +1,144 @@
+# Copyright 2020 Alexander Polishchuk
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# pylint: disable = redefined-outer-name
+import pytest
+from aiohttp import web
+
+from obm import connectors, exceptions, tracing
+
+TX = {
+    "txid": "a",
+    "details": [{"category": "receive", "address": "b", "amount": 1}],
+    "confirmations": 1,
+    "blockheight": 100,
+    "time": 1600000000,
+}
+
+
+@pytest.fixture
+async def node_server(aiohttp_server):
+    def respond(payload):
+        result = TX if payload["method"] == "gettransaction" else 100
+        return {"result": result, "error": None, "id": payload["id"]}
+
+    async def handle(request):
+        payload = await request.json()
+        if isinstance(payload, list):
+            return web.json_response([respond(entry) for entry in payload])
+        return web.json_response(respond(payload))
+
+    app = web.Application()
+    app.router.add_post("/", handle)
+    return await aiohttp_server(app)
+
+
+def names(spans):
+    return sorted(span.name for span in spans)
+
+
+class TestTracer:
+    @staticmethod
+    def test_span_nesting():
+        tracer = tracing.RecordingTracer()
+        with tracer.span("parent", key="value") as parent:
+            assert tracing.get_current_span() is parent
+            with tracer.span("child") as child:
+                assert child.parent is parent
+        assert tracing.get_current_span() is None
+        assert tracer.spans == [child, parent]
+        assert parent.attributes == {"key": "value"}
+        assert parent.duration >= child.duration >= 0
+
+    @staticmethod
+    def test_span_error():
+        tracer = tracing.RecordingTracer()
+        with pytest.raises(ValueError):
+            with tracer.span("failed"):
+                raise ValueError("Boom")
+        assert isinstance(tracer.find("failed")[0].error, ValueError)
+
+    @staticmethod
+    def test_max_spans():
+        tracer = tracing.RecordingTracer(max_spans=2)
+        for name in ("a", "b", "c"):
+            with tracer.span(name):
+                pass
+        assert names(tracer.spans) == ["b", "c"]
+
+
+class TestConnectorTracing:
+    @staticmethod
+    async def test_spans(node_server):
+        tracer = tracing.RecordingTracer()
+        async with connectors.BitcoinCoreConnector(
+            rpc_host="127.0.0.1",
+            rpc_port=node_server.port,
+            rpc_username="user",
+            rpc_password="pass",
+            tracer=tracer,
+        ) as connector:
+            tx = await connector.fetch_in_wallet_transaction("a")
+        assert tx["txid"] == "a"
+
+        (root,) = tracer.find("fetch_in_wallet_transaction")
+        assert root.parent is None
+        assert root.attributes == {"node": "bitcoin-core"}
+        (batch,) = tracer.find("fetch_in_wallet_transactions")
+        assert batch.parent is root
+        (call,) = tracer.find("rpc.call")
+        assert call.attributes["method"] == "batch"
+        assert call.parent is batch
+        (format_span,) = tracer.find("format_transaction")
+        assert format_span.parent is batch
+
+        children = [s for s in tracer.spans if s.parent is call]
+        assert names(children) == [
+            "http.request",
+            "json.decode",
+        ]
+        (request,) = [s for s in children if s.name == "http.request"]
+        assert request.attributes["http.method"] == "POST"
+        assert request.attributes["http.status_code"] == 200
+        phases = [s for s in tracer.spans if s.parent is request]
+        assert "http.connection_create" in names(phases)
+        assert "http.first_byte" in names(phases)
+
+    @staticmethod
+    async def test_request_error(aiohttp_unused_port):
+        tracer = tracing.RecordingTracer()
+        async with connectors.BitcoinCoreConnector(
+            rpc_host="127.0.0.1",
+            rpc_port=aiohttp_unused_port(),
+            rpc_username="user",
+            rpc_password="pass",
+            tracer=tracer,
+        ) as connector:
+            with pytest.raises(exceptions.NetworkError):
+                await connector.fetch_latest_block_number()
+        (request,) = tracer.find("http.request")
+        assert request.error is not None
+        (call,) = tracer.find("rpc.call")
+        assert isinstance(call.error, exceptions.NetworkError)
+
+    @staticmethod
+    async def test_disabled_by_default(node_server):
+        async with connectors.BitcoinCoreConnector(
+            rpc_host="127.0.0.1",
+            rpc_port=node_server.port,
+            rpc_username="user",
+            rpc_password="pass",
+        ) as connector:
+            assert connector.tracer is tracing.NULL_TRACER
+            assert await connector.fetch_latest_block_number() == 100
+        assert tracing.get_current_span() is None
@@ -0,0 +1,110 @@
+# Copyright 2020 Alexander Polishchuk
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import asyncio
+import json
+
+import pytest
+from aiohttp import web
+
+from obm import connectors, exceptions, transports
+
+
+async def respond_later(payload):
+    # Earlier requests are answered later to check multiplexing.
+    await asyncio.sleep(0.001 * (10 - payload["id"] % 10))
+    return {"jsonrpc": "2.0", "result": payload["params"], "id": payload["id"]}
+
+
+@pytest.fixture
+async def ipc_path(loop, tmp_path):
+    handlers = []
+
+    async def handle(reader, writer):
+        handlers.append(asyncio.current_task())
+        async def reply(line):
+            response = await respond_later(json.loads(line))
+            writer.write(json.dumps(response).encode() + b"\n")
+
+        tasks = []
+        while line := await reader.readline():
+            tasks.append(asyncio.ensure_future(reply(line)))
+        await asyncio.gather(*tasks)
+        writer.close()
+
+    path = str(tmp_path / "geth.ipc")
+    server = await asyncio.start_unix_server(handle, path)
+    yield path
+    server.close()
+    await asyncio.gather(*handlers)
+
+
+@pytest.fixture
+async def ws_url(loop, aiohttp_server):
+    async def handle(request):
+        ws = web.WebSocketResponse()
+        await ws.prepare(request)
+
+        async def reply(data):
+            await ws.send_str(json.dumps(await respond_later(json.loads(data))))
+
+        tasks = [
+            asyncio.ensure_future(reply(message.data)) async for message in ws
+        ]
+        await asyncio.gather(*tasks)
+        return ws
+
+    app = web.Application()
+    app.router.add_get("/", handle)
+    server = await aiohttp_server(app)
+    return f"ws://{server.host}:{server.port}/"
+
+
+async def check_multiplexing(rpc_host, rpc_port, transport):
+    async with connectors.GethConnector(
+        rpc_host=rpc_host, rpc_port=rpc_port, transport=transport
+    ) as geth:
+        results = await asyncio.gather(
+            *[geth.rpc_eth_get_transaction_by_hash(n) for n in range(20)]
+        )
+        assert results == [[n] for n in range(20)]
+
+
+class TestTransports:
+    @staticmethod
+    async def test_ipc_multiplexing(ipc_path):
+        await check_multiplexing(ipc_path, 0, transports.IPC)
+
+    @staticmethod
+    async def test_websocket_multiplexing(ws_url):
+        host, port = ws_url.rstrip("/").rsplit(":", 1)
+        await check_multiplexing(host, int(port), transports.WEBSOCKET)
+
+    @staticmethod
+    async def test_connection_error(tmp_path):
+        transport = transports.IPCTransport(str(tmp_path / "missing.ipc"))
+        with pytest.raises(exceptions.NetworkError):
+            await transport.request({"method": "eth_gasPrice", "id": 1})
+
+    @staticmethod
+    async def test_timeout(tmp_path):
+        async def handle(reader, writer):
+            await reader.readline()
+
+        path = str(tmp_path / "silent.ipc")
+        server = await asyncio.start_unix_server(handle, path)
+        transport = transports.IPCTransport(path, timeout=0.01)
+        with pytest.raises(exceptions.NetworkTimeoutError):
+            await transport.request({"method": "eth_gasPrice", "id": 1})
+        await transport.close()
+        server.close()